@@ -0,0 +1,42 @@
+# atomic_io.py
+"""Crash-safe file writes: temp file in the target directory + rename"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+# mkstemp creates 0600 files; give the result the usual umask-based mode
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@contextmanager
+def atomic_writer(filename):
+    """Binary file object for streamed writes; `filename` appears on clean exit"""
+    directory = os.path.dirname(os.path.abspath(filename))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(filename)}.", suffix=".tmp", dir=directory
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, filename)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_bytes(filename, data):
+    with atomic_writer(filename) as f:
+        f.write(data)
+
+
+def atomic_write_text(filename, text, encoding="utf-8-sig"):
+    atomic_write_bytes(filename, text.encode(encoding))
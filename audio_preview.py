@@ -0,0 +1,282 @@
+# audio_preview.py
+"""Quick audition of a generated score: vowel-ish formant tone → WAV
+
+    python audio_preview.py song.txt                # → song.wav, prints render time
+    python audio_preview.py song.txt -o out.wav --play
+
+Not a singing synth, just enough to hear the melody: each note is a
+wavetable oscillator whose table has its harmonics shaped by the formants of
+the note's vowel. Pitch follows NoteNum (quarter-tones included) plus the
+PBS/PBW/PBY bend, loudness follows Intensity and the UST envelope, timing
+follows Tempo. Samples are rendered and written CHUNK_FRAMES at a time, so
+memory does not grow with the song length.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+import wave
+
+import numpy as np
+
+from atomic_io import atomic_writer
+from score import NOTE
+from tables import HIRAGANA_MAP
+
+SAMPLE_RATE = 22050
+CHUNK_FRAMES = 1 << 16
+TABLE_SIZE = 2048  # samples per wavetable cycle
+BAND_SEMITONES = 6  # wavetables are shaped per pitch band of this width
+MASTER_GAIN = 0.3
+
+# F1, F2, F3 (Hz) and relative level of the Japanese vowels + syllabic n
+FORMANTS = {
+    "a": ((800, 1200, 2500), (1.0, 0.5, 0.2)),
+    "i": ((300, 2300, 3000), (1.0, 0.3, 0.2)),
+    "u": ((350, 1300, 2300), (1.0, 0.3, 0.1)),
+    "e": ((500, 1900, 2500), (1.0, 0.4, 0.2)),
+    "o": ((500, 900, 2400), (1.0, 0.5, 0.1)),
+    "n": ((250, 1100, 2500), (1.0, 0.1, 0.05)),
+}
+VOWELS = tuple(FORMANTS)
+FORMANT_WIDTH = 90.0  # Hz, half-width of each resonance
+
+_KANA_VOWEL = {
+    kana: romaji.split("_")[0][-1]
+    for romaji, kana in HIRAGANA_MAP.items()
+    if romaji.split("_")[0][-1] in FORMANTS
+}
+
+_TABLES = None  # (len(VOWELS) * bands, TABLE_SIZE), built on first render
+
+
+def lyric_vowel(lyric, previous="a"):
+    """Vowel to sing a lyric on; "+" (held vowel) and unknowns keep `previous`"""
+    vowel = _KANA_VOWEL.get(lyric)
+    if vowel:
+        return vowel
+    last = lyric.strip()[-1:].lower()
+    return last if last in FORMANTS else previous
+
+
+def _band_count():
+    return 128 // BAND_SEMITONES + 1
+
+
+def _wavetables():
+    """One cycle per (vowel, pitch band), all built with a single irfft"""
+    global _TABLES
+    if _TABLES is None:
+        bands = np.arange(_band_count())
+        f0 = 440.0 * 2.0 ** (((bands + 0.5) * BAND_SEMITONES - 69) / 12.0)
+        harmonics = np.arange(1, TABLE_SIZE // 2)
+        freqs = f0[:, None] * harmonics[None, :]  # (bands, harmonics)
+        spectra = []
+        for vowel in VOWELS:
+            centres, levels = FORMANTS[vowel]
+            gain = sum(
+                level / (1.0 + ((freqs - centre) / FORMANT_WIDTH) ** 2)
+                for centre, level in zip(centres, levels)
+            )
+            gain = (gain + 0.02) / harmonics  # a little breath, spectral tilt
+            gain[freqs >= SAMPLE_RATE / 2] = 0.0  # no aliasing at the band top
+            spectra.append(gain)
+        spectrum = np.zeros((len(VOWELS) * len(bands), TABLE_SIZE // 2 + 1))
+        spectrum[:, 1 : TABLE_SIZE // 2] = np.concatenate(spectra)
+        tables = np.fft.irfft(-1j * spectrum, n=TABLE_SIZE, axis=1)  # sines
+        tables /= np.maximum(np.abs(tables).max(axis=1, keepdims=True), 1e-9)
+        _TABLES = tables.astype(np.float32)
+    return _TABLES
+
+
+def parse_envelope(envelope):
+    """UST Envelope "p1,p2,p3,v1,v2,v3,v4[,%,p4,...]" → (p1, p2, p3, p4, v1..v4)"""
+    values = [v.strip() for v in str(envelope).split(",")]
+    try:
+        p1, p2, p3, v1, v2, v3, v4 = (float(v) for v in values[:7])
+        p4 = float(values[8]) if len(values) > 8 else 0.0
+    except ValueError:
+        p1, p2, p3, p4, v1, v2, v3, v4 = 0, 5, 35, 0, 100, 100, 100, 0
+    return p1, p2, p3, p4, v1, v2, v3, v4
+
+
+class NoteTimeline:
+    """Score → sample-domain curves for the oscillator.
+
+    Pitch (semitones) and amplitude are each one global piecewise-linear
+    curve, stored as breakpoint arrays, so a chunk needs one np.interp per
+    curve whatever its notes are. Rests and small tsu have no amplitude
+    points and fall silent between the surrounding zeros.
+    """
+
+    def __init__(self, score, tempo, envelope, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        samples_per_tick = 60.0 * sample_rate / (float(tempo) * 480.0)
+        ms = sample_rate / 1000.0  # samples per ms
+
+        lengths = np.array([note.length for note in score], dtype=np.float64)
+        ticks = np.concatenate(([0.0], np.cumsum(lengths)))
+        edges = np.round(ticks * samples_per_tick).astype(np.int64)
+        self.starts = edges[:-1]
+        self.counts = np.diff(edges)
+        self.total = int(edges[-1])
+
+        pitch = np.array([float(n.note_num) for n in score])
+        voiced = np.array([n.kind == NOTE for n in score], dtype=bool)
+        band = np.clip(np.round(pitch).astype(np.int64) // BAND_SEMITONES, 0, _band_count() - 1)
+        vowel_ids = []
+        vowel = "a"
+        for note in score:
+            if note.kind == NOTE:
+                vowel = lyric_vowel(note.lyric, vowel)
+            vowel_ids.append(VOWELS.index(vowel))
+        # row offset of each note's wavetable in the flattened table array
+        self.table = (np.array(vowel_ids, dtype=np.int64) * _band_count() + band) * TABLE_SIZE
+
+        # Amplitude: envelope points per sung note, scaled by its intensity
+        p1, p2, p3, p4, v1, v2, v3, v4 = parse_envelope(envelope)
+        start = self.starts[voiced].astype(np.float64)
+        end = edges[1:][voiced].astype(np.float64)
+        offsets = np.array([0.0, p1, p1 + p2, -(p3 + p4), -p4, 0.0]) * ms
+        env_x = np.where(offsets >= 0, start[:, None], end[:, None]) + offsets
+        env_x[:, 0], env_x[:, -1] = start, end
+        env_x = np.clip(np.maximum.accumulate(env_x, axis=1), start[:, None], end[:, None])
+        gain = np.array([n.intensity for n in score])[voiced] / 100.0 * MASTER_GAIN
+        env_y = np.array([0.0, v1, v2, v3, v4, 0.0]) / 100.0 * gain[:, None]
+        self.amp_x = np.concatenate(([0.0], env_x.ravel()))
+        self.amp_y = np.concatenate(([0.0], env_y.ravel()))
+
+        # Pitch: flat per note, or its bend curve around the written NoteNum
+        # (a quarter-tone note is its rounded NoteNum bent half a semitone, the
+        # same fresh from the engine or read back from a UST)
+        pitch_x, pitch_y = [], []
+        for idx, note in enumerate(score):
+            start, end, base = self.starts[idx], edges[idx + 1], pitch[idx]
+            points = note.pitch_points()
+            if points:
+                xs = np.clip(
+                    np.maximum.accumulate([start + x * ms for x, _ in points]), start, end
+                )
+                written = float(round(base))
+                pitch_x += [start, *xs, end]
+                pitch_y += [points[0][1], *(y for _, y in points), written]
+            else:
+                pitch_x += [start, end]
+                pitch_y += [base, base]
+        self.pitch_x = np.array(pitch_x or [0.0], dtype=np.float64)
+        self.pitch_y = np.array(pitch_y or [60.0])
+
+    @property
+    def seconds(self):
+        return self.total / self.sample_rate
+
+
+def render_chunks(timeline, chunk_frames=CHUNK_FRAMES):
+    """Yield float32 mono chunks (≤ chunk_frames samples) of the whole timeline"""
+    sample_rate = timeline.sample_rate
+    tables = _wavetables().ravel()
+    phase = 0.0  # oscillator phase in cycles, carried across chunks
+    note = 0  # first note overlapping the chunk
+
+    for first in range(0, timeline.total, chunk_frames):
+        last = min(first + chunk_frames, timeline.total)
+        t = np.arange(first, last, dtype=np.float64)
+
+        # wavetable row per sample: repeat each note over its samples in the chunk
+        while timeline.starts[note] + timeline.counts[note] <= first:
+            note += 1
+        stop = np.searchsorted(timeline.starts, last, side="left")
+        counts = np.minimum(timeline.starts[note:stop] + timeline.counts[note:stop], last)
+        counts -= np.maximum(timeline.starts[note:stop], first)
+        rows = np.repeat(timeline.table[note:stop], counts)
+
+        pitch = np.interp(t, timeline.pitch_x, timeline.pitch_y)
+        step = np.exp2((pitch - 69.0) / 12.0) * (440.0 / sample_rate)
+        cycles = np.cumsum(step)
+        cycles += phase
+        phase = float(cycles[-1] % 1.0)
+        index = (cycles * TABLE_SIZE).astype(np.int64) & (TABLE_SIZE - 1)
+
+        amp = np.interp(t, timeline.amp_x, timeline.amp_y)
+        yield (tables[rows + index] * amp).astype(np.float32)
+
+
+def write_wav(
+    filename,
+    score,
+    tempo,
+    envelope,
+    sample_rate=SAMPLE_RATE,
+    chunk_frames=CHUNK_FRAMES,
+    on_progress=None,
+):
+    """Render the score into a 16-bit mono WAV → duration in seconds.
+
+    `on_progress("audio", done, total)` is called per chunk (in samples).
+    """
+    timeline = NoteTimeline(score, tempo, envelope, sample_rate)
+    done = 0
+    with atomic_writer(filename) as f:
+        with wave.open(f, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(sample_rate)
+            for chunk in render_chunks(timeline, chunk_frames):
+                pcm = np.clip(chunk * 32767.0, -32768, 32767).astype("<i2")
+                out.writeframes(pcm.tobytes())
+                done += len(chunk)
+                if on_progress:
+                    on_progress("audio", done, timeline.total)
+    return timeline.seconds
+
+
+def play_wav(filename):
+    """Start playback on whatever local player exists → True if one did"""
+    if sys.platform == "win32":
+        import winsound
+
+        winsound.PlaySound(filename, winsound.SND_FILENAME | winsound.SND_ASYNC)
+        return True
+    for player in ("afplay", "paplay", "aplay", "ffplay"):
+        path = shutil.which(player)
+        if path:
+            args = [path, filename]
+            if player == "ffplay":
+                args[1:1] = ["-nodisp", "-autoexit", "-loglevel", "quiet"]
+            subprocess.Popen(
+                args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            return True
+    return False
+
+
+def main(argv=None):
+    from generation_plan import GenerationPlan
+    from pipeline import Pipeline
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("lyrics", help="lyrics .txt file")
+    parser.add_argument("-o", "--output", help="WAV path (default: next to the lyrics)")
+    parser.add_argument("--play", action="store_true", help="play when done")
+    args = parser.parse_args(argv)
+
+    with open(args.lyrics, encoding="utf-8-sig") as f:
+        lyrics = f.read()
+    plan = GenerationPlan.from_settings({})
+    output = args.output or os.path.splitext(args.lyrics)[0] + ".wav"
+
+    score = Pipeline().run(lyrics, plan).score
+    started = time.perf_counter()
+    seconds = write_wav(output, score, plan.tempo, plan.envelope)
+    elapsed = time.perf_counter() - started
+    print(f"🔊 {output}: {seconds:.1f} s of audio rendered in {elapsed:.3f} s")
+    if args.play and not play_wav(output):
+        print("⚠️ No audio player found")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
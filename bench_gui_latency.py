@@ -0,0 +1,181 @@
+# bench_gui_latency.py
+"""Event-loop latency while a large song generates
+
+    python bench_gui_latency.py            # 400 lines, Tk loop if a display exists
+    python bench_gui_latency.py --lines 2000 --headless
+
+A tick is scheduled every TICK_MS; its lateness (actual - scheduled time) is
+what a user feels as UI lag. Measured twice: generating inline on the loop
+thread (the old GUI behaviour) and on the GenerationWorker thread with the
+GUI's queue polling.
+"""
+
+import argparse
+import statistics
+import time
+
+from gen_worker import GenerationWorker, DONE, ERROR, CANCELLED
+from generation_plan import GenerationPlan
+from pipeline import Pipeline
+
+TICK_MS = 10
+POLL_MS = 30
+
+SAMPLE_LINES = [
+    "きゃっきゃ うれし いたい さぶり",
+    "ゆびさき きりさけ あかい つゆ",
+    "いたみ いたみ きもちいい",
+]
+
+
+def make_lyrics(lines):
+    out = []
+    for i in range(lines):
+        if i % 24 == 0:
+            out.append(f"[Part {i // 24 + 1}]")
+        out.append(SAMPLE_LINES[i % len(SAMPLE_LINES)] + " " + "か" * (i % 7))
+    return "\n".join(out)
+
+
+class TkLoop:
+    def __init__(self):
+        import tkinter as tk
+
+        self.root = tk.Tk()
+        self.root.withdraw()
+
+    def after(self, ms, func):
+        self.root.after(ms, func)
+
+    def run(self):
+        self.root.mainloop()
+
+    def quit(self):
+        self.root.quit()
+
+    def close(self):
+        self.root.destroy()
+
+
+class SimLoop:
+    """Single-threaded stand-in for Tk's after() queue (no display needed)"""
+
+    def __init__(self):
+        self.timers = []
+        self.running = False
+
+    def after(self, ms, func):
+        self.timers.append((time.perf_counter() + ms / 1000.0, func))
+
+    def run(self):
+        self.running = True
+        while self.running and self.timers:
+            self.timers.sort(key=lambda t: t[0])
+            due, func = self.timers.pop(0)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            func()
+
+    def quit(self):
+        self.running = False
+
+    def close(self):
+        pass
+
+
+def measure(loop, start_generation, poll=None):
+    """Tick every TICK_MS until generation finishes → (lateness list ms, seconds)"""
+    lateness = []
+    state = {"done": False, "started": None, "elapsed": 0.0}
+
+    def tick(expected):
+        now = time.perf_counter()
+        lateness.append((now - expected) * 1000.0)
+        if state["done"]:
+            loop.quit()
+            return
+        due = now + TICK_MS / 1000.0
+        loop.after(TICK_MS, lambda: tick(due))
+
+    def finished():
+        state["done"] = True
+        state["elapsed"] = time.perf_counter() - state["started"]
+
+    def kick_off():
+        state["started"] = time.perf_counter()
+        start_generation(finished)
+
+    loop.after(0, lambda: tick(time.perf_counter()))
+    loop.after(TICK_MS * 3, kick_off)
+    if poll:
+        loop.after(POLL_MS, lambda: poll(loop))
+    loop.run()
+    return lateness, state["elapsed"]
+
+
+def report(label, lateness, elapsed):
+    lateness = sorted(lateness)
+    p95 = lateness[int(0.95 * (len(lateness) - 1))]
+    print(
+        f"{label:8s} gen {elapsed:6.3f}s | ticks {len(lateness):5d} | lateness "
+        f"p50 {statistics.median(lateness):7.1f} ms  p95 {p95:7.1f} ms  "
+        f"max {lateness[-1]:7.1f} ms"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=400)
+    parser.add_argument("--headless", action="store_true", help="skip Tk")
+    args = parser.parse_args(argv)
+
+    lyrics = make_lyrics(args.lines)
+    plan = GenerationPlan.from_settings({})
+
+    def make_loop():
+        if not args.headless:
+            try:
+                return TkLoop()
+            except Exception:
+                pass  # no display
+        return SimLoop()
+
+    # Inline: the pipeline blocks the loop thread
+    loop = make_loop()
+    print(f"🎵 {args.lines} lines, loop: {type(loop).__name__}")
+
+    def inline(finished):
+        Pipeline().run(lyrics, plan)
+        finished()
+
+    report("inline", *measure(loop, inline))
+    loop.close()
+
+    # Worker thread + queue polling, as in the GUI
+    loop = make_loop()
+    worker = GenerationWorker()
+    pending = {}
+
+    def threaded(finished):
+        pipeline = Pipeline()
+        pending["finished"] = finished
+        worker.submit(
+            "generate", lambda progress, warn: pipeline.run(lyrics, plan, warn, progress)
+        )
+
+    def poll(loop):
+        for kind, job, payload in worker.poll():
+            if kind in (DONE, ERROR, CANCELLED):
+                pending.pop("finished")()
+        if pending or not worker.current:
+            loop.after(POLL_MS, lambda: poll(loop))
+
+    report("worker", *measure(loop, threaded, poll))
+    worker.stop()
+    loop.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
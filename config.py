@@ -40,8 +40,8 @@ class HiroConfig:
     PAUSE_LINE_UNIT = 240  # line rests
     PAUSE_SECTION_UNIT = 480  # section rests
 
-    # Quarter‑tone → PBS scaling
-    PBS_SCALE = 50  # fraction * PBS_SCALE
+    # Mode2 PBS / PBY y values are in 1/10 semitones: offset in semitones * PBS_SCALE
+    PBS_SCALE = 10
 
     # Default envelope
     DEFAULT_ENVELOPE = "0,10,35,0,100,100,0"
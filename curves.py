@@ -0,0 +1,130 @@
+# curves.py
+"""Phrase-level expression: Mode2 pitch bends + intensity, computed as arrays"""
+
+import numpy as np
+
+from config import HiroConfig
+
+# Bend state per note (decided by the melody stage)
+BEND_NONE = 0
+BEND_QT_UP = 1  # quarter-tone above NoteNum
+BEND_QT_DOWN = 2  # quarter-tone below NoteNum
+BEND_DROP = 3  # accent falls on this mora
+BEND_RISE = 4  # Odaka rise into the 2nd mora
+BEND_HIGH = 5  # first high mora of a word
+
+# Depth choices per state in PBY units (1/10 semitone, HiroConfig.PBS_SCALE per
+# semitone), picked per note by one block of draws. A quarter-tone note is
+# written as the nearest NoteNum held half a semitone off; the accent depths
+# (1.5-5 semitones) are the ones the accent bends have always used.
+QT_DEPTH = round(0.5 * HiroConfig.PBS_SCALE)
+BEND_VARIANTS = {
+    BEND_NONE: (0,),
+    BEND_QT_UP: (QT_DEPTH,),
+    BEND_QT_DOWN: (-QT_DEPTH,),
+    BEND_DROP: (-50, -40, -35, -30, -25),
+    BEND_RISE: (25, 35, 45),
+    BEND_HIGH: (15, 20),
+}
+_VARIANT_COUNTS = np.array([len(BEND_VARIANTS[s]) for s in range(len(BEND_VARIANTS))])
+
+# Length buckets (lower edges, ticks) and the length each bucket is shaped for
+LENGTH_BUCKETS = np.array([0, 200, 480, 960])
+BUCKET_TICKS = (HiroConfig.MIN_NOTE_LEN, 240, 480, 960)
+
+# PBS, PBW, PBY, PBM for a plain note (what the templates always wrote)
+FLAT_BEND = ("0;0", "0", "0", ",")
+
+# (ms per tick, state, bucket, variant) → formatted fields; shared by every song
+_TEMPLATE_CACHE = {}
+
+
+def bend_state(note_num, quartertone_mode, accent_enabled, accent, brain):
+    """Classify the note just produced by MelodyBrain.plan_note"""
+    if quartertone_mode and note_num != int(note_num):
+        return BEND_QT_UP if note_num > round(note_num) else BEND_QT_DOWN
+    if accent_enabled:
+        if not brain.is_high_pitch and brain.prev_high_pitch:
+            return BEND_DROP
+        if accent == "Odaka" and brain.word_pos == 2:
+            return BEND_RISE
+        if brain.word_pos == 1 and brain.is_high_pitch:
+            return BEND_HIGH
+    return BEND_NONE
+
+
+class CurveStage:
+    """Computes bends and intensities for a whole phrase at once.
+
+    Formatted (PBS, PBW, PBY, PBM) strings are cached per tempo and
+    (state, length bucket, variant), so a process only formats a few dozen.
+    """
+
+    def __init__(self, plan, seed=None):
+        self.plan = plan
+        self.rng = np.random.default_rng(seed)
+        self.ms_per_tick = 60000.0 / (float(plan.tempo) * 480.0)
+
+    def _template(self, state, bucket, variant):
+        key = (self.ms_per_tick, state, bucket, variant)
+        fields = _TEMPLATE_CACHE.get(key)
+        if fields is None:
+            fields = self._format(state, bucket, variant)
+            _TEMPLATE_CACHE[key] = fields
+        return fields
+
+    def _format(self, state, bucket, variant):
+        if state == BEND_NONE:
+            return FLAT_BEND
+        length_ticks = BUCKET_TICKS[bucket]
+        depth = BEND_VARIANTS[state][variant]
+        note_ms = max(1, int(length_ticks * self.ms_per_tick))
+
+        if state in (BEND_QT_UP, BEND_QT_DOWN):
+            # glide in, hold the quarter-tone, settle at the end
+            ramp = max(10, note_ms // 6)
+            hold = max(1, note_ms - 2 * ramp)
+            return ("0;0", f"{ramp},{hold},{ramp}", f"{depth},{depth}", "s,s,s")
+
+        if state == BEND_DROP:
+            if bucket == 0:
+                return (f"0;{-depth // 2}", "25", "", "")
+            tail = int(length_ticks * 0.15 * self.ms_per_tick)
+            return (
+                f"0;{-depth // 2}",
+                f"25,50,{max(1, tail)}",
+                f"{depth},{depth // 2}",
+                "s,s,r",
+            )
+
+        if state == BEND_RISE:
+            return (f"0;{-depth}", "20", "", "j")
+
+        # BEND_HIGH: short scoop into the high mora
+        return (f"0;{-depth}", "10", "", "")
+
+    def phrase_curves(self, note_nums, lengths, states, heights, phrase_lens):
+        """Arrays for one phrase → (bend field tuples, intensities)"""
+        n = len(note_nums)
+        if not n:
+            return [], []
+        plan = self.plan
+        states = np.asarray(states, dtype=np.int8)
+
+        variants = (self.rng.random(n) * _VARIANT_COUNTS[states]).astype(np.int64)
+        buckets = np.searchsorted(LENGTH_BUCKETS, np.asarray(lengths), side="right") - 1
+        bends = [
+            self._template(s, b, v)
+            for s, b, v in zip(states.tolist(), buckets.tolist(), variants.tolist())
+        ]
+
+        # MelodyBrain.get_intensity, then offset by the base intensity
+        heights = np.asarray(heights, dtype=float)
+        progress = np.asarray(phrase_lens, dtype=float) / 12.0
+        melody = 80 + (np.abs(heights - 5) * 8).astype(np.int64)
+        melody += np.where(progress > 0.8, 15, 0)
+        melody = np.clip(melody, 50, 120)
+        intensities = np.clip(
+            plan.intensity_base + (melody - 80), plan.intensity_min, plan.intensity_max
+        )
+        return bends, intensities.tolist()
@@ -0,0 +1,119 @@
+# gen_worker.py
+"""Background generation for the Tk GUI (no Tk imports)
+
+Jobs run one at a time on a daemon thread. Everything they report (progress,
+warnings, result, error) goes into `messages`, which the GUI drains from
+root.after() so Tk is only ever touched on the main thread. Cancellation is
+cooperative: the job's progress callback raises GenerationCancelled once the
+job is cancelled, and the engine reports progress after every phrase.
+"""
+
+import itertools
+import queue
+import threading
+import time
+
+PROGRESS_INTERVAL = 0.05  # seconds between progress messages per job
+
+# Message kinds
+PROGRESS = "progress"
+WARNING = "warning"
+DONE = "done"
+ERROR = "error"
+CANCELLED = "cancelled"
+
+
+class GenerationCancelled(Exception):
+    pass
+
+
+class Job:
+    __slots__ = ("id", "kind", "func", "context", "cancel_event", "finished")
+
+    def __init__(self, job_id, kind, func, context=None):
+        self.id = job_id
+        self.kind = kind  # "generate", "save", "preview", ...
+        self.func = func  # func(progress, warn) → result, on the worker thread
+        self.context = context  # GUI-side data, returned untouched
+        self.cancel_event = threading.Event()
+        self.finished = False
+
+    def cancel(self):
+        self.cancel_event.set()
+
+
+class GenerationWorker:
+    """One worker thread; submitting a job cancels the one still running"""
+
+    def __init__(self):
+        self.messages = queue.Queue()
+        self.current = None  # latest submitted job; older results are stale
+        self._jobs = queue.Queue()
+        self._ids = itertools.count(1)
+        self._thread = threading.Thread(
+            target=self._run, name="hiro-generate", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def busy(self):
+        return self.current is not None and not self.current.finished
+
+    def submit(self, kind, func, context=None):
+        if self.current is not None:
+            self.current.cancel()
+        job = Job(next(self._ids), kind, func, context)
+        self.current = job
+        self._jobs.put(job)
+        return job
+
+    def cancel(self):
+        if self.current is not None:
+            self.current.cancel()
+
+    def poll(self):
+        """Drain pending messages → [(kind, job, payload)] (main thread)"""
+        pending = []
+        while True:
+            try:
+                pending.append(self.messages.get_nowait())
+            except queue.Empty:
+                return pending
+
+    def stop(self):
+        self.cancel()
+        self._jobs.put(None)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            try:
+                if job.cancel_event.is_set():
+                    raise GenerationCancelled()
+                result = job.func(self._progress_callback(job), self._warn_callback(job))
+                outcome = (DONE, job, result)
+            except GenerationCancelled:
+                outcome = (CANCELLED, job, None)
+            except Exception as e:
+                outcome = (ERROR, job, e)
+            job.finished = True
+            self.messages.put(outcome)
+
+    def _progress_callback(self, job):
+        last = 0.0
+
+        def progress(stage, done, total):
+            nonlocal last
+            if job.cancel_event.is_set():
+                raise GenerationCancelled()
+            now = time.perf_counter()
+            if now - last >= PROGRESS_INTERVAL:
+                last = now
+                self.messages.put((PROGRESS, job, (stage, done, total)))
+
+        return progress
+
+    def _warn_callback(self, job):
+        return lambda msg: self.messages.put((WARNING, job, msg))
@@ -0,0 +1,406 @@
+# generation_plan.py
+"""Immutable per-song generation plan: every string-keyed setting resolved once"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Any, Tuple
+
+from config import HiroConfig
+from envelopes import ENVELOPE_PRESETS
+from intone_utils import INTONE_SETTINGS, get_intone_settings
+from key_roots import KEY_ROOTS
+from repeats import REPEAT_MODES
+from rhythm_templates import RHYTHM_TEMPLATES, parse_grid
+from tables import SCALES
+
+ACCENT_PATTERNS = ["None", "Heiban", "Atamadaka", "Nakadaka", "Odaka"]
+
+PHONEME_MODES = {
+    "Japanese": "japanese",
+    "Hepburn": "hepburn",
+    "Wapuro": "wapuro",
+    "English": "english",
+}
+
+NOTE_FLAGS = "g0B0H0P86"
+
+# GUI defaults, in preset-key form (see presets.build_preset_from_app)
+DEFAULT_SETTINGS = {
+    "tempo": "120.00",
+    "length": "240",
+    "voice": "Alto",
+    "scale": "Major Pentatonic",
+    "intone": "Medium (2)",
+    "length_var": "0.3",
+    "stretch": "0.25",
+    "pre_utterance": "25",
+    "voice_overlap": "10",
+    "intensity": "80",
+    "motif": True,
+    "lyrical": True,
+    "flat": False,
+    "quartertone": False,
+    "chord": False,
+    "vibrato": True,
+    "section_streams": False,
+    "line_streams": False,
+    "repeat": "New",
+    "lyric_echo": False,
+    "accent": "None",
+    "contour": "0",
+    "range": "70",
+    "project": "Hiro_Main",
+    "line_pause": "960",
+    "section_pause": "1920",
+    "envelope": "Pop",
+    "seed": "1234",
+    "rhythm": "Straight",
+    "grid": "Off",
+    "phoneme_mode": "Japanese",
+}
+
+
+class PlanError(ValueError):
+    """Invalid settings; `errors` holds one GUI-ready message per field"""
+
+    def __init__(self, errors):
+        super().__init__(" | ".join(errors))
+        self.errors = list(errors)
+
+
+def resolve_envelope(name_or_points):
+    """Envelope preset name (or a literal point list) → envelope string"""
+    if "," in str(name_or_points):
+        return str(name_or_points)
+    return ENVELOPE_PRESETS.get(name_or_points, HiroConfig.DEFAULT_ENVELOPE)
+
+
+def _as_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except ValueError:
+        return int(float(value))
+
+
+@dataclass(frozen=True)
+class GenerationPlan:
+    # Song / output
+    project_name: str
+    tempo: float
+    seed: int
+    line_pause: int
+    section_pause: int
+    phoneme_mode: str
+
+    # Timing
+    base_length: int
+    length_var: float
+    stretch_prob: float
+    rhythm: str
+    grid: int
+
+    # Pitch
+    root_key: int
+    scale_name: str
+    scale: Tuple[int, ...]
+    off_scale: Tuple[int, ...]
+    intone_level: str
+    leap: int
+    phrase_limit: int
+    contour_span: int
+    contour_curve: float
+    pitch_range: float
+    vowel_choices: Tuple[int, ...]
+    consonant_choices: Tuple[int, ...]
+    chord_tones: Tuple[Tuple[int, ...], ...]  # indexed by beat position 0-7
+
+    # Modes
+    flat_mode: bool
+    quartertone_mode: bool
+    lyrical_mode: bool
+    use_motifs: bool
+    chord_mode: bool
+    vibrato: bool
+    section_streams: bool
+    line_streams: bool
+    repeat_mode: str
+    lyric_echo: bool
+    accent: str
+    accent_enabled: bool
+
+    # UST fields
+    pre_utterance: int
+    voice_overlap: int
+    intensity_base: int
+    envelope: str
+    flags: str
+    intensity_min: int
+    intensity_max: int
+
+    @classmethod
+    def compile(
+        cls,
+        project_name="Hiro_Main",
+        tempo=120.0,
+        base_length=240,
+        root_key=60,
+        scale_name="Major Pentatonic",
+        intone_level="Medium (2)",
+        length_var=0.3,
+        stretch_prob=0.25,
+        pre_utterance=25,
+        voice_overlap=10,
+        intensity_base=80,
+        envelope=HiroConfig.DEFAULT_ENVELOPE,
+        flat_mode=False,
+        quartertone_mode=False,
+        lyrical_mode=True,
+        use_motifs=True,
+        chord_mode=False,
+        contour_bias=0,
+        pitch_range=70,
+        accent="None",
+        vibrato=True,
+        section_streams=False,
+        line_streams=False,
+        repeat_mode="New",
+        lyric_echo=False,
+        rhythm="Straight",
+        grid=0,
+        seed=1234,
+        line_pause=960,
+        section_pause=1920,
+        phoneme_mode="japanese",
+    ):
+        """Build a plan from already-typed values (the text_to_ust arguments)"""
+        scale = tuple(SCALES[scale_name])
+        intone = get_intone_settings(intone_level)
+        leap = intone["leap"]
+
+        consonant_choices = [0, 2, 4, 7]
+        if leap > 2:
+            consonant_choices.extend([9, 11])
+
+        chord_tones = []
+        for beat_pos in range(8):
+            chord_root = {0: 0, 3: 5, 5: 7}.get(beat_pos // 3 % 3, 0)
+            tones = [(chord_root + i) % 12 for i in [0, 4, 7]]
+            chord_tones.append(tuple(n for n in tones if n in scale))
+
+        return cls(
+            project_name=str(project_name),
+            tempo=tempo,
+            seed=seed,
+            line_pause=line_pause,
+            section_pause=section_pause,
+            phoneme_mode=phoneme_mode,
+            base_length=base_length,
+            length_var=length_var,
+            stretch_prob=stretch_prob,
+            rhythm=rhythm,
+            grid=int(grid or 0),
+            root_key=root_key,
+            scale_name=scale_name,
+            scale=scale,
+            off_scale=tuple(n for n in range(12) if n not in scale),
+            intone_level=intone_level,
+            leap=leap,
+            phrase_limit=intone["phrase"],
+            contour_span=max(12, intone["phrase"]),
+            contour_curve=contour_bias / 100.0,
+            pitch_range=pitch_range,
+            vowel_choices=tuple([4, 7] + list(scale[-3:])),
+            consonant_choices=tuple(consonant_choices),
+            chord_tones=tuple(chord_tones),
+            flat_mode=bool(flat_mode),
+            quartertone_mode=bool(quartertone_mode),
+            lyrical_mode=bool(lyrical_mode),
+            use_motifs=bool(use_motifs),
+            chord_mode=bool(chord_mode),
+            vibrato=bool(vibrato),
+            section_streams=bool(section_streams),
+            line_streams=bool(line_streams),
+            repeat_mode=repeat_mode,
+            lyric_echo=bool(lyric_echo),
+            accent=accent,
+            accent_enabled=accent != "None",
+            pre_utterance=pre_utterance,
+            voice_overlap=voice_overlap,
+            intensity_base=intensity_base,
+            envelope=envelope,
+            flags=NOTE_FLAGS,
+            intensity_min=HiroConfig.RENDER_INTENSITY_MIN,
+            intensity_max=HiroConfig.RENDER_INTENSITY_MAX,
+        )
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]):
+        """Validate a preset-style dict (GUI/preset/API) and compile it.
+
+        Missing keys fall back to DEFAULT_SETTINGS. Raises PlanError listing
+        every invalid field.
+        """
+        s = dict(DEFAULT_SETTINGS)
+        s.update({k: v for k, v in settings.items() if v is not None})
+        errors = []
+
+        def number(key, name, cast, minv=None, maxv=None, unit=""):
+            try:
+                value = cast(s[key])
+            except (TypeError, ValueError):
+                errors.append(f"{name}: Enter number")
+                return None
+            if minv is not None and not minv <= value <= maxv:
+                errors.append(f"{name}: {minv}-{maxv}{unit}")
+            return value
+
+        tempo = number(
+            "tempo", "Tempo", float, HiroConfig.MIN_TEMPO, HiroConfig.MAX_TEMPO, " BPM"
+        )
+        length = number(
+            "length",
+            "Base Length",
+            int,
+            HiroConfig.MIN_NOTE_LEN,
+            HiroConfig.MAX_NOTE_LEN,
+            " ticks",
+        )
+        line_pause = number(
+            "line_pause",
+            "Line Pause",
+            _as_int,
+            HiroConfig.MIN_LINE_PAUSE,
+            HiroConfig.MAX_LINE_PAUSE,
+        )
+        section_pause = number(
+            "section_pause",
+            "Section Pause",
+            _as_int,
+            HiroConfig.MIN_SECTION_PAUSE,
+            HiroConfig.MAX_SECTION_PAUSE,
+        )
+        length_var = number(
+            "length_var",
+            "Len Var",
+            float,
+            HiroConfig.MIN_LENGTH_VAR,
+            HiroConfig.MAX_LENGTH_VAR,
+        )
+        stretch = number(
+            "stretch", "Stretch", float, HiroConfig.MIN_STRETCH, HiroConfig.MAX_STRETCH
+        )
+        pre_utter = number(
+            "pre_utterance",
+            "PreUtterance",
+            _as_int,
+            HiroConfig.MIN_PRE_UTTER,
+            HiroConfig.MAX_PRE_UTTER,
+        )
+        overlap = number(
+            "voice_overlap",
+            "Voice Overlap",
+            _as_int,
+            HiroConfig.MIN_VOICE_OVERLAP,
+            HiroConfig.MAX_VOICE_OVERLAP,
+        )
+        intensity = number(
+            "intensity",
+            "Intensity",
+            _as_int,
+            HiroConfig.MIN_INTENSITY,
+            HiroConfig.MAX_INTENSITY,
+        )
+        seed = number("seed", "Seed", _as_int)
+        contour = number("contour", "Curve", float)
+        pitch_range = number("range", "Range", float)
+
+        if s["voice"] not in KEY_ROOTS:
+            errors.append("Voice: Select from dropdown")
+        if s["scale"] not in SCALES:
+            errors.append("Scale: Select from dropdown")
+        if s["intone"] not in INTONE_SETTINGS:
+            errors.append("Intone: Select from dropdown")
+        if s["accent"] not in ACCENT_PATTERNS:
+            errors.append("Accent: Select from dropdown")
+        if s["rhythm"] not in RHYTHM_TEMPLATES:
+            errors.append("Rhythm: Select from dropdown")
+        if s["repeat"] not in REPEAT_MODES:
+            errors.append("Repeat: Select from dropdown")
+        if s["phoneme_mode"] not in PHONEME_MODES:
+            errors.append("Phoneme: Select from dropdown")
+
+        if errors:
+            raise PlanError(errors)
+
+        return cls.compile(
+            project_name=s["project"],
+            tempo=tempo,
+            base_length=length,
+            root_key=KEY_ROOTS[s["voice"]],
+            scale_name=s["scale"],
+            intone_level=s["intone"],
+            length_var=length_var,
+            stretch_prob=stretch,
+            pre_utterance=pre_utter,
+            voice_overlap=overlap,
+            intensity_base=intensity,
+            envelope=resolve_envelope(s["envelope"]),
+            flat_mode=_as_bool(s["flat"]),
+            quartertone_mode=_as_bool(s["quartertone"]),
+            lyrical_mode=_as_bool(s["lyrical"]),
+            use_motifs=_as_bool(s["motif"]),
+            chord_mode=_as_bool(s["chord"]),
+            vibrato=_as_bool(s["vibrato"]),
+            section_streams=_as_bool(s["section_streams"]),
+            line_streams=_as_bool(s["line_streams"]),
+            repeat_mode=s["repeat"],
+            lyric_echo=_as_bool(s["lyric_echo"]),
+            contour_bias=contour,
+            pitch_range=pitch_range,
+            accent=s["accent"],
+            rhythm=s["rhythm"],
+            grid=parse_grid(s["grid"]),
+            seed=seed,
+            line_pause=line_pause,
+            section_pause=section_pause,
+            phoneme_mode=PHONEME_MODES[s["phoneme_mode"]],
+        )
+
+    @classmethod
+    def from_app(cls, app):
+        """Read the Tk variables once and compile"""
+        from presets import build_preset_from_app
+
+        return cls.from_settings(build_preset_from_app(app))
+
+
+@lru_cache(maxsize=64)
+def melody_plan(
+    scale_name,
+    intone_level,
+    flat_mode,
+    quartertone_mode,
+    use_motifs,
+    chord_mode,
+    contour_bias,
+    pitch_range,
+    accent,
+):
+    """Cached plan for callers still using MelodyBrain.get_smart_note's arguments"""
+    return GenerationPlan.compile(
+        scale_name=scale_name,
+        intone_level=intone_level,
+        flat_mode=flat_mode,
+        quartertone_mode=quartertone_mode,
+        use_motifs=use_motifs,
+        chord_mode=chord_mode,
+        contour_bias=contour_bias,
+        pitch_range=pitch_range,
+        accent=accent,
+    )
@@ -0,0 +1,206 @@
+# generation_profile.py
+"""One song under cProfile, for bug reports (python hiro_cli.py song.txt --profile)
+
+profile_song runs parse_song_structure → render_ust (what text_to_ust does)
+with the tables, phonemizer and lazy imports already loaded, so only the
+song's own work is measured, and writes next to each other:
+
+    <base>.pstats         python -m pstats / snakeviz / tuna
+    <base>.collapsed.txt  "frame;frame;frame µs" lines for flamegraph.pl,
+                          speedscope, inferno; the root frame names the song
+                          and seed
+    <base>.profile.json   settings, seed, lyrics hash, Python / platform,
+                          hottest functions and (with allocations) the top
+                          tracemalloc allocation sites
+
+cProfile records caller → callee totals, not whole stacks, so the collapsed
+stacks split each function's time over its callers in proportion to what each
+caller spent in it (exact for functions with one caller, the usual case here).
+"""
+
+import cProfile
+import hashlib
+import json
+import marshal
+import os
+import platform
+import pstats
+import re
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict
+
+from atomic_io import atomic_write_bytes, atomic_write_text
+
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 15
+MIN_STACK_US = 1  # collapsed stacks below this are dropped
+
+
+def frame_name(func):
+    """pstats (file, line, name) → flamegraph frame ("module:name:line")"""
+    filename, line, name = func
+    if filename == "~":  # built-in; addresses would split runs apart
+        label = re.sub(r" at 0x[0-9a-fA-F]+", "", name.strip("<>"))
+    else:
+        module = os.path.splitext(os.path.basename(filename))[0]
+        label = f"{module}:{name}:{line}"
+    return label.replace(";", ",")
+
+
+def collapsed_stacks(stats, root=None):
+    """pstats.Stats → {"a;b;c": µs of own time spent in that stack}"""
+    entries = stats.stats  # func → (cc, nc, tt, ct, {caller: (cc, nc, tt, ct)})
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    stacks = {}
+
+    def walk(func, path, seen, seconds):
+        _, _, own, total, _ = entries[func]
+        share = min(seconds / total, 1.0) if total > 0 else 1.0
+        us = round(own * share * 1e6)
+        if us >= MIN_STACK_US:
+            key = ";".join(path)
+            stacks[key] = stacks.get(key, 0) + us
+        for callee, edge_seconds in callees.get(func, ()):
+            spent = edge_seconds * share
+            if callee in seen or spent * 1e6 < MIN_STACK_US:
+                continue  # recursion is folded into the outer call
+            walk(callee, path + [frame_name(callee)], seen | {callee}, spent)
+
+    prefix = [root.replace(";", ",")] if root else []
+    for func, (_, _, _, total, callers) in entries.items():
+        if not callers:
+            walk(func, prefix + [frame_name(func)], {func}, total)
+    return stacks
+
+
+def hottest(stats, limit=TOP_FUNCTIONS):
+    """[(frame, calls, own ms, cumulative ms)] by own time"""
+    rows = [
+        (frame_name(func), nc, tt * 1000.0, ct * 1000.0)
+        for func, (_, nc, tt, ct, _) in stats.stats.items()
+    ]
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows[:limit]
+
+
+def profile_song(lyrics, plan, base, allocations=False, source=None):
+    """Generate under cProfile (+ tracemalloc) and write the three files.
+
+    Returns (UST text, report dict; the report is what .profile.json holds).
+    """
+    from melody_logic import MelodyBrain
+    from phonemizer import Phonemizer
+    from ust_engine import HiroUSTGenerator, parse_song_structure, render_ust
+
+    HiroUSTGenerator()  # mora trie, outside the profile
+    phonemizer = Phonemizer()
+    phonemizer.set_mode(plan.phoneme_mode)
+    # one-mora song first: lazy imports (numpy.random, ...) are not the song's cost
+    _, warm = parse_song_structure("あ", phonemizer=phonemizer)
+    render_ust(warm, plan, MelodyBrain(seed=plan.seed))
+    warnings = []
+
+    profiler = cProfile.Profile()
+    if allocations:
+        tracemalloc.start(25)
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        _, elements = parse_song_structure(
+            lyrics,
+            plan.line_pause,
+            plan.section_pause,
+            on_warning=warnings.append,
+            phonemizer=phonemizer,
+        )
+        ust = render_ust(elements, plan, MelodyBrain(seed=plan.seed))
+    finally:
+        profiler.disable()
+        seconds = time.perf_counter() - started
+        if allocations:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    profiler.create_stats()
+    stats = pstats.Stats(profiler)
+    name = os.path.basename(source) if source else plan.project_name
+    root = f"{name} seed={plan.seed}"
+    stacks = collapsed_stacks(stats, root)
+    files = {
+        "pstats": base + ".pstats",
+        "collapsed": base + ".collapsed.txt",
+        "report": base + ".profile.json",
+    }
+    report = {
+        "lyrics": source,
+        "lyrics_sha1": hashlib.sha1(lyrics.encode("utf-8")).hexdigest(),
+        "lines": lyrics.count("\n") + 1,
+        "seed": plan.seed,
+        "settings": asdict(plan),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "seconds": seconds,
+        "elements": len(elements),
+        "warnings": warnings,
+        "top": [
+            {"function": f, "calls": n, "own_ms": own, "cum_ms": cum}
+            for f, n, own, cum in hottest(stats)
+        ],
+        "files": files,
+    }
+    if allocations:
+        sites = snapshot.filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        ).statistics("lineno")
+        report["allocations"] = {
+            "peak_kb": peak / 1024.0,
+            "top": [
+                {
+                    "where": f"{os.path.basename(s.traceback[0].filename)}:"
+                    f"{s.traceback[0].lineno}",
+                    "kb": s.size / 1024.0,
+                    "count": s.count,
+                }
+                for s in sites[:TOP_ALLOCATIONS]
+            ],
+        }
+
+    atomic_write_bytes(files["pstats"], marshal.dumps(stats.stats))
+    atomic_write_text(
+        files["collapsed"],
+        "".join(f"{stack} {us}\n" for stack, us in sorted(stacks.items())),
+        encoding="utf-8",
+    )
+    atomic_write_text(
+        files["report"],
+        json.dumps(report, ensure_ascii=False, indent=2),
+        encoding="utf-8",
+    )
+    return ust, report
+
+
+def format_report(report, limit=10):
+    """Short text summary of a profile_song report"""
+    lines = [
+        f"🔬 {report['lines']} lines, {report['elements']} elements, seed "
+        f"{report['seed']}: {report['seconds'] * 1000.0:.1f} ms under cProfile",
+        f"  {'own ms':>9s} {'cum ms':>9s} {'calls':>8s}  function",
+    ]
+    for row in report["top"][:limit]:
+        lines.append(
+            f"  {row['own_ms']:9.1f} {row['cum_ms']:9.1f} {row['calls']:8d}"
+            f"  {row['function']}"
+        )
+    allocations = report.get("allocations")
+    if allocations:
+        lines.append(f"  peak {allocations['peak_kb']:.0f} KiB; top allocation sites:")
+        for site in allocations["top"][:limit]:
+            lines.append(f"  {site['kb']:9.1f} KiB {site['count']:8d}  {site['where']}")
+    lines.extend(f"  → {path}" for path in report["files"].values())
+    return "\n".join(lines)
@@ -0,0 +1,330 @@
+# hiro_api.py
+"""Programmatic API
+
+    from hiro_api import generate
+
+    song = generate(lyrics, {"scale": "C Minor", "tempo": 140, "seed": 7})
+    song.notes          # [ScoreNote, ...] incl. rests / small tsu
+    song.sections       # [Section(name, first_note, end_note, start_tick, end_tick)]
+    song.timing         # total ticks / seconds + start tick of every note
+    song.stats          # counts and stage times
+
+    song = generate(lyrics, settings, stats=True)
+    song.stage_stats.report()   # per-stage ms, item counts (StageStats;
+                                # stats=StageStats(allocations=True) adds KiB)
+    song.save_ust("out.ust")
+
+    from result_cache import ResultCache
+    song = generate(lyrics, settings, cache=ResultCache.default())
+    song.to_ust()       # served from the result cache when seen before
+
+`settings` uses the preset keys the GUI writes (presets.build_preset_from_app);
+missing keys take the GUI defaults, keyword overrides win. A GenerationPlan is
+accepted as well. Nothing is parsed or composed until a property asks for it,
+and compiled plans / phonemizers are shared by every call in the process.
+"""
+
+import json
+import time
+from collections import namedtuple
+from contextlib import nullcontext
+from functools import lru_cache
+from itertools import accumulate
+
+from generation_plan import GenerationPlan
+from melody_logic import MelodyBrain
+from phonemizer import Phonemizer
+from score import NOTE, REST, SMALL_TSU
+from stage_stats import StageStats
+from ust_engine import (
+    parse_song_structure,
+    phonemize_lines,
+    assemble_elements,
+    compose_score,
+    compose_lines,
+    compose_sections,
+    compose_melody,
+    compose_line_melodies,
+    compose_section_melodies,
+    express_melody,
+    write_ust,
+)
+
+Section = namedtuple("Section", "name first_note end_note start_tick end_tick")
+
+_phonemizers = {}
+
+
+@lru_cache(maxsize=128)
+def _cached_plan(settings_key):
+    return GenerationPlan.from_settings(dict(settings_key))
+
+
+def compile_plan(settings=None, **overrides):
+    """Settings dict (preset keys) → validated GenerationPlan, cached per process.
+
+    Raises generation_plan.PlanError for invalid values.
+    """
+    if isinstance(settings, GenerationPlan) and not overrides:
+        return settings
+    merged = dict(settings or {})
+    merged.update(overrides)
+    key = tuple(sorted((k, str(v)) for k, v in merged.items() if v is not None))
+    return _cached_plan(key)
+
+
+def get_phonemizer(mode):
+    phonemizer = _phonemizers.get(mode)
+    if phonemizer is None:
+        phonemizer = Phonemizer()
+        phonemizer.set_mode(mode)
+        _phonemizers[mode] = phonemizer
+    return phonemizer
+
+
+def generate(lyrics, settings=None, cache=None, jobs=1, stats=None, **overrides):
+    """Lyrics text + settings → lazy Song.
+
+    `cache`: optional ResultCache. `jobs`: processes for section_streams mode.
+    `stats`: True or a StageStats to record per-stage times and counts.
+    """
+    return Song(lyrics, compile_plan(settings, **overrides), cache, jobs, stats)
+
+
+class Song:
+    def __init__(self, lyrics, plan, cache=None, jobs=1, stats=None):
+        self.lyrics = lyrics
+        self.plan = plan
+        self.cache = cache
+        self.jobs = jobs
+        # With stats, melody and expression run as separate passes
+        self.stage_stats = StageStats() if stats is True else stats or None
+        self.cache_hit = False
+        self.warnings = []
+        self._parts = None
+        self._elements = None
+        self._section_marks = []  # (name, element index)
+        self._notes = None
+        self._element_offsets = []
+        self._note_starts = None
+        self._ust = None
+        self._stage_seconds = {}
+
+    # ---- stages, each run at most once ----
+
+    def _stage(self, name):
+        if self.stage_stats is None:
+            return nullcontext()
+        return self.stage_stats.stage(name)
+
+    def _parse(self):
+        if self._elements is None:
+            started = time.perf_counter()
+            if self.stage_stats is None:
+                self._parts, self._elements = parse_song_structure(
+                    self.lyrics,
+                    self.plan.line_pause,
+                    self.plan.section_pause,
+                    on_warning=self.warnings.append,
+                    phonemizer=get_phonemizer(self.plan.phoneme_mode),
+                    on_section=self._mark_section,
+                )
+            else:
+                self._parse_staged()
+            self._stage_seconds["parse"] = time.perf_counter() - started
+
+    def _mark_section(self, name, element_idx):
+        self._section_marks.append((name, element_idx))
+
+    def _parse_staged(self):
+        """parse_song_structure as its phonemize + structure stages"""
+        with self._stage("phonemize"):
+            records = phonemize_lines(
+                self.lyrics,
+                get_phonemizer(self.plan.phoneme_mode),
+                on_warning=self.warnings.append,
+            )
+        with self._stage("structure"):
+            self._parts, self._elements = assemble_elements(
+                records,
+                self.plan.line_pause,
+                self.plan.section_pause,
+                on_section=self._mark_section,
+            )
+        self.stage_stats.count("phonemize", lines=len(records))
+        self.stage_stats.count(
+            "structure", elements=len(self._elements), sections=len(self._section_marks)
+        )
+
+    def _compose(self):
+        if self._notes is None:
+            self._parse()
+            started = time.perf_counter()
+            if self.stage_stats is not None:
+                self._notes = self._compose_staged()
+            elif self.plan.line_streams:
+                self._notes = compose_lines(
+                    self._elements, self.plan, self._element_offsets
+                )
+            elif self.plan.section_streams:
+                self._notes = compose_sections(
+                    self._elements, self.plan, self._element_offsets, self.jobs
+                )
+            else:
+                self._notes = compose_score(
+                    self._elements,
+                    self.plan,
+                    MelodyBrain(seed=self.plan.seed),
+                    self._element_offsets,
+                )
+            self._stage_seconds["compose"] = time.perf_counter() - started
+
+    def _compose_staged(self):
+        """compose_score / compose_lines / compose_sections as melody segments
+        + expression (same notes; section expression is not pooled)"""
+        plan, elements, offsets = self.plan, self._elements, self._element_offsets
+        with self._stage("melody"):
+            if plan.line_streams:
+                segments = compose_line_melodies(elements, plan, offsets)
+            elif plan.section_streams:
+                segments = compose_section_melodies(elements, plan, offsets, self.jobs)
+            else:
+                brain = MelodyBrain(seed=plan.seed)
+                melody = compose_melody(elements, plan, brain, offsets)
+                segments = [(brain.seed, melody)]
+        with self._stage("expression"):
+            notes = []
+            for seed, melody in segments:
+                notes.extend(express_melody(melody, plan, seed))
+        self.stage_stats.count("melody", segments=len(segments))
+        self.stage_stats.count("expression", notes=len(notes))
+        return notes
+
+    # ---- results ----
+
+    @property
+    def parts(self):
+        """Section name → words, as parse_song_structure reports them"""
+        self._parse()
+        return self._parts
+
+    @property
+    def elements(self):
+        self._parse()
+        return self._elements
+
+    @property
+    def notes(self):
+        self._compose()
+        return self._notes
+
+    @property
+    def note_starts(self):
+        """Start tick of every entry in `notes`"""
+        if self._note_starts is None:
+            lengths = [note.length for note in self.notes]
+            self._note_starts = [0] + list(accumulate(lengths))[:-1] if lengths else []
+        return self._note_starts
+
+    @property
+    def total_ticks(self):
+        notes = self.notes
+        return self.note_starts[-1] + notes[-1].length if notes else 0
+
+    @property
+    def sections(self):
+        notes = self.notes
+        starts = self.note_starts
+        offsets = self._element_offsets
+
+        def note_index(element_idx):
+            return offsets[element_idx] if element_idx < len(offsets) else len(notes)
+
+        marks = list(self._section_marks)
+        if not marks or marks[0][1] > 0:
+            marks.insert(0, ("Main", 0))
+
+        sections = []
+        for i, (name, element_idx) in enumerate(marks):
+            first = note_index(element_idx)
+            end = note_index(marks[i + 1][1]) if i + 1 < len(marks) else len(notes)
+            start_tick = starts[first] if first < len(notes) else self.total_ticks
+            end_tick = starts[end] if end < len(notes) else self.total_ticks
+            sections.append(Section(name, first, end, start_tick, end_tick))
+        return sections
+
+    @property
+    def timing(self):
+        ticks = self.total_ticks
+        return {
+            "tempo": self.plan.tempo,
+            "ticks": ticks,
+            "seconds": ticks * 60.0 / (float(self.plan.tempo) * 480.0),
+            "note_starts": self.note_starts,
+        }
+
+    @property
+    def stats(self):
+        notes = self.notes
+        kinds = {NOTE: 0, REST: 0, SMALL_TSU: 0}
+        vibrato = 0
+        for note in notes:
+            kinds[note.kind] += 1
+            vibrato += bool(note.vibrato)
+        return {
+            "elements": len(self.elements),
+            "notes": kinds[NOTE],
+            "rests": kinds[REST],
+            "small_tsu": kinds[SMALL_TSU],
+            "vibrato_notes": vibrato,
+            "sections": len(self.sections),
+            "seconds": self.timing["seconds"],
+            "warnings": len(self.warnings),
+            "cache_hit": self.cache_hit,
+            "stage_seconds": dict(self._stage_seconds),
+            "stages": self.stage_stats.as_dict() if self.stage_stats else None,
+        }
+
+    # ---- serialization, on demand ----
+
+    def to_ust(self):
+        if self._ust is None and self.cache is not None and self._notes is None:
+            entry, self.cache_hit = self.cache.fetch(self.lyrics, self.plan, self._render)
+            self._ust = entry.ust
+            if self.cache_hit:
+                self.warnings.extend(entry.meta.get("warnings", []))
+        if self._ust is None:
+            self._ust = self._render()[0]
+        return self._ust
+
+    def _render(self):
+        """→ (UST text, cache meta)"""
+        notes = self.notes
+        started = time.perf_counter()
+        with self._stage("serialize"):
+            ust = write_ust(notes, self.plan)
+        self._stage_seconds["serialize"] = time.perf_counter() - started
+        if self.stage_stats is not None:
+            self.stage_stats.count("serialize", chars=len(ust))
+        return ust, {"elements": len(self.elements), "warnings": list(self.warnings)}
+
+    def save_ust(self, filename):
+        with open(filename, "w", encoding="utf-8-sig") as f:
+            f.write(self.to_ust())
+        return filename
+
+    def to_dict(self):
+        return {
+            "project": self.plan.project_name,
+            "tempo": self.plan.tempo,
+            "seed": self.plan.seed,
+            "sections": [s._asdict() for s in self.sections],
+            "notes": [note.to_dict() for note in self.notes],
+        }
+
+    def to_json(self, indent=None):
+        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
+
+    def __repr__(self):
+        state = f"{len(self._notes)} notes" if self._notes is not None else "lazy"
+        return f"Song({self.plan.project_name!r}, {state})"
@@ -0,0 +1,324 @@
+# hiro_cli.py
+"""Headless batch generation: lyric .txt files + preset JSON → UST files
+
+    python hiro_cli.py lyrics/ extra/*.txt --preset Pop_Idol.json --out ust/ -j 8
+    python hiro_cli.py song.txt --stats        # per-stage ms / counts per file
+    python hiro_cli.py song.txt --profile      # + song.pstats / .collapsed.txt
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+
+from atomic_io import atomic_write_text
+from generation_plan import GenerationPlan, PlanError
+from presets import load_preset_from_file
+from stage_stats import StageStats
+
+# Per-process state, filled once by _init_worker
+_worker = {}
+
+
+def _init_worker(plan, cache_dir=None, use_cache=False, stats=None):
+    """Load phonetic tables, trie and phonemizer once per worker process.
+
+    `stats`: None, "time" or "alloc" (StageStats per file, with allocations)
+    """
+    from phonemizer import Phonemizer
+    from result_cache import ResultCache
+    from ust_engine import HiroUSTGenerator
+
+    HiroUSTGenerator()  # builds the mora trie singleton
+    phonemizer = Phonemizer()
+    phonemizer.set_mode(plan.phoneme_mode)
+    _worker["plan"] = plan
+    _worker["phonemizer"] = phonemizer
+    _worker["cache"] = ResultCache(disk_dir=cache_dir) if use_cache else None
+    _worker["stats"] = stats
+
+
+def collect_inputs(paths, recursive=False):
+    """Files, globs and directories → sorted unique list of lyric files"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            pattern = os.path.join(path, "**", "*.txt") if recursive else os.path.join(
+                path, "*.txt"
+            )
+            found.extend(glob.glob(pattern, recursive=recursive))
+        elif glob.has_magic(path):
+            found.extend(glob.glob(path, recursive=recursive))
+        else:
+            found.append(path)
+    return sorted(set(os.path.abspath(p) for p in found))
+
+
+class OutputCollision(Exception):
+    pass
+
+
+def output_path(src, out_dir=None, root=None):
+    """UST path for `src`: next to it, or under out_dir at its path relative
+    to `root` (the inputs' common folder)"""
+    stem = os.path.splitext(os.path.basename(src))[0].replace(" ", "_")
+    folder = os.path.dirname(src)
+    if out_dir:
+        relative = os.path.relpath(folder, root) if root else os.curdir
+        folder = os.path.normpath(os.path.join(out_dir, relative))
+    return os.path.join(folder, f"{stem}.ust")
+
+
+def output_paths(files, out_dir=None):
+    """[(src, dst)]; under out_dir the input folders are mirrored, so
+    a/song.txt and b/song.txt do not meet. Raises OutputCollision if two
+    inputs would still write the same file (e.g. "a b.txt" and "a_b.txt")."""
+    root = None
+    if out_dir and files:
+        try:
+            root = os.path.commonpath([os.path.dirname(src) for src in files])
+        except ValueError:  # different drives: flat, still collision-checked
+            pass
+    tasks = [(src, output_path(src, out_dir, root)) for src in files]
+    seen = {}
+    for src, dst in tasks:
+        other = seen.setdefault(os.path.normcase(dst), src)
+        if other != src:
+            raise OutputCollision(f"{other} and {src} would both write {dst}")
+    return tasks
+
+
+def convert_file(src, dst):
+    """Worker task → (src, dst, element count, seconds, warnings, error, cached,
+    stage stats dict or None)"""
+    from ust_engine import lyrics_to_ust
+
+    started = time.perf_counter()
+    warnings = []
+    cached = False
+    stats = None
+    try:
+        with open(src, "r", encoding="utf-8-sig") as f:
+            lyrics = f.read()
+        stem = os.path.splitext(os.path.basename(dst))[0]
+        plan = replace(_worker["plan"], project_name=stem)
+
+        if _worker["stats"]:
+            from hiro_api import Song
+
+            stats = StageStats(allocations=_worker["stats"] == "alloc")
+
+        def render():
+            if stats is None:
+                ust, elements = lyrics_to_ust(
+                    lyrics, plan, _worker["phonemizer"], on_warning=warnings.append
+                )
+            else:  # same UST, stage by stage
+                song = Song(lyrics, plan, stats=stats)
+                ust, elements = song.to_ust(), song.elements
+                warnings.extend(song.warnings)
+            return ust, {"elements": len(elements), "warnings": list(warnings)}
+
+        if _worker["cache"] is not None:
+            entry, cached = _worker["cache"].fetch(lyrics, plan, render)
+            ust_content, meta = entry.ust, entry.meta
+            warnings = list(meta.get("warnings", []))
+        else:
+            ust_content, meta = render()
+        atomic_write_text(dst, ust_content)
+        seconds = time.perf_counter() - started
+        if stats is not None:
+            stats = stats.as_dict()
+        return src, dst, meta["elements"], seconds, warnings, None, cached, stats
+    except Exception as e:
+        seconds = time.perf_counter() - started
+        return src, dst, 0, seconds, warnings, str(e), cached, None
+
+
+def run_batch(
+    files,
+    plan,
+    out_dir=None,
+    jobs=None,
+    report=print,
+    use_cache=False,
+    cache_dir=None,
+    stats=None,
+):
+    """Convert every file; `report` gets one line per file (plus its stage
+    table with `stats`, see _init_worker). Returns result tuples."""
+    tasks = output_paths(files, out_dir)
+    results = []
+    init_args = (plan, cache_dir, use_cache, stats)
+
+    def handle(result):
+        src, dst, n_elements, seconds, warnings, error, cached, stages = result
+        name = os.path.basename(src)
+        if error:
+            report(f"❌ {name}: {error} ({seconds:.2f}s)")
+        else:
+            source = "⚡ cached" if cached else f"{n_elements} elements"
+            report(f"✅ {name} → {dst} ({source}, {seconds:.2f}s)")
+        for msg in warnings:
+            report(f"   {msg}")
+        if stages:
+            file_stats = StageStats()
+            file_stats.merge(stages)
+            report(file_stats.report())
+        results.append(result)
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(tasks) <= 1:
+        _init_worker(*init_args)
+        for src, dst in tasks:
+            handle(convert_file(src, dst))
+        return results
+
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=init_args
+    ) as pool:
+        futures = [pool.submit(convert_file, src, dst) for src, dst in tasks]
+        for future in as_completed(futures):
+            handle(future.result())
+    return results
+
+
+def run_profiles(files, plan, out_dir=None, allocations=False, report=print):
+    """Each file under cProfile, one at a time in this process (see
+    generation_profile); the UST is written as usual. Returns failures."""
+    from generation_profile import format_report, profile_song
+
+    failed = 0
+    for src, dst in output_paths(files, out_dir):
+        name = os.path.basename(src)
+        try:
+            with open(src, "r", encoding="utf-8-sig") as f:
+                lyrics = f.read()
+            stem = os.path.splitext(dst)[0]
+            song_plan = replace(plan, project_name=os.path.basename(stem))
+            ust_content, profile = profile_song(
+                lyrics, song_plan, stem, allocations=allocations, source=src
+            )
+            atomic_write_text(dst, ust_content)
+        except Exception as e:
+            report(f"❌ {name}: {e}")
+            failed += 1
+            continue
+        report(f"✅ {name} → {dst}")
+        for msg in profile["warnings"]:
+            report(f"   {msg}")
+        report(format_report(profile))
+    return failed
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="hiro_cli", description="Generate UST files from lyric .txt files"
+    )
+    parser.add_argument("inputs", nargs="+", help="lyric files, globs or directories")
+    parser.add_argument(
+        "-p", "--preset", help="preset JSON saved from the GUI (💾 Preset)"
+    )
+    parser.add_argument(
+        "-o",
+        "--out",
+        help="output directory, mirroring the input subfolders "
+        "(default: next to each lyric file)",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="worker processes (default: CPUs)"
+    )
+    parser.add_argument(
+        "-r", "--recursive", action="store_true", help="descend into subdirectories"
+    )
+    parser.add_argument("--seed", type=int, help="override the preset seed")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="always regenerate (skip result cache)"
+    )
+    parser.add_argument("--cache-dir", help="result cache folder (default: user cache)")
+    parser.add_argument(
+        "--stats",
+        nargs="?",
+        const="time",
+        choices=("time", "alloc"),
+        help="print per-stage ms / runs / item counts per file and in total "
+        "(--stats alloc adds tracemalloc KiB, much slower); skips the cache",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="time",
+        choices=("time", "alloc"),
+        help="run each file under cProfile (one process, no cache) and write "
+        "<name>.pstats, <name>.collapsed.txt (flamegraph) and <name>.profile.json "
+        "next to the UST; --profile alloc adds tracemalloc allocation sites",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    try:
+        preset = load_preset_from_file(args.preset) if args.preset else {}
+        if args.seed is not None:
+            preset["seed"] = args.seed
+        plan = GenerationPlan.from_settings(preset)
+    except PlanError as e:
+        print(f"❌ Preset: {e}", file=sys.stderr)
+        return 2
+    except (OSError, ValueError) as e:
+        print(f"❌ Preset load failed: {e}", file=sys.stderr)
+        return 2
+
+    files = collect_inputs(args.inputs, args.recursive)
+    if not files:
+        print("❌ No lyric files found", file=sys.stderr)
+        return 2
+    try:
+        output_paths(files, args.out)  # before anything is written
+    except OutputCollision as e:
+        print(f"❌ Output: {e}", file=sys.stderr)
+        return 2
+
+    if args.profile:
+        failed = run_profiles(files, plan, args.out, args.profile == "alloc")
+        return 1 if failed else 0
+
+    from result_cache import default_cache_dir
+
+    started = time.perf_counter()
+    results = run_batch(
+        files,
+        plan,
+        args.out,
+        args.jobs,
+        use_cache=not args.no_cache and not args.stats,
+        cache_dir=args.cache_dir or default_cache_dir(),
+        stats=args.stats,
+    )
+    failed = sum(1 for r in results if r[5])
+    cached = sum(1 for r in results if r[6])
+    if args.stats and len(results) > 1:
+        total = StageStats()
+        for result in results:
+            if result[7]:
+                total.merge(result[7])
+        print(total.report(f"📊 Stages, {len(results)} files"))
+    print(
+        f"🎵 {len(results) - failed}/{len(results)} converted, {failed} failed "
+        f"in {time.perf_counter() - started:.2f}s"
+        + (
+            ""
+            if args.no_cache or args.stats
+            else f" | cache {cached}/{len(results)} hits"
+        )
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+# hiro_jobs.py
+"""Manifest-driven batch jobs with an append-only journal for resume
+
+    python hiro_jobs.py songs.csv -j 8
+
+Manifest: CSV with a header row, or JSONL with one object per line.
+Columns: lyrics (path), output (path), optional preset (JSON path) and any
+preset key as an override (seed, voice, scale, tempo, ...). Relative paths
+are resolved against the manifest's folder.
+
+Finished rows are appended to <manifest>.journal.jsonl. Rerunning the same
+manifest skips rows whose key is journaled as done and whose output still
+exists; editing a row (or its lyrics or preset file) changes its key, so
+it is regenerated.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from atomic_io import atomic_write_text
+from generation_plan import DEFAULT_SETTINGS, PlanError
+from presets import load_preset_from_file
+
+ROW_PATH_KEYS = ("lyrics", "output", "preset")
+
+# Per-process result cache, opened on first use
+_cache = {}
+
+
+def read_manifest(filename):
+    """CSV/JSONL manifest → list of row dicts with absolute paths"""
+    base = os.path.dirname(os.path.abspath(filename))
+    with open(filename, "r", encoding="utf-8-sig", newline="") as f:
+        if filename.lower().endswith((".jsonl", ".ndjson")):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    manifest = []
+    for row_num, row in enumerate(rows, 1):
+        row = {k.strip(): v for k, v in row.items() if k and v not in (None, "")}
+        for key in ROW_PATH_KEYS:
+            if key in row:
+                row[key] = os.path.normpath(os.path.join(base, str(row[key])))
+        row["_row"] = row_num
+        manifest.append(row)
+    return manifest
+
+
+def row_key(row):
+    """Stable identity of a manifest row (changes with any column or the
+    contents of its lyrics and preset files)"""
+    payload = {k: str(v) for k, v in row.items() if not k.startswith("_")}
+    for column in ("lyrics", "preset"):
+        if column in row:
+            try:
+                with open(row[column], "rb") as f:
+                    payload[f"_{column}_sha1"] = hashlib.sha1(f.read()).hexdigest()
+            except OSError:
+                pass  # reported when the row runs
+    blob = json.dumps(payload, sort_keys=True)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def load_journal(filename):
+    """Journal → {row key: entry} for rows that finished successfully"""
+    done = {}
+    if not os.path.exists(filename):
+        return done
+    with open(filename, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn last line after a crash
+            if entry.get("status") == "done":
+                done[entry["key"]] = entry
+            else:
+                done.pop(entry.get("key"), None)
+    return done
+
+
+def row_settings(row):
+    """Preset file + per-row overrides, in preset-key form"""
+    settings = load_preset_from_file(row["preset"]) if "preset" in row else {}
+    for key, value in row.items():
+        if key in DEFAULT_SETTINGS:
+            settings[key] = value
+    if "project" not in row:
+        settings["project"] = os.path.splitext(os.path.basename(row["output"]))[0]
+    return settings
+
+
+def _result_cache(cache_dir):
+    if cache_dir not in _cache:
+        from result_cache import ResultCache
+
+        _cache[cache_dir] = ResultCache(disk_dir=cache_dir)
+    return _cache[cache_dir]
+
+
+def run_row(row, cache_dir=None):
+    """Worker task → journal entry dict (`cache_dir` None: no result cache)"""
+    from hiro_api import generate
+
+    started = time.perf_counter()
+    entry = {"key": row["_key"], "row": row["_row"], "output": row.get("output")}
+    try:
+        if "lyrics" not in row or "output" not in row:
+            raise ValueError("row needs 'lyrics' and 'output'")
+        with open(row["lyrics"], "r", encoding="utf-8-sig") as f:
+            lyrics = f.read()
+        cache = _result_cache(cache_dir) if cache_dir else None
+        song = generate(lyrics, row_settings(row), cache=cache)
+        atomic_write_text(row["output"], song.to_ust())
+        entry.update(status="done", cached=song.cache_hit)
+    except PlanError as e:
+        entry.update(status="failed", error=f"settings: {e}")
+    except Exception as e:
+        entry.update(status="failed", error=str(e))
+    entry["seconds"] = round(time.perf_counter() - started, 4)
+    return entry
+
+
+class Journal:
+    """Append-only JSONL log, written by the parent process only"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._f = open(filename, "a", encoding="utf-8")
+
+    def append(self, entry):
+        self._f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def close(self):
+        self._f.close()
+
+
+def run_manifest(
+    manifest_file, journal_file=None, jobs=None, report=print, cache_dir=None
+):
+    """Process every pending row. Returns (done, failed, skipped, cached) counts."""
+    journal_file = journal_file or f"{manifest_file}.journal.jsonl"
+    rows = read_manifest(manifest_file)
+    finished = load_journal(journal_file)
+
+    pending = []
+    for row in rows:
+        row["_key"] = row_key(row)
+        entry = finished.get(row["_key"])
+        if entry and row.get("output") and os.path.exists(row["output"]):
+            continue
+        pending.append(row)
+    skipped = len(rows) - len(pending)
+    if skipped:
+        report(f"⏭️ {skipped} rows already done (journal: {journal_file})")
+
+    journal = Journal(journal_file)
+    done = failed = cached = 0
+    started = time.perf_counter()
+
+    def handle(entry):
+        nonlocal done, failed, cached
+        journal.append(entry)
+        if entry["status"] == "done":
+            done += 1
+            cached += entry["cached"]
+        else:
+            failed += 1
+        finished_count = done + failed
+        elapsed = time.perf_counter() - started
+        rate = finished_count / elapsed if elapsed > 0 else 0.0
+        eta = (len(pending) - finished_count) / rate if rate else 0.0
+        if entry["status"] != "done":
+            status = f"❌ {entry.get('error')}"
+        else:
+            status = "✅ ⚡ cached" if entry["cached"] else "✅"
+        report(
+            f"[{finished_count}/{len(pending)}] row {entry['row']} {status} "
+            f"({entry['seconds']:.2f}s) | {rate:.1f} songs/s, ETA {eta:.0f}s"
+        )
+
+    try:
+        jobs = jobs or os.cpu_count() or 1
+        if jobs == 1 or len(pending) <= 1:
+            for row in pending:
+                handle(run_row(row, cache_dir))
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                futures = [pool.submit(run_row, row, cache_dir) for row in pending]
+                for future in as_completed(futures):
+                    handle(future.result())
+    finally:
+        journal.close()
+    return done, failed, skipped, cached
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="hiro_jobs", description="Run a CSV/JSONL job manifest with resume"
+    )
+    parser.add_argument("manifest", help="CSV (with header) or JSONL manifest")
+    parser.add_argument("--journal", help="journal path (default: <manifest>.journal.jsonl)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="always regenerate (skip result cache)"
+    )
+    parser.add_argument("--cache-dir", help="result cache folder (default: user cache)")
+    args = parser.parse_args(argv)
+
+    from result_cache import default_cache_dir
+
+    cache_dir = None if args.no_cache else (args.cache_dir or default_cache_dir())
+    try:
+        done, failed, skipped, cached = run_manifest(
+            args.manifest, args.journal, args.jobs, cache_dir=cache_dir
+        )
+    except (OSError, ValueError) as e:
+        print(f"❌ Manifest: {e}", file=sys.stderr)
+        return 2
+    print(
+        f"🎵 {done} done, {failed} failed, {skipped} skipped"
+        + ("" if args.no_cache else f" | cache {cached}/{done} hits")
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,367 @@
+# hiro_server.py
+"""Optional local generation service (asyncio, stdlib only, fully offline)
+
+    python hiro_server.py --port 8765 -j 4
+    python hiro_server.py --unix /tmp/hiro.sock
+
+    POST /generate   {"lyrics": "...", "settings": {...preset keys...}, "timeout": 30}
+                     → UST text (Content-Length body, once the song is
+                       generated; headers carry its note count / timing)
+    GET  /health     → {"status": "ok", ...}
+    GET  /metrics    → counters, queue depth, latency
+
+Identical concurrent requests (same lyrics + resolved settings incl. seed)
+share one computation. Accepted jobs wait in a bounded queue; when it is
+full the server answers 503 with Retry-After instead of buffering more.
+When the last client waiting on a job times out, the job is abandoned: a
+queued one is dropped, a running one finishes in its worker unused (worker
+processes cannot be interrupted) and both are logged.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from generation_plan import PlanError
+
+MAX_BODY_BYTES = 1 << 20
+DEFAULT_TIMEOUT = 30.0
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+def _init_worker():
+    """Build the mora trie once per worker process"""
+    from ust_engine import HiroUSTGenerator
+
+    HiroUSTGenerator()
+
+
+def _generate(lyrics, plan):
+    """Worker task → (UST text, warnings, stats)"""
+    from hiro_api import generate
+
+    song = generate(lyrics, plan)
+    ust = song.to_ust()
+    return ust, song.warnings, song.stats
+
+
+def request_key(lyrics, plan):
+    """Coalescing key: lyrics + every resolved plan field (seed included)"""
+    payload = json.dumps([lyrics.replace("\r\n", "\n"), repr(plan)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class HttpError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class GenerationService:
+    def __init__(self, jobs=None, max_queue=64, max_timeout=120.0):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.max_timeout = max_timeout
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.pool = None
+        self.inflight = {}  # key → Future shared by coalesced requests
+        self.waiting = {}  # key → clients still waiting on it
+        self.running = set()  # Futures whose job a worker has picked up
+        self.started = time.time()
+        self.metrics = {
+            "requests": 0,
+            "completed": 0,
+            "failed": 0,
+            "coalesced": 0,
+            "rejected": 0,
+            "timeouts": 0,
+            "abandoned": 0,
+            "busy_workers": 0,
+            "generate_seconds_total": 0.0,
+        }
+        self._dispatchers = []
+
+    async def start(self):
+        self.pool = ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker)
+        self._dispatchers = [
+            asyncio.create_task(self._dispatch()) for _ in range(self.jobs)
+        ]
+
+    async def stop(self):
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            key, lyrics, plan, future = await self.queue.get()
+            if future.cancelled():  # every client gave up while it was queued
+                self.queue.task_done()
+                continue
+            self.metrics["busy_workers"] += 1
+            self.running.add(future)
+            started = time.perf_counter()
+            try:
+                result = await loop.run_in_executor(self.pool, _generate, lyrics, plan)
+                if not future.done():
+                    future.set_result(result)
+                self.metrics["completed"] += 1
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                self.metrics["failed"] += 1
+            finally:
+                self.metrics["generate_seconds_total"] += time.perf_counter() - started
+                self.metrics["busy_workers"] -= 1
+                self.running.discard(future)
+                if self.inflight.get(key) is future:
+                    del self.inflight[key]
+                self.queue.task_done()
+
+    def submit(self, lyrics, plan):
+        """→ (key, shared Future, coalesced?). Raises HttpError 503 when full."""
+        key = request_key(lyrics, plan)
+        future = self.inflight.get(key)
+        if future is not None:
+            self.metrics["coalesced"] += 1
+            return key, future, True
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        try:
+            self.queue.put_nowait((key, lyrics, plan, future))
+        except asyncio.QueueFull:
+            self.metrics["rejected"] += 1
+            raise HttpError(503, "queue full", {"Retry-After": "1"})
+        self.inflight[key] = future
+        return key, future, False
+
+    def snapshot(self):
+        m = dict(self.metrics)
+        done = m["completed"] + m["failed"]
+        m["avg_generate_seconds"] = m["generate_seconds_total"] / done if done else 0.0
+        m.update(
+            uptime_seconds=round(time.time() - self.started, 1),
+            workers=self.jobs,
+            queue_depth=self.queue.qsize(),
+            queue_limit=self.queue.maxsize,
+            inflight=len(self.inflight),
+        )
+        return m
+
+    # ---- HTTP ----
+
+    async def handle(self, reader, writer):
+        try:
+            method, path, body = await self._read_request(reader)
+            self.metrics["requests"] += 1
+            if path == "/health":
+                self._require(method, "GET")
+                await self._send_json(writer, 200, {"status": "ok", **self.snapshot()})
+            elif path == "/metrics":
+                self._require(method, "GET")
+                await self._send_json(writer, 200, self.snapshot())
+            elif path == "/generate":
+                self._require(method, "POST")
+                await self._generate_response(writer, body)
+            else:
+                raise HttpError(404, f"no route {path}")
+        except HttpError as e:
+            await self._send_json(writer, e.status, {"error": str(e)}, e.headers)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    def _require(method, expected):
+        if method != expected:
+            raise HttpError(405, f"use {expected}")
+
+    async def _read_request(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        try:
+            method, target, _version = request_line.split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "bad request line")
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HttpError(400, "bad Content-Length")
+        if length < 0:
+            raise HttpError(400, "bad Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, f"body over {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], body
+
+    async def _generate_response(self, writer, body):
+        from hiro_api import compile_plan
+
+        try:
+            request = json.loads(body.decode("utf-8") or "{}")
+            lyrics = request["lyrics"]
+        except (ValueError, KeyError, TypeError):
+            raise HttpError(400, 'expected JSON {"lyrics": ..., "settings": {...}}')
+        if not isinstance(lyrics, str):
+            raise HttpError(400, "lyrics must be a string")
+        settings = request.get("settings") or {}
+        if not isinstance(settings, dict):
+            raise HttpError(400, "settings must be an object")
+        try:
+            plan = compile_plan(settings)
+        except PlanError as e:
+            raise HttpError(400, f"settings: {e}")
+        try:
+            timeout = float(request.get("timeout") or DEFAULT_TIMEOUT)
+        except (TypeError, ValueError):
+            raise HttpError(400, "timeout must be a number of seconds")
+        if not timeout > 0:  # also rejects NaN
+            raise HttpError(400, "timeout must be positive")
+        timeout = min(timeout, self.max_timeout)
+
+        key, future, coalesced = self.submit(lyrics, plan)
+        self.waiting[key] = self.waiting.get(key, 0) + 1
+        started = time.perf_counter()
+        try:
+            # shield: one client timing out must not cancel the shared job
+            ust, warnings, stats = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            self.metrics["timeouts"] += 1
+            if self.waiting[key] == 1:
+                self._abandon(key, future, timeout)
+            raise HttpError(504, f"generation exceeded {timeout:.1f}s")
+        except Exception as e:
+            raise HttpError(500, str(e))
+        finally:
+            self.waiting[key] -= 1
+            if not self.waiting[key]:
+                del self.waiting[key]
+
+        data = ust.encode("utf-8")
+        headers = {
+            "Content-Type": "text/plain; charset=utf-8",
+            "Content-Length": str(len(data)),
+            "X-Hiro-Key": key,
+            "X-Hiro-Coalesced": "1" if coalesced else "0",
+            "X-Hiro-Notes": str(stats["notes"]),
+            "X-Hiro-Warnings": str(len(warnings)),
+            "X-Hiro-Seconds": f"{time.perf_counter() - started:.4f}",
+        }
+        self._write_head(writer, 200, headers)
+        writer.write(data)
+        await writer.drain()
+
+    def _abandon(self, key, future, timeout):
+        """No client is waiting on `key` any more: drop it from the queue, or
+        let it finish unused if a worker already runs it"""
+        self.metrics["abandoned"] += 1
+        if self.inflight.get(key) is future:
+            del self.inflight[key]  # a new identical request starts afresh
+        running = future in self.running
+        future.cancel()  # the dispatcher skips or discards it
+        state = "left to finish in its worker" if running else "dropped from the queue"
+        print(f"⏱️ Abandoned job {key[:12]} after {timeout:.1f}s: {state}")
+
+    @staticmethod
+    def _write_head(writer, status, headers):
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        lines.append("Connection: close")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    async def _send_json(self, writer, status, payload, headers=None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = {"Content-Type": "application/json", "Content-Length": str(len(data))}
+        head.update(headers or {})
+        self._write_head(writer, status, head)
+        writer.write(data)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+async def serve(host="127.0.0.1", port=8765, unix_path=None, jobs=None, max_queue=64):
+    service = GenerationService(jobs=jobs, max_queue=max_queue)
+    await service.start()
+    if unix_path:
+        server = await asyncio.start_unix_server(service.handle, path=unix_path)
+        where = unix_path
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+        where = f"http://{host}:{port}"
+    print(f"🎵 Hiro service on {where} ({service.jobs} workers, queue {max_queue})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def client_generate(lyrics, settings=None, host="127.0.0.1", port=8765, timeout=None):
+    """Minimal local client → (status, headers dict, body text)"""
+    import http.client
+
+    conn = http.client.HTTPConnection(host, port, timeout=(timeout or DEFAULT_TIMEOUT) + 5)
+    payload = {"lyrics": lyrics, "settings": settings or {}}
+    if timeout:
+        payload["timeout"] = timeout
+    conn.request(
+        "POST",
+        "/generate",
+        body=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    response = conn.getresponse()
+    body = response.read().decode("utf-8")
+    conn.close()
+    return response.status, dict(response.getheaders()), body
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="hiro_server", description="Local UST generation service"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on a Unix socket path instead of TCP")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes")
+    parser.add_argument("--queue", type=int, default=64, help="max queued jobs")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.jobs, args.queue))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,520 +1,125 @@
+import time
+
+_LAUNCHED = time.perf_counter()  # --profile-startup measures from here
+
+import argparse
+import itertools
+import multiprocessing
 import os
 import random
 import sys
+import tempfile
 import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog
 
+# GUI-side modules only; NumPy and the engine load in the background
+# (see ENGINE_IMPORTS / _load_engine)
 from config import HiroConfig
-
-# IMPORT MODULES
-from constants import VOWEL_CHARS, CONSONANT_CHARS
-from phonemizer import Phonemizer
 from envelopes import ENVELOPE_PRESETS
-from hiragana_map import HIRAGANA_MAP
-from intone_utils import get_intone_settings
-from kana_to_hiragana import convert_lyrics
+from generation_plan import GenerationPlan, PlanError, PHONEME_MODES
+from intone_utils import INTONE_SETTINGS
 from key_roots import KEY_ROOTS
-from melody_logic import MelodyBrain
-from mora_trie_data import MORA_DATA
+from lyric_document import LyricDocument, TextSync
+from lyric_highlight import LyricHighlighter
+from gen_worker import GenerationWorker, PROGRESS, WARNING, CANCELLED, ERROR
+from piano_roll import PianoRoll, score_from_ust, section_ticks
 from presets import (
     build_preset_from_app,
     apply_preset_to_app,
     save_preset_to_file,
     load_preset_from_file,
 )
-from scales import SCALES
-from ust_strings import (
-    UST_HEADER_TEMPLATE,
-    REST_NOTE_TEMPLATE,
-    SMALL_TSU_TEMPLATE,
-    NOTE_BLOCK_TEMPLATE,
-    TRACK_END,
+from score import NOTE
+from stage_stats import StageStats
+from repeats import REPEAT_MODES
+from rhythm_templates import RHYTHM_TEMPLATES, GRID_OPTIONS
+from startup_profile import StartupProfile
+from tables import SCALES
+
+_GUI_IMPORTED = time.perf_counter()
+
+# Imported on the worker thread once the window is up, heaviest first
+ENGINE_IMPORTS = (
+    "numpy",
+    "phoneme_table",
+    "phonemizer",
+    "melody_logic",
+    "ust_engine",
+    "pipeline",
+    "result_cache",
+    "audio_preview",
 )
 
+WORKER_POLL_MS = 30
 
-class USTWriter:
-    def __init__(self, project_name, tempo):
-        self.lines = []
-        self.note_id = 0
-        self.project_name = str(project_name)
-        self.tempo = tempo
-        self._write_header()
-
-    def _write_header(self):
-        self.lines.append(
-            UST_HEADER_TEMPLATE.format(tempo=self.tempo, project_name=self.project_name)
-        )
-
-    def add_rest(self, length):
-        self.lines.append(
-            REST_NOTE_TEMPLATE.format(note_id=self.note_id, length=length)
-        )
-        self.note_id += 1
-
-    def add_small_tsu(self, root_key, length=60):
-        self.lines.append(
-            SMALL_TSU_TEMPLATE.format(
-                note_id=self.note_id, length=length, root_key=int(root_key)
-            )
-        )
-        self.note_id += 1
-
-    def add_note(
-        self,
-        length,
-        lyric,
-        note_num,
-        pre_utter,
-        voice_overlap,
-        intensity,
-        envelope,
-        pbs=0,
-        pbw=0,
-        flags="",
-    ):
-        self.lines.append(
-            NOTE_BLOCK_TEMPLATE.format(
-                note_id=self.note_id,
-                length=length,
-                lyric=lyric,
-                note_num=int(round(note_num)),
-                pre_utter=pre_utter,
-                voice_overlap=voice_overlap,
-                intensity=intensity,
-                envelope=envelope,
-                pbs=pbs,
-                pbw=pbw,
-                flags=flags,
-            )
-        )
-        self.note_id += 1
-
-    def finalize(self):
-        self.lines.append(TRACK_END)
-        return "\n".join(self.lines)
-
-
-class HiroUSTGenerator:
-    _instance = None
-
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance.hiragana_map = HIRAGANA_MAP
-            cls._instance._build_mora_trie()
-        return cls._instance
-
-    def _build_mora_trie(self):
-        self.mora_trie = {}
-        for mora, phones in MORA_DATA.items():
-            node = self.mora_trie
-            for char in mora:
-                if char not in node:
-                    node[char] = {"end": False, "phones": None}
-                node = node[char]
-            node["end"] = True
-            node["phones"] = phones
-
-    def romaji_to_hiragana(self, phoneme):
-        if phoneme.startswith("kk") or phoneme.startswith("gg"):
-            return self.hiragana_map.get(phoneme, phoneme)
-        if phoneme in ["ji", "zu"]:
-            return self.hiragana_map.get(f"ji_s", phoneme)
-        if phoneme == "ji_t":
-            return self.hiragana_map.get("ji_t", phoneme)
-        return self.hiragana_map.get(phoneme, phoneme)
-
-    def hiragana_to_romaji(self, text):
-        phonemes = []
-        i = 0
-        text = text.strip()
-
-        text = convert_lyrics(text)
-
-        while i < len(text):
-            node = self.mora_trie
-            start = i
-            best_match = None
-            best_end = i
-
-            while i < len(text) and text[i] in node:
-                node = node[text[i]]
-                i += 1
-
-                if "end" in node and node["end"]:
-                    best_match = node
-                    best_end = i
-
-            if best_match and best_match["end"]:
-                phonemes.extend(best_match["phones"])
-                i = best_end
-            else:
-                char = text[start]
-                if char == "っ":  # Sokuon
-                    phonemes.append("っ")
-                    i = start + 1
-                else:
-                    i = start + 1
-
-        return phonemes
-
-
-def create_stretch_notes(phoneme, stretch_prob=0.25, max_stretch=3, brain=None):
-    vowel_chars = brain.VOWEL_CHARS if brain else VOWEL_CHARS
-
-    # DOUBLE VOWELS
-    if len(phoneme) >= 2 and phoneme[0] == phoneme[1] and phoneme[0] in vowel_chars:
-        return [(phoneme[0], 1.8)]  # Long vowel
-
-    # SINGLE VOWEL STRETCH
-    if (
-        len(phoneme) == 1
-        and phoneme in vowel_chars
-        and random.random() < (stretch_prob + 0.5)
-    ):
-        stretches = random.randint(1, max_stretch)
-        return [(phoneme, 1.2)] + [("+", 0.6)] * stretches
-
-    return [(phoneme, 1.0)]
-
-
-def parse_song_structure(
-    text, line_pause=960, section_pause=1920, on_warning=None, phonemizer=None
-):
-    parts = {"Main": []}
-    current_part = "Main"
-    all_elements = []
-
-    if not text or not text.strip():
-        return parts, all_elements
-
-    lines = text.strip().split("\n")
-
-    for line_num, raw_line in enumerate(lines, 1):
-        line = raw_line.strip()
-
-        if line.startswith("[") and line.endswith("]") and len(line) > 2:
-            section_name = line[1:-1].strip()
-            if section_name:
-                if all_elements:
-                    all_elements.append(f"PAUSE_SECTION:{section_pause}")
-                current_part = section_name
-                parts[current_part] = []
-            else:
-                msg = f"⚠️ Empty section '[]' on line {line_num} - using 'Main'"
-                if on_warning:
-                    on_warning(msg)
-            continue
-
-        elif line:
-            try:
-                # SPLIT LINE INTO WORDS
-                words = line.split()
-
-                for word_idx, word in enumerate(words):
-                    if phonemizer:
-                        phonemes = phonemizer.text_to_phonemes(word)
-                    else:
-                        generator = HiroUSTGenerator()
-                        phonemes = generator.hiragana_to_romaji(word)
-
-                    if phonemes:
-                        parts[current_part].append(word)
-                        all_elements.extend(phonemes)
-                        if word_idx < len(words) - 1:
-                            all_elements.append(f"PAUSE_WORD:120")
-
-                all_elements.append(f"PAUSE_LINE:{line_pause}")
-
-            except Exception as e:
-                msg = f"⚠️ Parse error line {line_num}: '{line}' → {e}"
-                if on_warning:
-                    on_warning(msg)
-            continue
-
-    if all_elements and all_elements[-1].startswith("PAUSE_LINE"):
-        all_elements.pop()
-
-    if not all_elements:
-        all_elements = [f"PAUSE_LINE:{HiroConfig.PAUSE_LINE_UNIT * 2}"]
-
-    return parts, all_elements
-
-
-def get_note_length(
-    phoneme, base_length=480, length_var=0.3, length_factor=1.0, brain=None
-):
-    if phoneme == "+":
-        factor = 0.6
-        length = int(base_length * factor * length_factor)
-        return max(HiroConfig.MIN_NOTE_LEN, min(HiroConfig.MAX_NOTE_LEN, length))
-
-    phoneme_char = phoneme[0] if len(phoneme) > 0 else "a"
-    if brain:
-        vowel_chars = getattr(brain, "VOWEL_CHARS", VOWEL_CHARS)
-        consonant_chars = getattr(brain, "CONSONANT_CHARS", CONSONANT_CHARS)
-    else:
-        vowel_chars = VOWEL_CHARS
-        consonant_chars = CONSONANT_CHARS
-
-    if phoneme_char in vowel_chars:
-        factor = 1.0 + random.uniform(-length_var, length_var * 0.3)
-    elif phoneme_char in consonant_chars:
-        factor = 0.5 + random.uniform(0, length_var * 1.5)
-    else:
-        factor = 0.7 + random.uniform(-length_var * 0.2, length_var * 0.2)
-
-    length = int(base_length * factor * length_factor)
-    return max(HiroConfig.MIN_NOTE_LEN, min(HiroConfig.MAX_NOTE_LEN, length))
-
-
-def get_random_note(root_midi, scale_name, flat_mode=False, quarter_tone=False):
-    scale = SCALES[scale_name]
-    if flat_mode:
-        return root_midi + 5
-    note = random.choice(scale)
-    if quarter_tone and random.random() < 0.3:
-        note += random.choice([0, 0.5, -0.5])
-    return root_midi + note
-
-
-def text_to_ust(
-    text_elements,
-    project_name,
-    tempo,
-    base_length,
-    root_key,
-    scale,
-    intone_level,
-    length_var,
-    stretch_prob,
-    melody_brain,
-    pre_utterance=25,
-    voice_overlap=10,
-    intensity_base=80,
-    envelope="0,10,35,0,100,100,0",
-    flat_mode=False,
-    quartertone_mode=False,
-    lyrical_mode=True,
-    use_motifs=True,
-    chord_mode=False,
-    contour_bias=0,
-    pitch_range=70,
-    accent="None",
-):
-    generator = HiroUSTGenerator()
-    writer = USTWriter(project_name=project_name, tempo=tempo)
-
-    for element in text_elements:
-        if element.startswith("PAUSE_WORD:"):
-            pause_length = int(element.split(":")[1])
-            writer.add_rest(pause_length)
-            continue
-        if accent != "None":
-            word_phonemes = []
-            word_start = True
-        if element.startswith("PAUSE_LINE:"):
-            melody_brain.phrase_len = 0
-            melody_brain.recent_notes.clear()
-            pause_length = int(element.split(":")[1])
-            num_rests = pause_length // HiroConfig.PAUSE_LINE_UNIT
-            for _ in range(num_rests):
-                writer.add_rest(HiroConfig.PAUSE_LINE_UNIT)
-            continue
-
-        if element.startswith("PAUSE_SECTION:"):
-            melody_brain.phrase_len = 0
-            melody_brain.recent_notes.clear()
-            pause_length = int(element.split(":")[1])
-            num_rests = pause_length // HiroConfig.PAUSE_SECTION_UNIT
-            for _ in range(num_rests):
-                writer.add_rest(HiroConfig.PAUSE_SECTION_UNIT)
-            continue
-
-        romaji_phoneme = element
-
-        # small tsu
-        if romaji_phoneme == "っ":
-            writer.add_small_tsu(root_key, length=60)
-            continue
-
-        hiragana_phoneme = generator.romaji_to_hiragana(romaji_phoneme)
-        # WORD BOUNDARY DETECTION + ACCENT
-        if accent != "None" and romaji_phoneme not in ["っ", "+"]:
-            if word_start or romaji_phoneme in [" ", "　", "、", "，"]:
-                if word_phonemes:
-                    word_length = len(word_phonemes)
-                    melody_brain.set_accent_pattern(accent, max(2, word_length))
-                word_phonemes = []
-                word_start = False
-            word_phonemes.append(romaji_phoneme)
-        else:
-            word_start = True
-        stretch_notes = create_stretch_notes(
-            hiragana_phoneme, stretch_prob, 3, melody_brain
-        )
-
-        if accent != "None" and len(word_phonemes) == 1:
-            estimated_word_length = min(
-                6, max(2, len([p for p in text_elements if p == romaji_phoneme]))
-            )
-            melody_brain.set_accent_pattern(accent, estimated_word_length)
-
-        for stretch_phoneme, length_factor in stretch_notes:
-            note_length = get_note_length(
-                stretch_phoneme, base_length, length_var, length_factor, melody_brain
-            )
-
-            if lyrical_mode:
-                note_num = melody_brain.get_smart_note(
-                    root_key,
-                    scale,
-                    stretch_phoneme,
-                    intone_level,
-                    flat_mode,
-                    quartertone_mode,
-                    use_motifs,
-                    chord_mode,
-                    contour_bias,
-                    pitch_range,
-                    accent=accent,
-                )
-            else:
-                note_num = get_random_note(
-                    root_key, scale, flat_mode=flat_mode, quarter_tone=quartertone_mode
-                )
-
-            # QUARTERTONE + ACCENT PBS
-            pbs = "0;0"
-            pbw = "0"
-            pby = "0"
-            pbm = ","
-
-            if quartertone_mode and note_num != int(note_num):
-                fraction = note_num - int(note_num)
-                bend_amount = int(fraction * 50)
-                pbs = f"0;{bend_amount}"
-                pbw = "10"
-            elif accent != "None" and hasattr(melody_brain, "is_high_pitch"):
-
-                if not melody_brain.is_high_pitch and melody_brain.prev_high_pitch:
-                    drop_strength = random.choice([-50, -40, -35, -30, -25])
-                    pbs = f"0;{drop_strength}"
-                    pbw = "0"
-
-                    if note_length > 200:
-                        pbw = f"25,50,{int(note_length * 0.15)}"
-                        pby = f"-15,-15,0"
-
-                elif accent == "Odaka" and melody_brain.word_pos == 2:
-                    pbs = f"0;{random.choice([25, 35, 45])}"
-                    pbw = "20"
-
-                elif melody_brain.word_pos == 1 and melody_brain.is_high_pitch:
-                    pbs = f"0;{random.choice([15, 20])}"
-                    pbw = "0"
-
-            phrase_progress = getattr(melody_brain, "phrase_len", 0) / 12.0
-            last_note_safe = getattr(melody_brain, "last_note", 0)
-            base_intensity = intensity_base
-            melody_offset = melody_brain.get_intensity(last_note_safe, phrase_progress)
-            intensity = max(50, min(120, base_intensity + (melody_offset - 80)))
-
-            flags = "g0B0H0P86"
-
-            writer.add_note(
-                length=note_length,
-                lyric=stretch_phoneme,
-                note_num=note_num,
-                pre_utter=pre_utterance,
-                voice_overlap=voice_overlap,
-                intensity=intensity,
-                envelope=envelope,
-                pbs=pbs,
-                pbw=pbw,
-                flags=flags,
-            )
+# 📄 Open streams a lyrics file into the editor this many lines per tick
+OPEN_CHUNK_LINES = 2000
 
-    return writer.finalize()
-
-
-def get_random_note(
-    root_midi,
-    scale_name,
-    intone_level="Tight (1)",
-    flat_mode=False,
-    quarter_tone=False,
-    use_motifs=True,
-    chord_mode=False,
-):
-    scale = SCALES[scale_name]
-    if flat_mode:
-        return root_midi + 5
-
-    # 1. START with random/default
-    base_semitone = random.choice(scale)
-
-    # Motifs
-    if use_motifs:
-        if not hasattr(get_random_note, "_recent_notes"):
-            get_random_note._recent_notes = []
-        recent = get_random_note._recent_notes
-        if len(recent) >= 2:
-            motif_continue = recent[-1]
-            base_semitone = min(scale, key=lambda x: abs(x - (motif_continue % 12)))
-        get_random_note._recent_notes.append(base_semitone)
-        if len(get_random_note._recent_notes) > 4:
-            get_random_note._recent_notes = get_random_note._recent_notes[-4:]
-
-    # Chords
-    settings = get_intone_settings(intone_level)
-    if chord_mode:
-        chord_root = {0: 0, 3: 5, 5: 7}.get(random.randint(0, 2), 0)
-        chord = [n for n in [(chord_root + i) % 12 for i in [0, 4, 7]] if n in scale]
-        base_semitone = random.choice(chord or scale)
-
-    # Leap limits
-    if settings["leap"] < 3:
-        base_semitone = min(base_semitone, settings["leap"] * 2)
-
-    # Microtones
-    if quarter_tone and random.random() < 0.5:
-        base_semitone += random.choice([0, 0.5, -0.5])
-
-    return root_midi + base_semitone
+# Live preview: regenerate this long after the last edit; the delay grows
+# with the song's note count past LIVE_NOTES_FULL, and live mode pauses
+# (🎵 Gen still works) past LIVE_NOTES_MAX.
+LIVE_DEBOUNCE_MS = 150
+LIVE_NOTES_FULL = 2000
+LIVE_NOTES_MAX = 20000
 
 
 # GUI
 class USTGeneratorApp:
-    def __init__(self, root):
+    def __init__(self, root, profile=None, show_profile=False):
         self.root = root
         self.root.title("Hiro UST v4.2")
         self.root.geometry("900x800")
         self.root.minsize(850, 850)
+        self.profile = profile or StartupProfile()
+        self.show_profile = show_profile
+        # Set by _load_engine once the engine modules are imported
+        self.result_cache = None
+        self.pipeline = None
+        self.worker = GenerationWorker()
+        self.engine_widgets = []  # disabled until the engine is loaded
 
-        try:
-            if getattr(sys, "frozen", False):
-                # running from EXE
-                icon_path = os.path.join(sys._MEIPASS, "hibiki.ico")
-            else:
-                # running from .py
-                icon_path = os.path.join(os.path.dirname(__file__), "hibiki.ico")
+        with self.profile.step("panel", "lyrics"):
+            self._build_lyrics_panel(root)
 
-            if os.path.exists(icon_path):
-                self.root.iconbitmap(icon_path)
-        except Exception:
-            pass
-
-        # =============== MAIN LYRICS ===============
+        controls_main = ttk.Frame(root)
+        controls_main.pack(fill="x", padx=15, pady=(0, 10))
+        for name, build in (
+            ("timing", self._build_timing_panel),
+            ("voice", self._build_voice_panel),
+            ("melody", self._build_melody_panel),
+            ("output", self._build_output_panel),
+        ):
+            with self.profile.step("panel", name):
+                build(controls_main)
+
+        for name, build in (
+            ("status", self._build_status_bar),
+            ("preview", self._build_preview_panel),
+        ):
+            with self.profile.step("panel", name):
+                build(root)
+
+        self.root.after(WORKER_POLL_MS, self._poll_worker)
+
+        self._live_after = None
+        self._live_size = (0, 1)  # (notes, lyric lines) of the last live result
+        self._watch_controls()
+
+        # Window first; icon, engine imports and tables after it is drawn
+        self.root.after_idle(self._on_first_draw)
+
+    # =============== PANELS ===============
+
+    def _build_lyrics_panel(self, parent):
         input_frame = ttk.LabelFrame(
-            root, text="🎵 Song Lyrics (Romaji/Hiragana/Katakana)", padding=12
+            parent, text="🎵 Song Lyrics (Romaji/Hiragana/Katakana)", padding=12
         )
         input_frame.pack(fill="both", expand=True, padx=15, pady=(15, 10))
 
         self.lyrics_text = scrolledtext.ScrolledText(
             input_frame, height=10, font=("Consolas", 10)
         )
-        self.lyrics_text.pack(fill="both", expand=True, pady=(0, 12))
+        self.lyrics_text.pack(fill="both", expand=True, pady=(0, 4))
         self.lyrics_text.insert(
             "1.0",
             """[Verse 1]
@@ -524,13 +129,21 @@ class USTGeneratorApp:
 [Chorus]
 いたみ いたみ きもちいい""",
         )
+        self.lyrics_info_var = tk.StringVar(value="")
+        ttk.Label(
+            input_frame, textvariable=self.lyrics_info_var, font=("TkDefaultFont", 8)
+        ).pack(anchor="w")
+        # The lines, kept in step with every edit; read this, not the widget
+        self.document = LyricDocument()
+        TextSync(self.lyrics_text, self.document)
+        self._opening = None  # (file, after id) while 📄 Open streams a file in
+        # Tags appear once the engine is loaded (see _update_scan)
+        self.highlighter = LyricHighlighter(
+            self.lyrics_text, self.document, self._show_lyric_summary
+        )
 
-        # =============== CONTROLS GRID ===============
-        controls_main = ttk.Frame(root)
-        controls_main.pack(fill="x", padx=15, pady=(0, 10))
-
-        # Panel 1: Timing (Left)
-        timing_panel = ttk.LabelFrame(controls_main, text="⏱️ Timing", padding=10)
+    def _build_timing_panel(self, parent):
+        timing_panel = ttk.LabelFrame(parent, text="⏱️ Timing", padding=10)
         timing_panel.pack(side="left", fill="both", expand=True, padx=(0, 8))
 
         ttk.Label(timing_panel, text="Tempo (BPM):").pack(anchor="w")
@@ -573,10 +186,8 @@ class USTGeneratorApp:
         )
         ttk.Label(sect_row, text="ticks", font=("TkDefaultFont", 8)).pack(side="right")
 
-        # Panel 2: Voice & Length (Left-Center)
-        voice_panel = ttk.LabelFrame(
-            controls_main, text="🎤 Voice & Length", padding=10
-        )
+    def _build_voice_panel(self, parent):
+        voice_panel = ttk.LabelFrame(parent, text="🎤 Voice & Length", padding=10)
         voice_panel.pack(side="left", fill="both", expand=True, padx=(0, 8))
 
         ttk.Label(voice_panel, text="Voice:").pack(anchor="w")
@@ -606,8 +217,36 @@ class USTGeneratorApp:
             side="left", padx=5
         )
 
-        # Panel 3: Melody Modes (Center)
-        melody_panel = ttk.LabelFrame(controls_main, text="🎵 Melody Modes", padding=10)
+        rhythm_frame = ttk.Frame(voice_panel)
+        rhythm_frame.pack(fill="x", pady=(8, 0))
+        ttk.Label(rhythm_frame, text="Rhythm:").pack(side="left")
+        self.rhythm_var = ttk.Combobox(
+            rhythm_frame,
+            values=list(RHYTHM_TEMPLATES.keys()),
+            state="readonly",
+            width=10,
+        )
+        self.rhythm_var.set("Straight")
+        self.rhythm_var.pack(side="left", padx=(5, 15))
+        ttk.Label(rhythm_frame, text="Grid:").pack(side="left")
+        self.grid_var = ttk.Combobox(
+            rhythm_frame, values=GRID_OPTIONS, state="readonly", width=5
+        )
+        self.grid_var.set("Off")
+        self.grid_var.pack(side="left", padx=5)
+
+        ttk.Label(voice_panel, text="Phoneme:").pack(anchor="w")
+        self.phoneme_mode_var = ttk.Combobox(
+            voice_panel,
+            values=["Japanese", "Hepburn", "Wapuro", "English"],
+            state="readonly",
+            width=15,
+        )
+        self.phoneme_mode_var.set("Japanese")
+        self.phoneme_mode_var.pack(fill="x", pady=(0, 8))
+
+    def _build_melody_panel(self, parent):
+        melody_panel = ttk.LabelFrame(parent, text="🎵 Melody Modes", padding=10)
         melody_panel.pack(side="left", fill="y", padx=(0, 8))
 
         self.motif_var = tk.BooleanVar(value=True)
@@ -635,10 +274,30 @@ class USTGeneratorApp:
             melody_panel, text="🎸 I-IV-V Chords", variable=self.chord_var
         ).pack(anchor="w", pady=2)
 
+        self.vibrato_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            melody_panel, text="〰 Vibrato", variable=self.vibrato_var
+        ).pack(anchor="w", pady=2)
+
+        self.lyric_echo_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            melody_panel, text="🔁 Lyric Echo", variable=self.lyric_echo_var
+        ).pack(anchor="w", pady=2)
+
+        self.section_streams_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            melody_panel, text="🧩 Seed per Section", variable=self.section_streams_var
+        ).pack(anchor="w", pady=2)
+
+        self.line_streams_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            melody_panel, text="🧵 Seed per Line", variable=self.line_streams_var
+        ).pack(anchor="w", pady=2)
+
         ttk.Label(melody_panel, text="Intone:").pack(anchor="w", pady=(8, 0))
         self.intone_var = ttk.Combobox(
             melody_panel,
-            values=["Tight (1)", "Medium (2)", "Wide (3)", "Wild (5)"],
+            values=list(INTONE_SETTINGS.keys()),
             state="readonly",
             width=15,
         )
@@ -656,6 +315,14 @@ class USTGeneratorApp:
         self.accent_var.set("None")
         self.accent_var.pack(fill="x", pady=(0, 8))
 
+        # REPEATED LINES / SECTIONS
+        ttk.Label(melody_panel, text="Repeats:").pack(anchor="w")
+        self.repeat_var = ttk.Combobox(
+            melody_panel, values=REPEAT_MODES, state="readonly", width=15
+        )
+        self.repeat_var.set("New")
+        self.repeat_var.pack(fill="x", pady=(0, 8))
+
         # CONTOUR CONTROLS
         ttk.Label(melody_panel, text="Curve:").pack(anchor="w")
         self.contour_var = tk.StringVar(value="0")
@@ -679,18 +346,8 @@ class USTGeneratorApp:
             length=100,
         ).pack(fill="x", pady=(0, 8))
 
-        ttk.Label(voice_panel, text="Phoneme:").pack(anchor="w")
-        self.phoneme_mode_var = ttk.Combobox(
-            voice_panel,
-            values=["Japanese", "Hepburn", "Wapuro", "English"],
-            state="readonly",
-            width=15,
-        )
-        self.phoneme_mode_var.set("Japanese")
-        self.phoneme_mode_var.pack(fill="x", pady=(0, 8))
-
-        # Panel 4: UST + Output (COMBINED)
-        output_panel = ttk.LabelFrame(controls_main, text="⚙️ UST/Output", padding=6)
+    def _build_output_panel(self, parent):
+        output_panel = ttk.LabelFrame(parent, text="⚙️ UST/Output", padding=6)
         output_panel.pack(side="right", fill="both", expand=True)
 
         # Compact UST controls
@@ -761,15 +418,29 @@ class USTGeneratorApp:
 
         btn_frame = ttk.Frame(output_panel)
         btn_frame.pack(fill="x")
-        ttk.Button(btn_frame, text="🎵 Gen", command=self.generate_ust).pack(
-            fill="x", pady=1
+        for text, command in (
+            ("🎵 Gen", self.generate_ust),
+            ("💾 Save", self.save_ust_only),
+            ("📋 Prev", self.preview_phonemes),
+            ("🔊 Listen", self.preview_audio),
+        ):
+            button = ttk.Button(btn_frame, text=text, command=command, state="disabled")
+            button.pack(fill="x", pady=1)
+            self.engine_widgets.append(button)
+        self.cancel_button = ttk.Button(
+            btn_frame, text="⏹ Cancel", command=self.cancel_generation, state="disabled"
         )
-        ttk.Button(btn_frame, text="💾 Save", command=self.save_ust_only).pack(
-            fill="x", pady=1
-        )
-        ttk.Button(btn_frame, text="📋 Prev", command=self.preview_phonemes).pack(
-            fill="x", pady=1
+        self.cancel_button.pack(fill="x", pady=1)
+        self.live_var = tk.BooleanVar(value=False)
+        live_check = ttk.Checkbutton(
+            btn_frame,
+            text="⚡ Live",
+            variable=self.live_var,
+            command=self._on_live_toggle,
+            state="disabled",
         )
+        live_check.pack(anchor="w", pady=1)
+        self.engine_widgets.append(live_check)
         ttk.Button(btn_frame, text="🧹 Clear", command=self.clear).pack(
             fill="x", pady=1
         )
@@ -780,11 +451,16 @@ class USTGeneratorApp:
         ttk.Button(btn_frame, text="📂 Load", command=self.load_preset).pack(
             fill="x", pady=1
         )
+        ttk.Button(btn_frame, text="📄 Open", command=self.open_lyrics).pack(
+            fill="x", pady=1
+        )
 
-        # Status + Preview
-        status_frame = ttk.Frame(root)
-        status_frame.pack(fill="x", padx=15, pady=(0, 10))
-        self.status_var = tk.StringVar(value="✅ Ready - All controls visible!")
+    def _build_status_bar(self, parent):
+        status_area = ttk.Frame(parent)
+        status_area.pack(fill="x", padx=15, pady=(0, 10))
+        status_frame = ttk.Frame(status_area)
+        status_frame.pack(fill="x")
+        self.status_var = tk.StringVar(value="⏳ Loading engine...")
         status_entry = tk.Entry(
             status_frame,
             textvariable=self.status_var,
@@ -794,14 +470,133 @@ class USTGeneratorApp:
             bd=1,
             bg="white",
         )
-        status_entry.pack(fill="x", ipady=4)
+        status_entry.pack(side="left", fill="x", expand=True, ipady=4)
+        self.progress_var = tk.DoubleVar(value=0.0)
+        ttk.Progressbar(
+            status_frame, variable=self.progress_var, maximum=100.0, length=140
+        ).pack(side="right", padx=(6, 0))
+        # 📊: per-stage breakdown of the last Gen / Live run, folded away
+        ttk.Button(status_frame, text="📊", width=3, command=self.toggle_stats).pack(
+            side="right", padx=(6, 0)
+        )
+        self.stats_text = tk.Text(
+            status_area, height=9, state="disabled", font=("Consolas", 9)
+        )
+        self.stats_shown = False
 
-        preview_frame = ttk.LabelFrame(root, text="👀 Preview", padding=8)
+    def _build_preview_panel(self, parent):
+        preview_frame = ttk.LabelFrame(parent, text="👀 Preview", padding=8)
         preview_frame.pack(fill="both", expand=True, padx=15, pady=(0, 15))
+        self.preview_tabs = ttk.Notebook(preview_frame)
+        self.preview_tabs.pack(fill="both", expand=True)
         self.preview_text = scrolledtext.ScrolledText(
-            preview_frame, height=6, state="disabled", font=("Consolas", 9)
+            self.preview_tabs, height=6, state="disabled", font=("Consolas", 9)
         )
-        self.preview_text.pack(fill="both", expand=True)
+        self.preview_tabs.add(self.preview_text, text="📝 Text")
+        # The piano roll itself is built the first time its tab is opened
+        self.roll_tab = ttk.Frame(self.preview_tabs)
+        self.preview_tabs.add(self.roll_tab, text="🎹 Piano Roll")
+        self.piano_roll = None
+        self._roll_pending = None  # (score, tempo, sections) for the unbuilt roll
+        self.preview_tabs.bind("<<NotebookTabChanged>>", self._on_preview_tab)
+
+    def toggle_stats(self):
+        self.stats_shown = not self.stats_shown
+        if self.stats_shown:
+            self.stats_text.pack(fill="x", pady=(6, 0))
+        else:
+            self.stats_text.pack_forget()
+
+    def _show_stats(self, report):
+        self.stats_text.config(state="normal")
+        self.stats_text.delete("1.0", tk.END)
+        self.stats_text.insert("1.0", report)
+        self.stats_text.config(state="disabled")
+
+    def _on_preview_tab(self, _event=None):
+        if self.piano_roll is not None:
+            return
+        if self.preview_tabs.select() != str(self.roll_tab):
+            return
+        with self.profile.step("panel", "piano roll"):
+            self.piano_roll = PianoRoll(self.roll_tab)
+            self.piano_roll.pack(fill="both", expand=True)
+        if self._roll_pending:
+            self.piano_roll.set_score(*self._roll_pending)
+            self._roll_pending = None
+
+    def _show_roll(self, score, tempo, sections):
+        if self.piano_roll is None:
+            self._roll_pending = (score, tempo, sections)
+        else:
+            self.piano_roll.set_score(score, tempo, sections)
+
+    # =============== STARTUP ===============
+
+    def _on_first_draw(self):
+        self.root.update_idletasks()
+        self.profile.mark("window drawn")
+        with self.profile.step("panel", "icon"):
+            self._load_icon()
+        self._load_engine()
+
+    def _load_icon(self):
+        try:
+            if getattr(sys, "frozen", False):
+                # running from EXE
+                icon_path = os.path.join(sys._MEIPASS, "hibiki.ico")
+            else:
+                # running from .py
+                icon_path = os.path.join(os.path.dirname(__file__), "hibiki.ico")
+
+            if os.path.exists(icon_path):
+                self.root.iconbitmap(icon_path)
+        except Exception:
+            pass
+
+    def _load_engine(self):
+        """Import the engine and warm its tables on the worker thread, then
+        enable the generation buttons"""
+        profile = self.profile
+        lyrics, plan, errors = self._generation_snapshot()
+
+        def job(progress, warn):
+            import importlib
+
+            for done, name in enumerate(ENGINE_IMPORTS):
+                progress("loading", done, len(ENGINE_IMPORTS))
+                with profile.step("import", name):
+                    importlib.import_module(name)
+
+            from pipeline import Pipeline
+            from result_cache import ResultCache
+
+            with profile.step("tables", "result cache"):
+                result_cache = ResultCache.default()
+            pipeline = Pipeline(jobs=os.cpu_count() or 1)
+            if not errors:
+                # mora trie, phoneme table, curve templates; the first 🎵 Gen
+                # of the default lyrics is then a memo hit
+                with profile.step("tables", "warm-up run"):
+                    pipeline.run(lyrics, plan)
+            return result_cache, pipeline
+
+        def finish(result):
+            self.result_cache, self.pipeline = result
+            self._update_scan()
+            for widget in self.engine_widgets:
+                widget.config(state="normal")
+            profile.mark("engine ready")
+            self.status_var.set("✅ Ready - All controls visible!")
+            if self.show_profile:
+                report = profile.report()
+                print(report)
+                self.preview_text.config(state="normal")
+                self.preview_text.delete("1.0", tk.END)
+                self.preview_text.insert("1.0", report)
+                self.preview_text.config(state="disabled")
+
+        self.worker.submit("startup", job, (lambda: None, None, finish))
 
     def set_accent_pattern(self, pattern, word_length):
         self.word_morae = list(range(word_length))
@@ -827,159 +622,147 @@ class USTGeneratorApp:
     def _get_envelope_preset(self, preset_name):
         return ENVELOPE_PRESETS.get(preset_name, HiroConfig.DEFAULT_ENVELOPE)
 
-    def validate_inputs(self):
+    def _compile_plan(self, lines):
+        """Read every control once → (GenerationPlan or None, errors)"""
         errors = []
-
-        # NUMERIC FIELDS
+        plan = None
         try:
-            tempo = float(self.tempo_var.get())
-            if not HiroConfig.MIN_TEMPO <= tempo <= HiroConfig.MAX_TEMPO:
-                errors.append(
-                    f"Tempo: {HiroConfig.MIN_TEMPO}-{HiroConfig.MAX_TEMPO} BPM"
-                )
-        except:
-            errors.append("Tempo: Enter number")
-
-        try:
-            length = int(self.length_var.get())
-            if not HiroConfig.MIN_NOTE_LEN <= length <= HiroConfig.MAX_NOTE_LEN:
-                errors.append(
-                    f"Base Length: {HiroConfig.MIN_NOTE_LEN}-{HiroConfig.MAX_NOTE_LEN} ticks"
-                )
-        except:
-            errors.append("Base Length: Enter number")
-
-        for field, minv, maxv, name in [
-            (
-                self.line_pause_var,
-                HiroConfig.MIN_LINE_PAUSE,
-                HiroConfig.MAX_LINE_PAUSE,
-                "Line Pause",
-            ),
-            (
-                self.section_pause_var,
-                HiroConfig.MIN_SECTION_PAUSE,
-                HiroConfig.MAX_SECTION_PAUSE,
-                "Section Pause",
-            ),
-            (
-                self.length_var_ctrl,
-                HiroConfig.MIN_LENGTH_VAR,
-                HiroConfig.MAX_LENGTH_VAR,
-                "Len Var",
-            ),
-            (
-                self.stretch_var,
-                HiroConfig.MIN_STRETCH,
-                HiroConfig.MAX_STRETCH,
-                "Stretch",
-            ),
-            (
-                self.pre_utter_var,
-                HiroConfig.MIN_PRE_UTTER,
-                HiroConfig.MAX_PRE_UTTER,
-                "PreUtterance",
-            ),
-            (
-                self.voice_overlap_var,
-                HiroConfig.MIN_VOICE_OVERLAP,
-                HiroConfig.MAX_VOICE_OVERLAP,
-                "Voice Overlap",
-            ),
-            (
-                self.intensity_base_var,
-                HiroConfig.MIN_INTENSITY,
-                HiroConfig.MAX_INTENSITY,
-                "Intensity",
-            ),
-        ]:
-            try:
-                val = float(field.get())
-                if not minv <= val <= maxv:
-                    errors.append(f"{name}: {minv}-{maxv}")
-            except:
-                errors.append(f"{name}: Enter number")
-
-        # COMBOBOXES
-        if self.voice_var.get() not in KEY_ROOTS:
-            errors.append("Voice: Select from dropdown")
-        if self.scale_var.get() not in SCALES:
-            errors.append("Scale: Select from dropdown")
-
-        # LYRICS
-        lyrics = self.lyrics_text.get("1.0", tk.END).strip()
-        if not lyrics or len(lyrics) < 10:
+            plan = GenerationPlan.from_app(self)
+        except PlanError as e:
+            errors.extend(e.errors)
+
+        # LYRICS (counted only until there is enough)
+        chars = 0
+        for line in lines:
+            chars += len(line.strip())
+            if chars >= 10:
+                break
+        if chars < 10:
             errors.append("Lyrics: Add some text")
 
-        return errors
+        return plan, errors
 
-    def _generate_content(self):
-        # VALIDATE
-        errors = self.validate_inputs()
+    def validate_inputs(self):
+        return self._compile_plan(self.document.lines)[1]
+
+    # =============== BACKGROUND GENERATION ===============
+
+    def _start_job(self, kind, func, snapshot, on_done):
+        """Run func(progress, warn) on the worker thread; on_done(result) runs
+        on the Tk thread, unless `snapshot()` changed in the meantime."""
+        self.worker.submit(kind, func, (snapshot, snapshot(), on_done))
+        self.cancel_button.config(state="normal")
+        self.progress_var.set(0.0)
+
+    def _poll_worker(self):
+        for kind, job, payload in self.worker.poll():
+            if job is not self.worker.current:
+                continue  # superseded by a newer job
+            if kind == PROGRESS:
+                stage, done, total = payload
+                if job.kind == "startup":
+                    self.progress_var.set(100.0 * done / max(total, 1))
+                else:
+                    from pipeline import STAGES
+
+                    step = STAGES.index(stage) if stage in STAGES else 0
+                    self.progress_var.set(
+                        100.0 * (step + done / max(total, 1)) / len(STAGES)
+                    )
+                if job.kind != "live":
+                    self.status_var.set(f"⏳ {stage} {done}/{total}")
+            elif kind == WARNING:
+                self.status_var.set(payload)
+            else:
+                self._finish_job(kind, job, payload)
+        self.root.after(WORKER_POLL_MS, self._poll_worker)
+
+    def _finish_job(self, kind, job, payload):
+        self.cancel_button.config(state="disabled")
+        snapshot, taken, on_done = job.context
+        if kind == CANCELLED:
+            self.progress_var.set(0.0)
+            self.status_var.set("⏹ Cancelled")
+        elif kind == ERROR:
+            self.progress_var.set(0.0)
+            self.status_var.set(f"⚠️ Rare error: {str(payload)[:60]}")
+        elif snapshot() != taken:
+            self.progress_var.set(0.0)
+            if job.kind != "live":  # live mode has the next run queued already
+                self.status_var.set("↻ Settings changed while generating - press again")
+        else:
+            self.progress_var.set(100.0)
+            on_done(payload)
+
+    def cancel_generation(self):
+        self.worker.cancel()
+
+    def _generation_snapshot(self):
+        # the document's lines themselves (the engine works per line); a
+        # tuple, so the worker never sees later edits
+        lines = tuple(self.document.lines)
+        plan, errors = self._compile_plan(lines)
+        return lines, plan, tuple(errors)
+
+    def _generate_content(self, kind, on_done):
+        """Validate on the Tk thread, then generate in the background and
+        call on_done(ust_content)"""
+        lyrics, plan, errors = self._generation_snapshot()
         if errors:
             self.status_var.set(f"❌ Fix: {' | '.join(errors)}")
-            return None
-
-        try:
-            melodybrain = MelodyBrain(seed=int(self.seed_var.get()))
-            lyrics = self.lyrics_text.get("1.0", tk.END).strip()
-
-            phonemizer = Phonemizer()
-            mode_map = {
-                "Japanese": "japanese",
-                "Hepburn": "hepburn",
-                "Wapuro": "wapuro",
-                "English": "english",
-            }
-            phonemizer.set_mode(mode_map[self.phoneme_mode_var.get()])
-
-            parts, elements = parse_song_structure(
-                lyrics,
-                int(self.line_pause_var.get()),
-                int(self.section_pause_var.get()),
-                on_warning=lambda msg: self.status_var.set(msg),
-                phonemizer=phonemizer,
-            )
+            return
 
-            self.status_var.set(f"✅ Parsed {len(elements)} elements ✓")
-
-            root_key = KEY_ROOTS[self.voice_var.get()]
-            ust_content = text_to_ust(
-                elements,
-                str(self.project_var.get()),
-                float(self.tempo_var.get()),
-                int(self.length_var.get()),
-                root_key,
-                self.scale_var.get(),
-                self.intone_var.get(),
-                float(self.length_var_ctrl.get()),
-                float(self.stretch_var.get()),
-                melodybrain,
-                int(self.pre_utter_var.get()),
-                int(self.voice_overlap_var.get()),
-                int(self.intensity_base_var.get()),
-                self._get_envelope_preset(self.envelope_var.get()),
-                self.flat_var.get(),
-                self.quartertone_var.get(),
-                self.lyrical_mode_var.get(),
-                self.motif_var.get(),
-                self.chord_var.get(),
-                contour_bias=float(self.contour_var.get()),
-                pitch_range=float(self.range_var.get()),
-                accent=self.accent_var.get(),
-            )
+        def job(progress, warn):
+            outcome = {}
+
+            def render():
+                # Only the stages whose settings changed since last time re-run
+                run = self.pipeline.run(
+                    lyrics,
+                    plan,
+                    on_warning=warn,
+                    on_progress=progress,
+                    stats=StageStats(),
+                )
+                outcome["ran"] = len(run.ran)
+                outcome["stats"] = run.stats.report()
+                outcome["score"] = run.score
+                sections = section_ticks(run.score, run.section_marks, run.element_offsets)
+                return run.ust, {"elements": len(run.elements), "sections": sections}
+
+            entry, hit = self.result_cache.fetch(lyrics, plan, render)
+            if "score" in outcome:
+                tempo, score = plan.tempo, outcome["score"]
+            else:
+                tempo, score = score_from_ust(entry.ust)
+            sections = [tuple(mark) for mark in entry.meta.get("sections", [])]
+            stats = outcome.get("stats", "📊 Served from the result cache")
+            return entry, hit, outcome.get("ran", 0), (score, tempo, sections), stats
+
+        def finish(result):
+            from pipeline import STAGES
+
+            entry, hit, ran, roll, stats = result
+            self._show_roll(*roll)
+            cache_info = self.result_cache.summary()
+            self._show_stats(f"{stats}\n  cache: {cache_info}")
+            elements = entry.meta.get("elements", 0)
+            if hit:
+                self.status_var.set(f"⚡ Cached {elements} elements | {cache_info}")
+            else:
+                self.status_var.set(
+                    f"✅ Parsed {elements} elements ✓"
+                    f" | re-ran {ran}/{len(STAGES)} stages | {cache_info}"
+                )
+            on_done(entry.ust)
 
-            return ust_content
-        except Exception as e:
-            self.status_var.set(f"⚠️ Rare error: {str(e)[:60]}")
-            return None
+        self._start_job(kind, job, self._generation_snapshot, finish)
 
     def generate_ust(self):
         """Generate + Auto-save NEXT TO EXE"""
-        ust_content = self._generate_content()
-        if not ust_content:
-            return
+        self._generate_content("generate", self._save_next_to_exe)
 
+    def _save_next_to_exe(self, ust_content):
         if getattr(sys, "frozen", False):
             save_dir = os.path.dirname(sys.executable)  # EXE folder
         else:
@@ -1001,13 +784,10 @@ class USTGeneratorApp:
         except Exception as e:
             self.status_var.set(f"❌ Save failed: {str(e)}")
 
-        accent = self.accent_var.get()
-
     def save_ust_only(self):
-        ust_content = self._generate_content()
-        if not ust_content:
-            return
+        self._generate_content("save", self._save_as)
 
+    def _save_as(self, ust_content):
         if getattr(sys, "frozen", False):
             initial_dir = sys._MEIPASS
         else:
@@ -1031,54 +811,211 @@ class USTGeneratorApp:
             except Exception as e:
                 self.status_var.set(f"❌ Save failed: {str(e)}")
 
+    def _preview_snapshot(self):
+        return (
+            tuple(self.document.lines),
+            self.phoneme_mode_var.get(),
+            self.line_pause_var.get(),
+            self.section_pause_var.get(),
+        )
+
     def preview_phonemes(self):
-        lyrics = self.lyrics_text.get("1.0", tk.END).strip()
-        if not lyrics:
+        lyrics, mode_name, line_pause, section_pause = self._preview_snapshot()
+        if not any(line.strip() for line in lyrics):
             self.status_var.set("❌ No lyrics to preview")
             return
+        try:
+            line_pause, section_pause = int(line_pause), int(section_pause)
+        except ValueError:
+            self.status_var.set("❌ Fix: Line/Section pause must be numbers")
+            return
 
-        phonemizer = Phonemizer()
-        mode_map = {
-            "Japanese": "japanese",
-            "Hepburn": "hepburn",
-            "Wapuro": "wapuro",
-            "English": "english",
-        }
-        phonemizer.set_mode(mode_map[self.phoneme_mode_var.get()])
-
-        # Parse with phonemizer
-        parts, elements = parse_song_structure(
-            lyrics,
-            int(self.line_pause_var.get()),
-            int(self.section_pause_var.get()),
-            phonemizer=phonemizer,
-            on_warning=lambda msg: self.status_var.set(msg),
+        def job(progress, warn):
+            from phonemizer import Phonemizer
+            from ust_engine import HiroUSTGenerator, parse_song_structure
+
+            phonemizer = Phonemizer()
+            phonemizer.set_mode(PHONEME_MODES[mode_name])
+
+            progress("phonemize", 0, 1)
+            # Parse with phonemizer
+            parts, elements = parse_song_structure(
+                lyrics,
+                line_pause,
+                section_pause,
+                phonemizer=phonemizer,
+                on_warning=warn,
+            )
+
+            preview = f"🔤 {mode_name} Mode (first 30):\n\n"
+            non_pause_count = 0
+
+            for i, elem in enumerate(elements[:30]):
+                if elem.startswith("PAUSE"):
+                    pause_len = elem.split(":")[1]
+                    preview += f"{i:2d}: [PAUSE {pause_len} ticks]\n"
+                else:
+                    generator = HiroUSTGenerator()
+                    hiragana = generator.romaji_to_hiragana(elem)
+                    preview += f"{i:2d}: '{elem}' → {hiragana}\n"
+                    non_pause_count += 1
+            return preview, non_pause_count
+
+        def finish(result):
+            preview, non_pause_count = result
+            self.preview_text.config(state="normal")
+            self.preview_text.delete("1.0", tk.END)
+            self.preview_text.insert("1.0", preview)
+            self.preview_text.config(state="disabled")
+
+            self.status_var.set(f"✅ {mode_name}: {non_pause_count} phonemes")
+
+        self._start_job("preview", job, self._preview_snapshot, finish)
+
+    def preview_audio(self):
+        """Render a formant-tone WAV of the current song and play it"""
+        lyrics, plan, errors = self._generation_snapshot()
+        if errors:
+            self.status_var.set(f"❌ Fix: {' | '.join(errors)}")
+            return
+        filename = os.path.join(
+            tempfile.gettempdir(),
+            f"{self.project_var.get().replace(' ', '_')}_preview.wav",
         )
 
-        preview = f"🔤 {self.phoneme_mode_var.get()} Mode (first 30):\n\n"
-        non_pause_count = 0
+        def job(progress, warn):
+            from audio_preview import write_wav
 
-        for i, elem in enumerate(elements[:30]):
-            if elem.startswith("PAUSE"):
-                pause_len = elem.split(":")[1]
-                preview += f"{i:2d}: [PAUSE {pause_len} ticks]\n"
-            else:
-                generator = HiroUSTGenerator()
-                hiragana = generator.romaji_to_hiragana(elem)
-                preview += f"{i:2d}: '{elem}' → {hiragana}\n"
-                non_pause_count += 1
+            run = self.pipeline.run(lyrics, plan, on_warning=warn, on_progress=progress)
+            started = time.perf_counter()
+            seconds = write_wav(
+                filename, run.score, plan.tempo, plan.envelope, on_progress=progress
+            )
+            return seconds, (time.perf_counter() - started) * 1000.0
 
-        self.preview_text.config(state="normal")
-        self.preview_text.delete("1.0", tk.END)
-        self.preview_text.insert("1.0", preview)
-        self.preview_text.config(state="disabled")
+        def finish(result):
+            from audio_preview import play_wav
 
-        self.status_var.set(
-            f"✅ {self.phoneme_mode_var.get()}: {non_pause_count} phonemes"
+            seconds, elapsed_ms = result
+            if play_wav(filename):
+                self.status_var.set(f"🔊 Playing {seconds:.1f} s (rendered in {elapsed_ms:.0f} ms)")
+            else:
+                self.status_var.set(f"🔊 No audio player found - saved {filename}")
+
+        self._start_job("audio", job, self._generation_snapshot, finish)
+
+    # =============== LIVE PREVIEW ===============
+
+    def _watch_controls(self):
+        """Every setting variable / combobox + lyrics edits → _schedule_live"""
+        skip = (self.status_var, self.progress_var, self.live_var, self.lyrics_info_var)
+        for value in list(vars(self).values()):
+            if isinstance(value, tk.Variable) and value not in skip:
+                value.trace_add("write", lambda *_: self._schedule_live())
+            elif isinstance(value, ttk.Combobox):
+                value.bind("<<ComboboxSelected>>", lambda _e: self._schedule_live())
+        self.phoneme_mode_var.bind("<<ComboboxSelected>>", self._update_scan, add="+")
+        self.lyrics_text.bind("<<Modified>>", self._on_lyrics_modified)
+        self.lyrics_text.edit_modified(False)  # the default lyrics set it
+
+    def _on_lyrics_modified(self, _event=None):
+        if self.lyrics_text.edit_modified():
+            self.lyrics_text.edit_modified(False)  # re-arms the event
+            # after the edit has reached self.document (see TextSync)
+            self.root.after_idle(self.highlighter.refresh)
+            self._schedule_live()
+
+    # =============== LYRIC HIGHLIGHTING ===============
+
+    def _update_scan(self, _event=None):
+        """Retag the lyrics with the current phoneme mode's scan"""
+        if self.pipeline is None:
+            return
+        pipeline = self.pipeline
+        mode = PHONEME_MODES.get(self.phoneme_mode_var.get(), "japanese")
+        self.highlighter.set_scan(lambda line: pipeline.line_marks(line, mode))
+
+    def _show_lyric_summary(self, counts):
+        info = [f"📑 {counts['section']} sections"]
+        if counts["unmatched"]:
+            line = self.highlighter.first_line("unmatched")
+            info.append(f"❓ {counts['unmatched']} unmatched (first: line {line})")
+        if counts["long_vowel"]:
+            info.append(f"〰️ {counts['long_vowel']} long vowels")
+        self.lyrics_info_var.set(" | ".join(info))
+
+    def _on_live_toggle(self):
+        if self.live_var.get():
+            self._schedule_live()
+        elif self.worker.busy and self.worker.current.kind == "live":
+            self.worker.cancel()
+
+    def _schedule_live(self):
+        """Debounce: restart the timer on every change"""
+        if not self.live_var.get():
+            return
+        if self._live_after is not None:
+            self.root.after_cancel(self._live_after)
+        scale = max(1.0, self._live_estimate() / LIVE_NOTES_FULL)
+        self._live_after = self.root.after(
+            int(LIVE_DEBOUNCE_MS * scale), self._run_live
         )
 
+    def _live_estimate(self):
+        """Notes the current text would give, scaled from the last live result
+        by line count"""
+        notes, lines = self._live_size
+        return notes * len(self.document) // max(lines, 1)
+
+    def _run_live(self):
+        self._live_after = None
+        if self.pipeline is None:
+            return  # engine still loading; 🎵 Gen / ⚡ Live are disabled meanwhile
+        if self.worker.busy and self.worker.current.kind != "live":
+            self._schedule_live()  # never cancel a Gen / Save in progress
+            return
+        estimate = self._live_estimate()
+        if estimate > LIVE_NOTES_MAX:
+            # stays paused until the text shrinks back under the limit
+            self.status_var.set(f"⏸ Live paused: ~{estimate} notes - press 🎵 Gen")
+            return
+        lyrics, plan, errors = self._generation_snapshot()
+        if errors:
+            self.status_var.set(f"❌ Fix: {' | '.join(errors)}")
+            return
+
+        def job(progress, warn):
+            started = time.perf_counter()
+            run = self.pipeline.run(
+                lyrics, plan, on_warning=warn, on_progress=progress, stats=StageStats()
+            )
+            return run, (time.perf_counter() - started) * 1000.0
+
+        def finish(result):
+            run, elapsed_ms = result
+            self._show_roll(
+                run.score,
+                plan.tempo,
+                section_ticks(run.score, run.section_marks, run.element_offsets),
+            )
+            notes = sum(note.kind == NOTE for note in run.score)
+            self._live_size = (notes, len(self.document))
+            self.preview_text.config(state="normal")
+            self.preview_text.delete("1.0", tk.END)
+            self.preview_text.insert(
+                "1.0", f"⚡ Live UST ({notes} notes):\n\n{run.ust[:600]}..."
+            )
+            self.preview_text.config(state="disabled")
+            ran = ", ".join(run.ran) or "nothing"
+            self.status_var.set(f"⚡ Live {elapsed_ms:.0f} ms | re-ran {ran}")
+            self._show_stats(run.stats.report())
+
+        self._start_job("live", job, self._generation_snapshot, finish)
+
     def clear(self):
+        self._stop_opening()
         self.lyrics_text.delete("1.0", tk.END)
+        self.document.path = None
 
         # Clear preview only
         self.preview_text.config(state="normal")
@@ -1087,6 +1024,54 @@ class USTGeneratorApp:
 
         self.status_var.set("🧹 Lyrics cleared ✓")
 
+    def open_lyrics(self):
+        filename = filedialog.askopenfilename(
+            filetypes=[("Lyrics", "*.txt"), ("All files", "*.*")],
+            title="Open Lyrics",
+        )
+        if not filename:
+            return
+        self._stop_opening()
+        try:
+            lyrics_file = open(filename, encoding="utf-8-sig")
+        except OSError as e:
+            self.status_var.set(f"❌ Open failed: {str(e)[:50]}")
+            return
+        self.lyrics_text.delete("1.0", tk.END)
+        self.document.path = filename
+        self._opening = (lyrics_file, None)
+        self._open_chunk(lyrics_file, 0)
+
+    def _open_chunk(self, lyrics_file, loaded):
+        """Insert the next OPEN_CHUNK_LINES lines, then yield to the event loop"""
+        try:
+            chunk = list(itertools.islice(lyrics_file, OPEN_CHUNK_LINES))
+        except (OSError, UnicodeDecodeError) as e:
+            self._stop_opening()
+            self.status_var.set(f"❌ Open failed: {str(e)[:50]}")
+            return
+        if chunk:
+            self.lyrics_text.insert(tk.END, "".join(chunk))
+            loaded += len(chunk)
+            self.status_var.set(f"📄 Opening... {loaded} lines")
+            after_id = self.root.after(1, self._open_chunk, lyrics_file, loaded)
+            self._opening = (lyrics_file, after_id)
+            return
+        self._stop_opening()
+        if self.document.lines[-1] == "" and len(self.document) > 1:
+            self.lyrics_text.delete("end-2c")  # the file's final newline
+        name = os.path.basename(self.document.path)
+        self.status_var.set(f"📄 Opened {name} ({loaded} lines)")
+
+    def _stop_opening(self):
+        if self._opening is None:
+            return
+        lyrics_file, after_id = self._opening
+        self._opening = None
+        if after_id is not None:
+            self.root.after_cancel(after_id)
+        lyrics_file.close()
+
     def save_preset(self):
         preset = build_preset_from_app(self)
         filename = filedialog.asksaveasfilename(
@@ -1111,12 +1096,25 @@ class USTGeneratorApp:
         try:
             preset = load_preset_from_file(filename)
             apply_preset_to_app(self, preset)
+            self._update_scan()  # the phoneme mode may have changed
             self.status_var.set(f"✅ Loaded: {os.path.basename(filename)}")
         except Exception as e:
             self.status_var.set(f"❌ Load failed: {str(e)[:50]}")
 
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = USTGeneratorApp(root)
+    multiprocessing.freeze_support()  # section pool workers in the frozen EXE
+    parser = argparse.ArgumentParser(description="Hiro UST GUI")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print per-import / per-panel startup times once the engine is ready",
+    )
+    args = parser.parse_args()
+
+    profile = StartupProfile(started=_LAUNCHED)
+    profile.record("import", "gui modules", _GUI_IMPORTED - _LAUNCHED)
+    with profile.step("panel", "tk root"):
+        root = tk.Tk()
+    app = USTGeneratorApp(root, profile, show_profile=args.profile_startup)
     root.mainloop()
@@ -0,0 +1,116 @@
+# lyric_document.py
+"""Lyrics as a list of lines that knows which lines changed (no Tk imports)
+
+The editor used to read the whole Text buffer back (get("1.0", END)) for
+every validate / generate / preview. LyricDocument keeps the lines itself:
+TextSync updates only the lines an insert / delete touched, the engine takes
+the lines as they are (Pipeline.run, phonemize_lines) without joining them,
+and changes_since() tells a consumer which line ranges were edited since it
+last looked, so it can skip the rest.
+"""
+
+CHANGE_LOG = 512  # edits remembered; older consumers get "everything changed"
+
+
+class LyricDocument:
+    def __init__(self, lines=("",), path=None):
+        self.lines = list(lines) or [""]
+        self.path = path  # file the lyrics were opened from, if any
+        self.revision = 0
+        self._log = []  # [(revision, first, old_end, new_end)]
+
+    def __len__(self):
+        return len(self.lines)
+
+    def replace_lines(self, first, old_end, new_lines):
+        """lines[first:old_end] = new_lines, logged as one edit"""
+        self.lines[first:old_end] = new_lines
+        self.revision += 1
+        self._log.append((self.revision, first, old_end, first + len(new_lines)))
+        if len(self._log) > CHANGE_LOG:
+            del self._log[: len(self._log) - CHANGE_LOG]
+
+    def reset(self, lines=("",), path=None):
+        self.path = path
+        self.replace_lines(0, len(self.lines), list(lines) or [""])
+
+    def changes_since(self, revision):
+        """[(first, old_end, new_end)] edits after `revision`, oldest first;
+        None if they are no longer all logged"""
+        if revision == self.revision:
+            return []
+        if not self._log or self._log[0][0] > revision + 1:
+            return None
+        return [
+            (first, old, new) for rev, first, old, new in self._log if rev > revision
+        ]
+
+
+def shift_lines(indices, first, old_end, new_end):
+    """Line indices after lines[first:old_end] became new_end - first lines:
+    the replaced ones dropped, later ones moved"""
+    shift = new_end - old_end
+    return {
+        index if index < first else index + shift
+        for index in indices
+        if not first <= index < old_end
+    }
+
+
+class TextSync:
+    """Keeps a LyricDocument in step with a Tk Text widget.
+
+    The widget's Tcl command is wrapped, so every insert / delete / replace
+    (typing, paste, Text.insert from Python alike) updates just the lines it
+    touched, read back from the widget. Undo / redo re-read everything.
+    """
+
+    def __init__(self, text, document):
+        self.text = text
+        self.document = document
+        self._widget = str(text)
+        self._command = self._widget + "_lyrics"
+        text.tk.call("rename", self._widget, self._command)
+        text.tk.createcommand(self._widget, self._dispatch)
+        self.resync()
+
+    def _call(self, *args):
+        return self.text.tk.call(self._command, *args)
+
+    def _row(self, index):
+        # "end" is the row after the last line; edits there touch the last one
+        return min(int(str(self._call("index", index)).split(".")[0]), self._rows())
+
+    def _rows(self):
+        return int(str(self._call("index", "end-1c")).split(".")[0])
+
+    def _read(self, first, last):
+        return str(self._call("get", f"{first}.0", f"{last}.end")).split("\n")
+
+    def resync(self):
+        """Re-read the whole widget (after an undo / redo)"""
+        lines = self._read(1, self._rows())
+        self.document.replace_lines(0, len(self.document.lines), lines)
+
+    def _dispatch(self, command, *args):
+        if command == "insert":
+            first = last = self._row(args[0])
+        elif command == "delete" and len(args) == 1:
+            first, last = self._row(args[0]), self._row(f"{args[0]}+1c")
+        elif command in ("delete", "replace") and len(args) >= 2:
+            first, last = self._row(args[0]), self._row(args[1])
+        else:
+            result = self._call(command, *args)
+            if command == "edit" and args and args[0] in ("undo", "redo"):
+                self.resync()
+            return result
+        last = max(last, first)  # a backwards range deletes nothing
+        rows = self._rows()
+        result = self._call(command, *args)
+        if command == "delete" and len(args) > 2:  # several ranges: rare
+            self.resync()
+            return result
+        # rows first..last became first..last + (row count change)
+        new_last = last + self._rows() - rows
+        self.document.replace_lines(first - 1, last, self._read(first, new_last))
+        return result
@@ -0,0 +1,99 @@
+# lyric_highlight.py
+"""Section headers, unmatched characters and long vowels tagged in a Tk Text
+
+The spans come from the phonemizing scan itself (Pipeline.line_marks), not a
+second pass over the lyrics. On each edit only the lines the LyricDocument
+reports as edited are re-scanned and re-tagged: Tk tags move with the text
+around them, so lines that merely shifted keep theirs. Large retags (a pasted song, a
+phoneme mode change) run BATCH_LINES at a time between events.
+"""
+
+from lyric_document import shift_lines
+
+BATCH_LINES = 200
+
+# Tag names are ust_engine's LINE_SECTION / MARK_* values (not imported here:
+# the editor is up before the engine has loaded)
+TAG_STYLES = {
+    "section": {"foreground": "#1f5fbf", "font": ("Consolas", 10, "bold")},
+    "unmatched": {"background": "#ffd0d0", "underline": True},
+    "long_vowel": {"background": "#fff2b3"},
+}
+
+
+class LyricHighlighter:
+    def __init__(self, text, document, on_summary=None):
+        self.text = text
+        self.document = document  # LyricDocument kept in step with `text`
+        self.on_summary = on_summary  # on_summary(counts dict) after each pass
+        self.scan = None  # scan(line) → [(tag, start, end)]; None until loaded
+        self._revision = None  # document revision last queued
+        self._counts = []  # per line: {tag: spans}
+        self._pending = set()  # line indices still to (re)tag
+        self._after = None
+        for tag, style in TAG_STYLES.items():
+            text.tag_configure(tag, **style)
+
+    def set_scan(self, scan):
+        """New scanner (engine loaded, phoneme mode changed) → retag all"""
+        self.scan = scan
+        self._revision = None
+        self.refresh()
+
+    def refresh(self):
+        """Queue the lines edited since the last call"""
+        self._catch_up()
+        if self.scan is not None and self._pending and self._after is None:
+            self._tag_batch()
+
+    def _catch_up(self):
+        # pending indices and counts follow the document's line numbering
+        changes = None
+        if self._revision is not None:
+            changes = self.document.changes_since(self._revision)
+        self._revision = self.document.revision
+        if changes is None:
+            self._counts = [{}] * len(self.document)
+            self._pending = set(range(len(self.document)))
+        for first, old_end, new_end in changes or ():
+            self._pending = shift_lines(self._pending, first, old_end, new_end)
+            self._pending.update(range(first, new_end))
+            self._counts[first:old_end] = [{}] * (new_end - first)
+
+    def _tag_batch(self):
+        self._after = None
+        self._catch_up()
+        batch = sorted(self._pending)[:BATCH_LINES]
+        self._pending.difference_update(batch)
+        for index in batch:
+            self._tag_line(index)
+        if self._pending:
+            self._after = self.text.after(1, self._tag_batch)
+        elif self.on_summary:
+            self.on_summary(self.summary())
+
+    def _tag_line(self, index):
+        row = index + 1
+        line_start, line_end = f"{row}.0", f"{row}.end"
+        for tag in TAG_STYLES:
+            self.text.tag_remove(tag, line_start, line_end)
+        counts = {}
+        for tag, start, end in self.scan(self.document.lines[index]):
+            self.text.tag_add(tag, f"{row}.{start}", f"{row}.{end}")
+            counts[tag] = counts.get(tag, 0) + 1
+        self._counts[index] = counts
+
+    def summary(self):
+        """{tag: span count} over the whole text"""
+        totals = dict.fromkeys(TAG_STYLES, 0)
+        for counts in self._counts:
+            for tag, count in counts.items():
+                totals[tag] += count
+        return totals
+
+    def first_line(self, tag):
+        """1-based line of the first `tag` span, or None"""
+        for index, counts in enumerate(self._counts):
+            if counts.get(tag):
+                return index + 1
+        return None
@@ -4,8 +4,8 @@ import random
 import numpy as np
 
 from constants import VOWEL_CHARS, CONSONANT_CHARS
-from intone_utils import get_intone_settings
-from scales import SCALES
+from generation_plan import melody_plan
+from phoneme_table import PHONEME_TABLE
 
 
 class NoteMarkov:
@@ -30,12 +30,14 @@ class NoteMarkov:
             if total > 0:
                 self.transitions[key] /= total
 
-    def next_note(self, state, stress, scale):
+    def next_note(self, state, stress, scale, off_scale=None):
         key = (tuple(state[-self.order :]), stress)
         if key in self.transitions:
             probs = self.transitions[key].copy()
             # Bias to scale
-            probs[~np.isin(np.arange(12), scale)] *= 0.1
+            if off_scale is None:
+                off_scale = [n for n in range(12) if n not in scale]
+            probs[list(off_scale)] *= 0.1
             probs /= probs.sum()
             return np.random.choice(12, p=probs)
         return random.choice(scale)
@@ -89,8 +91,6 @@ class MotifMemory:
 
 
 class MelodyBrain:
-    _intone_cache = {}
-
     def __init__(self, seed=None):
         self.seed = seed or 1234
         random.seed(self.seed)
@@ -107,11 +107,14 @@ class MelodyBrain:
         self.is_high_pitch = False
         self.prev_high_pitch = False
         self.markov = NoteMarkov(order=1)
+        self.guide_note = None  # earlier pitch to lean toward (one note only)
+        self.guide_weight = 0.0
 
-    def train_markov(self, phonemes, notes=None):
+    def train_markov(self, phonemes, notes=None, stresses=None):
         if notes is None:
             notes = self.recent_notes[-20:]
-        stresses = [1 if p in self.VOWEL_CHARS else 0 for p in phonemes[-20:]]
+        if stresses is None:
+            stresses = [1 if p in self.VOWEL_CHARS else 0 for p in phonemes[-20:]]
         if len(notes) > 2:
             self.markov.train(notes, stresses)
 
@@ -144,69 +147,79 @@ class MelodyBrain:
         contour_bias=0,
         pitch_range=70,
         accent="None",
+        phoneme_id=None,
     ):
-        scale = SCALES[scale_name]
+        plan = melody_plan(
+            scale_name,
+            intone_level,
+            flat_mode,
+            quarter_tone,
+            use_motifs,
+            chord_mode,
+            contour_bias,
+            pitch_range,
+            accent,
+        )
+        if phoneme_id is None:
+            phoneme_id = PHONEME_TABLE.intern(phoneme)
+        return root_midi + self.plan_note(plan, phoneme_id)
+
+    def plan_note(self, plan, phoneme_id):
+        """Next melody offset (semitones above root) for an interned phoneme"""
+        table = PHONEME_TABLE
+        scale = plan.scale
         self.phrase_len += 1
-        settings = get_intone_settings(intone_level)
-        is_vowel = phoneme in "あいうえお"
-        is_stretch = phoneme == "+"
-        phrase_pos = (self.phrase_len - 1) / max(12, settings["phrase"])
-        contour_curve = contour_bias / 100.0
+        is_vowel = table.single_vowel[phoneme_id]
+        is_stretch = phoneme_id == table.stretch_id
+        phrase_pos = (self.phrase_len - 1) / plan.contour_span
         contour_target = (
-            phrase_pos + contour_curve * phrase_pos * (1 - phrase_pos)
-        ) * pitch_range
+            phrase_pos + plan.contour_curve * phrase_pos * (1 - phrase_pos)
+        ) * plan.pitch_range
 
         stress = 1 if is_vowel else 0
-        self.train_markov([phoneme], [self.last_note])
-
-        if intone_level not in self._intone_cache:
-            self._intone_cache[intone_level] = get_intone_settings(intone_level)
-        settings = self._intone_cache[intone_level]
+        self.train_markov(None, [self.last_note], [stress])
 
-        if self.phrase_len > settings["phrase"] or phoneme in "。！？":
+        if self.phrase_len > plan.phrase_limit or table.phrase_break[phoneme_id]:
             self.phrases.append(self.last_note)
             self.last_note = min(max(0, int(contour_target * 0.8)), 11)
             target_note = self.last_note
             self.phrase_len = 1
         else:
             state = [self.last_note]
-            markov_note = self.markov.next_note(state, stress, scale)
+            markov_note = self.markov.next_note(state, stress, scale, plan.off_scale)
 
-            if use_motifs:
+            if plan.use_motifs:
                 motif_note = self.motif_memory.get_motif_note(self.last_note, scale)
                 target_note = (
                     markov_note * 0.5 + motif_note * 0.3 + contour_target * 0.2
                 )
             else:
                 if is_vowel:
-                    high_notes = scale[-3:]
                     target_note = (
                         markov_note * 0.6
-                        + random.choice([4, 7] + high_notes) * 0.3
+                        + random.choice(plan.vowel_choices) * 0.3
                         + contour_target * 0.1
                     )
                 elif is_stretch:
                     target_note = markov_note * 0.8 + self.last_note * 0.2
                 else:
-                    cons_notes = [0, 2, 4, 7]
-                    if settings["leap"] > 2:
-                        cons_notes.extend([9, 11])
                     target_note = (
                         markov_note * 0.7
-                        + random.choice(cons_notes) * 0.2
+                        + random.choice(plan.consonant_choices) * 0.2
                         + contour_target * 0.1
                     )
 
-            if chord_mode:
-                beat_pos = (self.phrase_len - 1) % 8
-                chord_root = {0: 0, 3: 5, 5: 7}.get(beat_pos // 3 % 3, 0)
-                chord_tones = [(chord_root + i) % 12 for i in [0, 4, 7]]
-                chord_tones = [n for n in chord_tones if n in scale]
+            if plan.chord_mode:
+                chord_tones = plan.chord_tones[(self.phrase_len - 1) % 8]
                 if chord_tones:
                     target_note = min(chord_tones, key=lambda x: abs(x - target_note))
 
+        if self.guide_note is not None:
+            target_note += (self.guide_note - target_note) * self.guide_weight
+            self.guide_note = None
+
         # ACCENT BLEND
-        if accent != "None":
+        if plan.accent_enabled:
             accent_factor = 1.5
             if self.is_high_pitch:
                 accent_note = target_note + accent_factor
@@ -217,7 +230,7 @@ class MelodyBrain:
         self.word_pos += 1
         if self.word_pos >= self.pitch_drop_pos:
             self.is_high_pitch = False
-        if phoneme in "。！？。," or self.word_pos >= len(self.word_morae):
+        if table.word_break[phoneme_id] or self.word_pos >= len(self.word_morae):
             self.word_pos = 0
             self.is_high_pitch = False
 
@@ -226,18 +239,18 @@ class MelodyBrain:
             self.recent_notes.pop(0)
             self.motif_memory.add_motif(self.recent_notes)
 
-        max_leap = settings["leap"]
+        max_leap = plan.leap
         motion = max(-max_leap, min(max_leap, target_note - self.last_note))
         new_note = self.last_note + motion
         closest_scale_note = min(scale, key=lambda x: abs(x - new_note))
         self.last_note = closest_scale_note
 
-        if quarter_tone and random.random() < 0.3 and is_vowel:
+        if plan.quartertone_mode and random.random() < 0.3 and is_vowel:
             self.last_note += random.choice([0, 0.5, -0.5])
-        if flat_mode:
+        if plan.flat_mode:
             self.last_note = 5
         self.prev_high_pitch = self.is_high_pitch
-        return root_midi + self.last_note
+        return self.last_note
 
     def get_intensity(self, note_height, phrase_progress):
         base = 80 + int(abs(note_height - 5) * 8)
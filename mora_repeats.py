@@ -0,0 +1,177 @@
+# mora_repeats.py
+"""Repeated and rhyming spans in the interned mora stream (linear time)
+
+A suffix automaton is grown over the mora IDs one mora at a time. Before
+mora i is added, walking the automaton gives the longest span ending at i
+that already occurred earlier, plus where its first occurrence ended
+(matching statistics). Spans of MIN_REPEAT+ morae become "echo" links
+i → earlier mora; line-end rhymes use the same walk over reversed per-line
+rhyme classes. Everything is O(total morae).
+"""
+
+from phoneme_table import PHONEME_TABLE, PAUSE, LINE_BREAK
+
+MIN_REPEAT = 3  # morae; shorter matches are everywhere in Japanese
+MIN_RHYME = 2  # matching final vowels
+MAX_RHYME = 3  # cadence notes copied at most
+
+ECHO_WEIGHT = 0.75  # pull of the earlier pitch on repeated text
+CADENCE_WEIGHT = 1.0  # rhyming line ends land on the earlier cadence
+
+LINE_START = -10  # sentinel anchoring rhyme matches to line ends
+
+
+class SuffixAutomaton:
+    """Online suffix automaton over an int sequence (≤ 2n states)"""
+
+    def __init__(self):
+        self.next = [{}]
+        self.link = [-1]
+        self.length = [0]
+        self.firstpos = [-1]  # end index of the first occurrence
+        self.last = 0
+
+    def extend(self, token, pos):
+        cur = len(self.length)
+        self.next.append({})
+        self.length.append(self.length[self.last] + 1)
+        self.link.append(0)
+        self.firstpos.append(pos)
+
+        p = self.last
+        while p != -1 and token not in self.next[p]:
+            self.next[p][token] = cur
+            p = self.link[p]
+        if p != -1:
+            q = self.next[p][token]
+            if self.length[p] + 1 == self.length[q]:
+                self.link[cur] = q
+            else:
+                clone = len(self.length)
+                self.next.append(dict(self.next[q]))
+                self.length.append(self.length[p] + 1)
+                self.link.append(self.link[q])
+                self.firstpos.append(self.firstpos[q])
+                while p != -1 and self.next[p].get(token) == q:
+                    self.next[p][token] = clone
+                    p = self.link[p]
+                self.link[q] = clone
+                self.link[cur] = clone
+        self.last = cur
+
+    def step(self, state, matched, token):
+        """Extend a match (state, length) by one token → new (state, length)"""
+        while state and matched <= self.length[self.link[state]]:
+            state = self.link[state]  # a clone may have split our state
+        while state and token not in self.next[state]:
+            state = self.link[state]
+            matched = self.length[state]
+        if token in self.next[state]:
+            return self.next[state][token], matched + 1
+        return 0, 0
+
+
+def earlier_matches(tokens):
+    """→ per position (longest earlier-seen span ending here, its first end)"""
+    sam = SuffixAutomaton()
+    state = matched = 0
+    out = []
+    for pos, token in enumerate(tokens):
+        state, matched = sam.step(state, matched, token)
+        out.append((matched, sam.firstpos[state] if matched else -1))
+        sam.extend(token, pos)
+    return out
+
+
+def repeat_links(tokens, min_len=MIN_REPEAT):
+    """{position: earlier position} for every mora inside a repeated span"""
+    matches = earlier_matches(tokens)
+    links = {}
+    covered_from = len(tokens)  # span starts never move left going right → O(n)
+    for end in range(len(tokens) - 1, -1, -1):
+        length, src_end = matches[end]
+        if length < min_len:
+            continue
+        if end + 1 < len(tokens) and matches[end + 1][0] == length + 1:
+            continue  # not the end of a maximal span
+        for k in range(length):
+            pos = end - k
+            if pos >= covered_from:
+                continue
+            links[pos] = src_end - k
+        covered_from = min(covered_from, end - length + 1)
+    return links
+
+
+def rhyme_links(lines, rhyme_of, min_len=MIN_RHYME, max_len=MAX_RHYME):
+    """Lines of mora positions → {position: earlier position} for the final
+    morae of each line whose ending rhymes with an earlier line's ending."""
+    tokens, origin = [], []
+    for line in lines:
+        tokens.append(LINE_START)
+        origin.append(None)
+        for pos in reversed(line):
+            tokens.append(rhyme_of[pos])
+            origin.append(pos)
+
+    matches = earlier_matches(tokens)
+    links = {}
+    i = 0
+    while i < len(tokens):
+        # tokens[i] is LINE_START; count how far the anchored match continues
+        run = 0
+        while (
+            i + run + 1 < len(tokens)
+            and tokens[i + run + 1] != LINE_START
+            and matches[i + run + 1][0] >= run + 2
+        ):
+            run += 1
+        if run >= min_len:
+            src_end = matches[i + run][1]
+            for k in range(min(run, max_len)):
+                # k-th mora from the line end ↔ k-th from the earlier line end
+                src = origin[src_end - run + 1 + k]
+                links[origin[i + 1 + k]] = src
+        i += 1
+        while i < len(tokens) and tokens[i] != LINE_START:
+            i += 1
+    return links
+
+
+class MoraAnalysis:
+    """Echo + cadence links for one song's interned element list"""
+
+    def __init__(self, element_ids, table=PHONEME_TABLE):
+        self.mora_of = {}  # element index → mora position
+        ids, rhyme, lines = [], [], [[]]
+        prev_rhyme = 0
+        for idx, pid in enumerate(element_ids):
+            if pid == LINE_BREAK:
+                if lines[-1]:
+                    lines.append([])
+                continue
+            if pid == PAUSE or pid == table.small_tsu_id:
+                continue
+            pos = len(ids)
+            self.mora_of[idx] = pos
+            ids.append(pid)
+            klass = table.rhyme[pid]
+            prev_rhyme = prev_rhyme if klass < 0 else klass
+            rhyme.append(prev_rhyme)
+            lines[-1].append(pos)
+        if not lines[-1]:
+            lines.pop()
+
+        self.echoes = repeat_links(ids)
+        self.cadences = rhyme_links(lines, rhyme)
+
+    def source(self, element_idx):
+        """→ (earlier mora position to follow, pull weight) or None"""
+        pos = self.mora_of.get(element_idx)
+        if pos is None:
+            return None
+        src = self.cadences.get(pos)
+        if src is not None:
+            return src, CADENCE_WEIGHT
+        src = self.echoes.get(pos)
+        return None if src is None else (src, ECHO_WEIGHT)
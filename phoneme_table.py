@@ -0,0 +1,171 @@
+# phoneme_table.py
+"""Interned phoneme inventory: small integer IDs + per-ID property tables"""
+
+import numpy as np
+
+from constants import VOWEL_CHARS, CONSONANT_CHARS
+from tables import HIRAGANA_MAP, MORA_DATA
+
+# Phoneme classes (shared with rhythm.py)
+CLASS_VOWEL = 0
+CLASS_CONSONANT = 1
+CLASS_OTHER = 2
+CLASS_STRETCH = 3
+
+# Base duration factor per class
+CLASS_DURATION = {
+    CLASS_VOWEL: 1.0,
+    CLASS_CONSONANT: 0.5,
+    CLASS_OTHER: 0.7,
+    CLASS_STRETCH: 0.6,
+}
+
+STRETCH = "+"
+SMALL_TSU = "っ"
+PHRASE_BREAK_CHARS = "。！？"
+RHYME_VOWELS = "aiueon"
+WORD_BREAK_CHARS = "。！？。,"
+
+# Pseudo-IDs for PAUSE_* markers in interned element lists
+PAUSE = -1
+LINE_BREAK = -2  # PAUSE_LINE / PAUSE_SECTION
+
+
+def romaji_lyric(phoneme, hiragana_map=HIRAGANA_MAP):
+    """Romaji phoneme → hiragana lyric (the rules HiroUSTGenerator always used)"""
+    if phoneme.startswith("kk") or phoneme.startswith("gg"):
+        return hiragana_map.get(phoneme, phoneme)
+    if phoneme in ["ji", "zu"]:
+        return hiragana_map.get("ji_s", phoneme)
+    if phoneme == "ji_t":
+        return hiragana_map.get("ji_t", phoneme)
+    return hiragana_map.get(phoneme, phoneme)
+
+
+def lyric_class(lyric):
+    """Classify a hiragana lyric by its first character"""
+    if lyric == STRETCH:
+        return CLASS_STRETCH
+    first = lyric[0] if lyric else "あ"
+    if first in VOWEL_CHARS:
+        return CLASS_VOWEL
+    if first in CONSONANT_CHARS:
+        return CLASS_CONSONANT
+    return CLASS_OTHER
+
+
+class PhonemeTable:
+    """Romaji phoneme ↔ ID, with one list per property indexed by ID.
+
+    Lists serve the per-note Python loops; `arrays()` gives NumPy views for
+    the vectorized stages. Unknown phonemes (English mode) are interned on
+    first sight.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.romaji = []
+        self.lyric = []
+        self.alias = []  # default oto alias (CV banks: the kana itself)
+        self.klass = []
+        self.stress = []
+        self.duration = []
+        self.single_vowel = []
+        self.long_vowel = []
+        self.head = []  # long vowel → ID of its single vowel, else itself
+        self.phrase_break = []
+        self.word_break = []
+        self.rhyme = []  # rhyme class: final vowel / ん, -1 for STRETCH
+        self._by_lyric = {}
+        self._arrays = None
+
+        for phoneme in (STRETCH, SMALL_TSU):
+            self.intern(phoneme)
+        for phones in MORA_DATA.values():
+            for phoneme in phones:
+                self.intern(phoneme)
+        for phoneme in HIRAGANA_MAP:
+            self.intern(phoneme)
+
+        self.stretch_id = self.ids[STRETCH]
+        self.small_tsu_id = self.ids[SMALL_TSU]
+
+    def __len__(self):
+        return len(self.romaji)
+
+    def intern(self, phoneme):
+        """Return the ID of a romaji phoneme, adding it if unseen"""
+        pid = self.ids.get(phoneme)
+        if pid is not None:
+            return pid
+
+        pid = len(self.romaji)
+        lyric = STRETCH if phoneme == STRETCH else romaji_lyric(phoneme)
+        klass = lyric_class(lyric)
+        is_long = len(lyric) >= 2 and lyric[0] == lyric[1] and lyric[0] in VOWEL_CHARS
+
+        self.ids[phoneme] = pid
+        self.romaji.append(phoneme)
+        self.lyric.append(lyric)
+        self.alias.append(lyric)
+        self.klass.append(klass)
+        self.stress.append(1 if lyric in VOWEL_CHARS else 0)
+        self.duration.append(CLASS_DURATION[klass])
+        self.single_vowel.append(len(lyric) == 1 and lyric in VOWEL_CHARS)
+        self.long_vowel.append(is_long)
+        self.head.append(pid)
+        self.phrase_break.append(lyric in PHRASE_BREAK_CHARS)
+        self.word_break.append(lyric in WORD_BREAK_CHARS)
+        if phoneme == STRETCH:
+            self.rhyme.append(-1)
+        elif phoneme and phoneme[-1] in RHYME_VOWELS:
+            self.rhyme.append(RHYME_VOWELS.index(phoneme[-1]))
+        else:
+            self.rhyme.append(len(RHYME_VOWELS) + pid)  # rhymes only with itself
+        self._by_lyric.setdefault(lyric, pid)
+        self._arrays = None
+
+        if is_long:
+            self.head[pid] = self._lyric_id(lyric[0])
+        return pid
+
+    def _lyric_id(self, lyric):
+        pid = self._by_lyric.get(lyric)
+        if pid is None:
+            pid = self.intern(lyric)  # kana passes through romaji_lyric as-is
+        return pid
+
+    def intern_elements(self, elements):
+        """Parsed element list → list of IDs (PAUSE / LINE_BREAK for markers)"""
+        ids = self.ids
+        out = []
+        for element in elements:
+            pid = ids.get(element)
+            if pid is None:
+                if element.startswith(("PAUSE_LINE:", "PAUSE_SECTION:")):
+                    pid = LINE_BREAK
+                elif element.startswith("PAUSE_"):
+                    pid = PAUSE
+                else:
+                    pid = self.intern(element)
+            out.append(pid)
+        return out
+
+    def lyric_of(self, phoneme):
+        return self.lyric[self.intern(phoneme)]
+
+    def arrays(self):
+        """NumPy copies of the numeric tables, rebuilt only after growth"""
+        if self._arrays is None:
+            self._arrays = {
+                "klass": np.array(self.klass, dtype=np.int8),
+                "stress": np.array(self.stress, dtype=np.int8),
+                "duration": np.array(self.duration, dtype=float),
+                "single_vowel": np.array(self.single_vowel, dtype=bool),
+                "long_vowel": np.array(self.long_vowel, dtype=bool),
+                "head": np.array(self.head, dtype=np.int32),
+            }
+        return self._arrays
+
+
+PHONEME_TABLE = PhonemeTable()
@@ -1,126 +1,9 @@
 # phonemizer.py
 import re
 
-# Hepburn/Wapuro → Hiragana conversion table
-ROMAJI_MAP = {
-    # Vowels
-    "a": "あ",
-    "i": "い",
-    "u": "う",
-    "e": "え",
-    "o": "お",
-    "ā": "あー",
-    "ī": "いー",
-    "ū": "うー",
-    "ē": "えー",
-    "ō": "おー",
-    # K + Vowels
-    "ka": "か",
-    "ki": "き",
-    "ku": "く",
-    "ke": "け",
-    "ko": "こ",
-    "ga": "が",
-    "gi": "ぎ",
-    "gu": "ぐ",
-    "ge": "げ",
-    "go": "ご",
-    "kya": "きゃ",
-    "kyu": "きゅ",
-    "kyo": "きょ",
-    "gya": "ぎゃ",
-    "gyu": "ぎゅ",
-    "gyo": "ぎょ",
-    # S + Vowels
-    "sa": "さ",
-    "shi": "し",
-    "su": "す",
-    "se": "せ",
-    "so": "そ",
-    "za": "ざ",
-    "ji": "じ",
-    "zu": "ず",
-    "ze": "ぜ",
-    "zo": "ぞ",
-    "sha": "しゃ",
-    "shu": "しゅ",
-    "sho": "しょ",
-    "ja": "じゃ",
-    "ju": "じゅ",
-    "jo": "じょ",
-    # T + Vowels
-    "ta": "た",
-    "chi": "ち",
-    "tsu": "つ",
-    "te": "て",
-    "to": "と",
-    "da": "だ",
-    "ji": "ぢ",
-    "zu": "づ",
-    "de": "で",
-    "do": "ど",
-    "cha": "ちゃ",
-    "chu": "ちゅ",
-    "cho": "ちょ",
-    # N + Vowels
-    "na": "な",
-    "ni": "に",
-    "nu": "ぬ",
-    "ne": "ね",
-    "no": "の",
-    "nya": "にゃ",
-    "nyu": "にゅ",
-    "nyo": "にょ",
-    # H + Vowels
-    "ha": "は",
-    "hi": "ひ",
-    "fu": "ふ",
-    "he": "へ",
-    "ho": "ほ",
-    "ba": "ば",
-    "bi": "び",
-    "bu": "ぶ",
-    "be": "べ",
-    "bo": "ぼ",
-    "pa": "ぱ",
-    "pi": "ぴ",
-    "pu": "ぷ",
-    "pe": "ぺ",
-    "po": "ぽ",
-    "hya": "ひゃ",
-    "hyu": "ひゅ",
-    "hyo": "ひょ",
-    # M + Vowels
-    "ma": "ま",
-    "mi": "み",
-    "mu": "む",
-    "me": "め",
-    "mo": "も",
-    "mya": "みゃ",
-    "myu": "みゅ",
-    "myo": "みょ",
-    # Y + Vowels
-    "ya": "や",
-    "yu": "ゆ",
-    "yo": "よ",
-    # R + Vowels
-    "ra": "ら",
-    "ri": "り",
-    "ru": "る",
-    "re": "れ",
-    "ro": "ろ",
-    "rya": "りゃ",
-    "ryu": "りゅ",
-    "ryo": "りょ",
-    # W + Vowels
-    "wa": "わ",
-    "wo": "を",
-    "n": "ん",
-    # Small tsu / gemination
-    "っ": "っ",
-    "xtsu": "っ",
-    "-": "ー",
-}
+from tables import ROMAJI_MAP
+
+_DROPPED = re.compile(r"[^\w\s]")  # punctuation, ignored by the scan
 
 # Simple English → Hiragana
 ENGLISH_VOWEL_MAP = {"a": "あ", "e": "え", "i": "い", "o": "お", "u": "う"}
@@ -153,13 +36,27 @@ class Phonemizer:
         if mode in valid_modes:
             self.mode = mode
 
-    def text_to_phonemes(self, text):
-        text = re.sub(r"[^\w\s]", "", text.lower()).strip()
-        if not text:
+    def text_to_phonemes(self, text, marks=None):
+        """Word → phonemes. `marks`: optional list that gets the scan's
+        (kind, start, end) spans (see ust_engine.MARK_*), as offsets into
+        the `text` passed in, punctuation included."""
+        lowered = text.lower()
+        kept = _DROPPED.sub("", lowered)
+        stripped = kept.strip()
+        if not stripped:
             return []
+        found = [] if marks is not None else None
+        phonemes = self._scan(stripped, found)
+        if found and len(lowered) == len(text):  # else lower() moved the columns
+            # map offsets in `stripped` back through the dropped characters
+            lead = len(kept) - len(kept.lstrip())
+            origin = [i for i, c in enumerate(lowered) if not _DROPPED.match(c)]
+            for kind, start, end in found:
+                marks.append((kind, origin[lead + start], origin[lead + end - 1] + 1))
+        return phonemes
 
+    def _scan(self, text, marks):
         # if input is already Japanese characters
-        first_char = text[0] if text else ""
         is_japanese_chars = any(
             "\u3040" <= c <= "\u309f" or "\u30a0" <= c <= "\u30ff" for c in text
         )
@@ -168,20 +65,29 @@ class Phonemizer:
             return self._english_to_phonemes(text)
         elif self.mode == "japanese" and is_japanese_chars:
             # DIRECT HIRAGANA/KATAKANA → phonemes
-            from hiro_ust_dev import HiroUSTGenerator
+            from ust_engine import HiroUSTGenerator
 
             generator = HiroUSTGenerator()
-            return generator.hiragana_to_romaji(text)
+            return generator.hiragana_to_romaji(text, marks)
         else:
             # Romaji modes (hepburn, wapuro, or japanese+romaji)
-            return self._romaji_to_phonemes(text)
+            return self._romaji_to_phonemes(text, marks)
 
-    def _romaji_to_phonemes(self, text):
-        # Split by spaces OR process word-by-word
-        words = text.split()
-        hiragana_mora = []
+    def _romaji_to_phonemes(self, text, marks=None):
+        from ust_engine import (
+            HiroUSTGenerator,
+            MARK_LONG_VOWEL,
+            MARK_UNMATCHED,
+            extends_vowel,
+        )
 
-        for word in words:
+        generator = HiroUSTGenerator()
+        phonemes = []
+        mora_marks = [] if marks is not None else None
+
+        # Split by spaces OR process word-by-word
+        for match in re.finditer(r"\S+", text):
+            word = match.group()
             i = 0
             while i < len(word):
                 matched = False
@@ -189,21 +95,31 @@ class Phonemizer:
                     if i + length <= len(word):
                         candidate = word[i : i + length]
                         if candidate in ROMAJI_MAP:
-                            hiragana_mora.append(ROMAJI_MAP[candidate])
+                            # Convert to phonemes
+                            phones = generator.hiragana_to_romaji(
+                                ROMAJI_MAP[candidate], mora_marks
+                            )
+                            if marks is not None:
+                                span = (match.start() + i, match.start() + i + length)
+                                dropped = any(
+                                    m[0] == MARK_UNMATCHED for m in mora_marks
+                                )
+                                mora_marks.clear()
+                                if dropped:
+                                    marks.append((MARK_UNMATCHED, *span))
+                                elif phonemes and extends_vowel(phonemes[-1], phones):
+                                    marks.append((MARK_LONG_VOWEL, *span))
+                            phonemes.extend(phones)
                             i += length
                             matched = True
                             break
 
                 if not matched:
+                    if marks is not None:
+                        at = match.start() + i
+                        marks.append((MARK_UNMATCHED, at, at + 1))
                     i += 1
 
-        # Convert to phonemes
-        from hiro_ust_dev import HiroUSTGenerator
-
-        generator = HiroUSTGenerator()
-        phonemes = []
-        for mora in hiragana_mora:
-            phonemes.extend(generator.hiragana_to_romaji(mora))
         return phonemes
 
     def _english_to_phonemes(self, text):
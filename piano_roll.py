@@ -0,0 +1,382 @@
+# piano_roll.py
+"""Piano-roll view of a generated score on a Tk Canvas
+
+Only notes inside the visible viewport have canvas items. Items are pooled:
+on scroll, notes that leave the view hand their items to notes that enter it
+and notes that stay are not touched; on zoom every visible item is moved
+with coords(). Lookups are bisections over note start ticks, so redraw cost
+depends on what is on screen, not on the song length.
+
+RollModel is Tk-free (geometry + bend curves); PianoRoll is the widget.
+"""
+
+import re
+import tkinter as tk
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from tkinter import ttk
+
+from score import ScoreNote, NOTE, REST, SMALL_TSU
+
+TICKS_PER_BEAT = 480
+PITCH_TOP = 96  # highest MIDI row shown
+PITCH_BOTTOM = 36
+KEY_HEIGHT = 10  # px per semitone
+DEFAULT_ZOOM = 0.12  # px per tick
+MIN_ZOOM = 0.005
+MAX_ZOOM = 2.0
+LYRIC_MIN_WIDTH = 14  # px; narrower notes hide their lyric
+MARGIN_PX = 200  # drawn beyond the viewport edge so small scrolls are free
+
+NOTE_FILL = "#7aa6ff"
+TSU_FILL = "#c7c7c7"
+BEND_COLOR = "#d0402b"
+SECTION_COLOR = "#2e8b57"
+GRID_COLOR = "#e6e6e6"
+OCTAVE_COLOR = "#b8b8b8"
+
+
+class RollModel:
+    """Score → note geometry in ticks / semitones, queried by time window"""
+
+    def __init__(self, score, tempo=120.0, sections=()):
+        ticks = [0] + list(accumulate(note.length for note in score))
+        self.total_ticks = ticks[-1] if score else 0
+        self.ms_per_tick = 60000.0 / (float(tempo) * TICKS_PER_BEAT)
+        # Sung notes and small tsu only; rests are gaps
+        self.notes = [n for n in score if n.kind != REST]
+        self.starts = [t for t, n in zip(ticks, score) if n.kind != REST]
+        self.ends = [t + n.length for t, n in zip(self.starts, self.notes)]
+        self.sections = sorted(sections)  # [(tick, name)]
+        self.section_ticks = [tick for tick, _ in self.sections]
+        pitches = [n.note_num for n in self.notes] or [60]
+        self.lowest, self.highest = min(pitches), max(pitches)
+        self._bends = {}
+
+    def __len__(self):
+        return len(self.notes)
+
+    def visible(self, first_tick, last_tick):
+        """Note indices overlapping [first_tick, last_tick) as a range.
+
+        Notes never overlap, so both starts and ends are sorted.
+        """
+        return range(
+            bisect_right(self.ends, first_tick), bisect_left(self.starts, last_tick)
+        )
+
+    def visible_sections(self, first_tick, last_tick):
+        return range(
+            bisect_left(self.section_ticks, first_tick),
+            bisect_left(self.section_ticks, last_tick),
+        )
+
+    def bend(self, idx):
+        """[(tick, pitch in semitones)] of note `idx`'s pitch bend, or [] when flat"""
+        points = self._bends.get(idx)
+        if points is None:
+            start = self.starts[idx]
+            points = self._bends[idx] = [
+                (start + ms / self.ms_per_tick, pitch)
+                for ms, pitch in self.notes[idx].pitch_points()
+            ]
+        return points
+
+
+_UST_BLOCK = re.compile(r"^\[#(\d+|SETTING)\]$", re.M)
+
+
+def score_from_ust(text):
+    """UST text → (tempo, [ScoreNote]); enough for display (cache hits)"""
+    tempo = 120.0
+    score = []
+    blocks = _UST_BLOCK.split(text)
+    for name, body in zip(blocks[1::2], blocks[2::2]):
+        fields = dict(
+            line.split("=", 1) for line in body.splitlines() if "=" in line
+        )
+        if name == "SETTING":
+            tempo = float(fields.get("Tempo", tempo))
+            continue
+        lyric = fields.get("Lyric", "R")
+        kind = REST if lyric == "R" else SMALL_TSU if lyric == "っ" else NOTE
+        score.append(
+            ScoreNote(
+                kind,
+                int(fields.get("Length", 0)),
+                lyric=lyric,
+                note_num=int(fields.get("NoteNum", 60)),
+                intensity=int(fields.get("Intensity", 0)),
+                pbs=fields.get("PBS", "0;0"),
+                pbw=fields.get("PBW", "0"),
+                pby=fields.get("PBY", "0"),
+                pbm=fields.get("PBM", ","),
+            )
+        )
+    return tempo, score
+
+
+def section_ticks(score, section_marks, element_offsets):
+    """(name, element index) marks + per-element score offsets → [(tick, name)]"""
+    starts = [0] + list(accumulate(note.length for note in score))
+    out = []
+    for name, element_idx in section_marks:
+        note_idx = (
+            element_offsets[element_idx]
+            if element_idx < len(element_offsets)
+            else len(score)
+        )
+        out.append((starts[min(note_idx, len(score))], name))
+    return out
+
+
+class _ItemPool:
+    """Canvas items recycled between keys (note / section indices)"""
+
+    def __init__(self, canvas, make):
+        self.canvas = canvas
+        self.make = make  # () → tuple of item ids
+        self.live = {}  # key → items
+        self.free = []
+
+    def sync(self, keys, place):
+        """Show exactly `keys`; place(items, key) only for newly shown keys"""
+        keys = set(keys)
+        for key in [k for k in self.live if k not in keys]:
+            items = self.live.pop(key)
+            for item in items:
+                self.canvas.itemconfigure(item, state="hidden")
+            self.free.append(items)
+        for key in keys:
+            if key not in self.live:
+                items = self.free.pop() if self.free else self.make()
+                self.live[key] = items
+                place(items, key)
+
+    def refresh(self, place):
+        for key, items in self.live.items():
+            place(items, key)
+
+    def clear(self):
+        self.sync((), None)
+
+
+class PianoRoll(ttk.Frame):
+    """Scrollable, zoomable piano roll. Wheel: scroll, Shift+wheel: time,
+    Ctrl+wheel: zoom around the pointer."""
+
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+        self.canvas = tk.Canvas(self, background="white", highlightthickness=0)
+        self.hbar = ttk.Scrollbar(self, orient="horizontal", command=self.canvas.xview)
+        self.vbar = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(
+            xscrollcommand=self._on_xscroll, yscrollcommand=self._on_yscroll
+        )
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.vbar.grid(row=0, column=1, sticky="ns")
+        self.hbar.grid(row=1, column=0, sticky="ew")
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.model = RollModel([])
+        self.zoom = DEFAULT_ZOOM
+        self._redraw_pending = False
+        self._full_redraw = False
+        self._shown_lyrics = {}  # item → text, so unchanged labels are skipped
+        self._grid = []
+        self._notes = _ItemPool(self.canvas, self._make_note)
+        self._sections = _ItemPool(self.canvas, self._make_section)
+
+        self.canvas.bind("<Configure>", lambda _e: self._schedule_redraw())
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Shift-MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Control-MouseWheel>", self._on_wheel)
+        for button in ("<Button-4>", "<Button-5>"):
+            self.canvas.bind(button, self._on_wheel)
+            self.canvas.bind(f"<Shift-{button[1:]}", self._on_wheel)
+            self.canvas.bind(f"<Control-{button[1:]}", self._on_wheel)
+        self._draw_grid()
+
+    # ---- data ----
+
+    def set_score(self, score, tempo=120.0, sections=()):
+        """Show a new score; keeps the scroll position and zoom"""
+        self.model = RollModel(score, tempo, sections)
+        self._notes.clear()
+        self._sections.clear()
+        self._update_scrollregion()
+        self._schedule_redraw()
+
+    # ---- coordinates ----
+
+    def _x(self, tick):
+        return tick * self.zoom
+
+    @staticmethod
+    def _y(pitch):
+        return (PITCH_TOP - pitch) * KEY_HEIGHT
+
+    def _update_scrollregion(self):
+        width = max(self._x(self.model.total_ticks), 1)
+        self.canvas.configure(
+            scrollregion=(0, 0, width, (PITCH_TOP - PITCH_BOTTOM + 1) * KEY_HEIGHT)
+        )
+        for row, item in enumerate(self._grid):
+            y = self._y(PITCH_TOP - row)
+            self.canvas.coords(item, 0, y, width, y)
+
+    def _draw_grid(self):
+        for pitch in range(PITCH_TOP, PITCH_BOTTOM - 1, -1):
+            self._grid.append(
+                self.canvas.create_line(
+                    0,
+                    0,
+                    1,
+                    0,
+                    fill=OCTAVE_COLOR if pitch % 12 == 0 else GRID_COLOR,
+                    tags=("grid",),
+                )
+            )
+        self._update_scrollregion()
+
+    # ---- pooled items ----
+
+    def _make_note(self):
+        c = self.canvas
+        return (
+            c.create_rectangle(0, 0, 0, 0, outline="#3b5ba9"),
+            c.create_line(0, 0, 0, 0, fill=BEND_COLOR, width=2),
+            c.create_text(0, 0, anchor="w", font=("TkDefaultFont", 8)),
+        )
+
+    def _place_note(self, items, idx):
+        c = self.canvas
+        model = self.model
+        note = model.notes[idx]
+        rect, bend, label = items
+        x0 = self._x(model.starts[idx])
+        x1 = self._x(model.ends[idx])
+        y = self._y(note.note_num)
+        c.coords(rect, x0, y - KEY_HEIGHT / 2, x1, y + KEY_HEIGHT / 2)
+        c.itemconfigure(
+            rect, state="normal", fill=NOTE_FILL if note.kind == NOTE else TSU_FILL
+        )
+
+        points = model.bend(idx)
+        if len(points) > 1:
+            flat = []
+            for tick, pitch in points:
+                flat += (self._x(tick), self._y(pitch))
+            c.coords(bend, *flat)
+            c.itemconfigure(bend, state="normal")
+        else:
+            c.itemconfigure(bend, state="hidden")
+
+        if x1 - x0 >= LYRIC_MIN_WIDTH:
+            c.coords(label, x0 + 2, y)
+            if self._shown_lyrics.get(label) != note.lyric:
+                self._shown_lyrics[label] = note.lyric
+                c.itemconfigure(label, text=note.lyric)
+            c.itemconfigure(label, state="normal")
+        else:
+            c.itemconfigure(label, state="hidden")
+
+    def _make_section(self):
+        c = self.canvas
+        return (
+            c.create_line(
+                0, 0, 0, 0, fill=SECTION_COLOR, dash=(4, 2), tags=("section",)
+            ),
+            c.create_text(
+                0,
+                0,
+                anchor="nw",
+                fill=SECTION_COLOR,
+                font=("TkDefaultFont", 9, "bold"),
+                tags=("section",),
+            ),
+        )
+
+    def _place_section(self, items, idx):
+        tick, name = self.model.sections[idx]
+        line, label = items
+        x = self._x(tick)
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        self.canvas.coords(line, x, top, x, bottom)
+        self.canvas.coords(label, x + 3, top + 2)
+        self.canvas.itemconfigure(line, state="normal")
+        self.canvas.itemconfigure(label, text=name, state="normal")
+
+    # ---- redraw ----
+
+    def _schedule_redraw(self, full=False):
+        self._full_redraw = self._full_redraw or full
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.after_idle(self._redraw)
+
+    def _redraw(self):
+        self._redraw_pending = False
+        full, self._full_redraw = self._full_redraw, False
+        c = self.canvas
+        left = c.canvasx(0) - MARGIN_PX
+        right = c.canvasx(c.winfo_width()) + MARGIN_PX
+        top = c.canvasy(0) - MARGIN_PX
+        bottom = c.canvasy(c.winfo_height()) + MARGIN_PX
+        first_tick, last_tick = left / self.zoom, right / self.zoom
+        high = PITCH_TOP - top / KEY_HEIGHT
+        low = PITCH_TOP - bottom / KEY_HEIGHT
+
+        notes = self.model.notes
+        visible = [
+            i
+            for i in self.model.visible(first_tick, last_tick)
+            if low <= notes[i].note_num <= high
+        ]
+        if full:
+            self._notes.refresh(self._place_note)
+        self._notes.sync(visible, self._place_note)
+
+        # Few markers: re-place all visible ones so they span the viewport
+        self._sections.sync(
+            self.model.visible_sections(first_tick, last_tick), self._place_section
+        )
+        self._sections.refresh(self._place_section)
+        c.tag_raise("section")
+
+    # ---- scrolling / zoom ----
+
+    def _on_xscroll(self, first, last):
+        self.hbar.set(first, last)
+        self._schedule_redraw()
+
+    def _on_yscroll(self, first, last):
+        self.vbar.set(first, last)
+        self._schedule_redraw()
+
+    def _on_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            step = -1
+        else:
+            step = 1
+        if event.state & 0x0004:  # Control
+            self.zoom_at(event.x, 1.25 if step < 0 else 0.8)
+        elif event.state & 0x0001:  # Shift
+            self.canvas.xview_scroll(step * 3, "units")
+        else:
+            self.canvas.yview_scroll(step * 3, "units")
+        return "break"
+
+    def zoom_at(self, pointer_x, factor):
+        """Zoom time around a pointer x (px in the widget)"""
+        zoom = min(MAX_ZOOM, max(MIN_ZOOM, self.zoom * factor))
+        if zoom == self.zoom:
+            return
+        tick = self.canvas.canvasx(pointer_x) / self.zoom
+        self.zoom = zoom
+        self._update_scrollregion()
+        width = max(self._x(self.model.total_ticks), 1)
+        self.canvas.xview_moveto(max(0.0, (self._x(tick) - pointer_x) / width))
+        self._schedule_redraw(full=True)
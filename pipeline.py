@@ -0,0 +1,329 @@
+# pipeline.py
+"""Staged generation with per-stage memoization (for interactive tweaking)
+
+    normalize → phonemize → structure → melody → expression → serialize
+
+Each stage remembers its last input key and result. A key holds the upstream
+stage's run token plus only the plan fields that stage reads, so changing a
+setting re-runs the first stage that depends on it and everything after:
+
+    lyrics / phoneme mode          → from phonemize
+    line / section pause           → from structure
+    pitch, rhythm, seed, modes ... → from melody
+    tempo, intensity, vibrato      → from expression (bend / vibrato timing
+                                     is in ms, so tempo is not header-only)
+    project, envelope, flags, ...  → serialize only
+
+Below the stage level, lines are phonemized once per distinct line text (for
+the current phoneme mode), and with line_streams each lyric line's melody and
+expression are cached too: editing one line re-phonemizes, composes and
+expresses only that line; the element stream and UST text are re-joined.
+"""
+
+import threading
+from collections import namedtuple
+from dataclasses import fields
+
+from generation_plan import GenerationPlan
+from melody_logic import MelodyBrain
+from phonemizer import Phonemizer
+from result_cache import normalize_lines
+from ust_engine import (
+    LINE_SECTION,
+    LINE_WORDS,
+    phonemize_line,
+    phonemize_lines,
+    line_warnings,
+    assemble_elements,
+    compose_line_melodies,
+    compose_melody,
+    compose_section_melodies,
+    express_melody,
+    write_ust,
+)
+
+STAGES = ("normalize", "phonemize", "structure", "melody", "expression", "serialize")
+
+STRUCTURE_FIELDS = ("line_pause", "section_pause")
+EXPRESSION_FIELDS = (
+    "tempo",
+    "intensity_base",
+    "intensity_min",
+    "intensity_max",
+    "vibrato",
+    "root_key",  # small tsu pitch
+    "seed",  # curve RNG
+)
+SERIALIZE_FIELDS = (
+    "project_name",
+    "tempo",
+    "pre_utterance",
+    "voice_overlap",
+    "envelope",
+    "flags",
+)
+# Everything else shapes the melody
+_NOT_MELODY = {"phoneme_mode", *STRUCTURE_FIELDS, *EXPRESSION_FIELDS, *SERIALIZE_FIELDS}
+MELODY_FIELDS = tuple(
+    f.name
+    for f in fields(GenerationPlan)
+    if f.name not in _NOT_MELODY or f.name in ("root_key", "seed")
+)
+
+PipelineRun = namedtuple(
+    "PipelineRun", "ust parts elements section_marks score element_offsets ran stats"
+)
+
+
+def _plan_key(plan, names):
+    return tuple(getattr(plan, name) for name in names)
+
+
+class Pipeline:
+    """Last-result memo per stage; one instance per editor / session"""
+
+    def __init__(self, jobs=1):
+        self.jobs = jobs
+        self._phonemizers = {}
+        # phonemizers + line cache: run() (worker thread) and line_marks()
+        # (editor thread) both read and fill them
+        self._lines_lock = threading.Lock()
+        self._memo = {stage: (None, None, 0) for stage in STAGES}  # key, result, token
+        self.stats = {stage: {"runs": 0, "hits": 0} for stage in STAGES}
+        self._lines = (None, {})  # phoneme mode, line text → (kind, payload)
+        self._line_melodies = (None, {})  # melody key, (line, n) → (seed, melody, offsets)
+        self._expressed = {}  # segment seed → (melody, expression key, score)
+        self.last_counts = {}
+
+    def _stage(self, stage, key, compute, ran, on_progress=None, stats=None):
+        """→ (result, token); compute() only when `key` changed"""
+        last_key, result, token = self._memo[stage]
+        if last_key == key and token:
+            self.stats[stage]["hits"] += 1
+            if stats is not None:
+                stats.hit(stage)
+            return result, token
+        if on_progress:
+            on_progress(stage, 0, 1)
+        if stats is None:
+            result = compute()
+        else:
+            with stats.stage(stage):
+                result = compute()
+        token += 1
+        self._memo[stage] = (key, result, token)
+        self.stats[stage]["runs"] += 1
+        ran.append(stage)
+        return result, token
+
+    def _phonemizer(self, mode):
+        phonemizer = self._phonemizers.get(mode)
+        if phonemizer is None:
+            phonemizer = Phonemizer()
+            phonemizer.set_mode(mode)
+            self._phonemizers[mode] = phonemizer
+        return phonemizer
+
+    def line_marks(self, line, mode):
+        """One editor line → [(tag, start col, end col)] to highlight: the
+        whole line as LINE_SECTION, or the MARK_* spans of its scan.
+
+        Goes through the phonemize stage's line cache, so a line scanned for
+        the editor is not phonemized again by the next run, and vice versa.
+        Safe to call while run() works on another thread (it may wait for
+        that run's phonemize stage).
+        """
+        text = " ".join(line.split())
+        lead = len(line) - len(line.lstrip())
+        with self._lines_lock:
+            if text == line.strip():
+                cached_mode, cache = self._lines
+                if cached_mode != mode:
+                    cache = {}
+                    self._lines = (mode, cache)
+                record = cache.get(text)
+                if record is None:
+                    record = cache[text] = phonemize_line(text, self._phonemizer(mode))
+            else:  # runs of spaces: the cached line's columns would not match
+                text = line.strip()
+                record = phonemize_line(text, self._phonemizer(mode))
+        kind, payload = record
+        if kind == LINE_SECTION:
+            return [(LINE_SECTION, lead, lead + len(text))]
+        if kind == LINE_WORDS:
+            return [(tag, lead + start, lead + end) for tag, start, end in payload[4]]
+        return []
+
+    def run(self, lyrics, plan, on_warning=None, on_progress=None, stats=None):
+        """Lyrics + GenerationPlan → PipelineRun (`ran`: stages that re-ran).
+
+        `lyrics`: the text, or its lines (e.g. an editor's LyricDocument
+        lines, so nothing joins them into one string first).
+
+        `on_progress(stage, done, total)` is called as each stage starts and
+        per phrase inside melody / expression; raising from it aborts the run
+        and leaves every stage memo as it was. `stats`: optional StageStats
+        that gets this run's per-stage times, hits and item counts (it is
+        also returned as run.stats).
+        """
+        ran = []
+        if isinstance(lyrics, str):
+            lines = lyrics.split("\n")
+        else:
+            # the memo key; unchanged lines compare by identity, not by content
+            lyrics = lines = tuple(lyrics)
+
+        text, t_norm = self._stage(
+            "normalize",
+            lyrics,
+            lambda: normalize_lines(lines),
+            ran,
+            on_progress,
+            stats,
+        )
+
+        counts = self.last_counts = {}
+
+        def phonemize():
+            with self._lines_lock:
+                mode, cache = self._lines
+                if mode != plan.phoneme_mode:
+                    cache = {}
+                known = len(cache)
+                records = phonemize_lines(
+                    text, self._phonemizer(plan.phoneme_mode), cache=cache
+                )
+                counts["lines_phonemized"] = len(cache) - known
+                # keep only the current lines
+                self._lines = (
+                    plan.phoneme_mode,
+                    {line: (kind, payload) for _, line, kind, payload in records},
+                )
+            return records
+
+        records, t_phon = self._stage(
+            "phonemize", (t_norm, plan.phoneme_mode), phonemize, ran, on_progress, stats
+        )
+        counts["lines"] = len(records)
+        if on_warning:
+            for line_num, line, kind, payload in records:
+                for msg in line_warnings(line_num, line, kind, payload):
+                    on_warning(msg)
+
+        def structure():
+            marks = []
+            parts, elements = assemble_elements(
+                records,
+                plan.line_pause,
+                plan.section_pause,
+                on_section=lambda name, idx: marks.append((name, idx)),
+            )
+            return parts, elements, marks
+
+        (parts, elements, marks), t_struct = self._stage(
+            "structure",
+            (t_phon, _plan_key(plan, STRUCTURE_FIELDS)),
+            structure,
+            ran,
+            on_progress,
+            stats,
+        )
+
+        melody_key = _plan_key(plan, MELODY_FIELDS)
+
+        def melody():
+            offsets = []
+            if plan.line_streams:
+                key, cache = self._line_melodies
+                if key != melody_key:
+                    cache = {}
+                previous = dict(cache)
+                segments = compose_line_melodies(
+                    elements, plan, offsets, cache, on_progress
+                )
+                self._line_melodies = (melody_key, cache)
+                counts["phrases_composed"] = sum(
+                    previous.get(key) is not entry for key, entry in cache.items()
+                )
+            elif plan.section_streams:
+                segments = compose_section_melodies(
+                    elements, plan, offsets, self.jobs, on_progress
+                )
+            else:
+                brain = MelodyBrain(seed=plan.seed)
+                items = compose_melody(elements, plan, brain, offsets, on_progress)
+                segments = [(brain.seed, items)]
+            return segments, offsets
+
+        (segments, offsets), t_mel = self._stage(
+            "melody", (t_struct, melody_key), melody, ran, on_progress, stats
+        )
+        counts["phrases"] = len(segments)
+
+        expression_key = _plan_key(plan, EXPRESSION_FIELDS)
+
+        def expression():
+            # Segments whose melody object is unchanged keep their notes
+            score = []
+            expressed = {}
+            counts["phrases_expressed"] = 0
+            for seed, items in segments:
+                cached = self._expressed.get(seed)
+                if cached and cached[0] is items and cached[1] == expression_key:
+                    notes = cached[2]
+                else:
+                    # one segment: per-phrase progress; many: per segment
+                    single = on_progress if len(segments) == 1 else None
+                    notes = express_melody(items, plan, seed, single)
+                    counts["phrases_expressed"] += 1
+                    if on_progress and single is None:
+                        on_progress("expression", len(expressed) + 1, len(segments))
+                expressed[seed] = (items, expression_key, notes)
+                score.extend(notes)
+            self._expressed = expressed
+            return score
+
+        score, t_expr = self._stage(
+            "expression", (t_mel, expression_key), expression, ran, on_progress, stats
+        )
+
+        ust, _ = self._stage(
+            "serialize",
+            (t_expr, _plan_key(plan, SERIALIZE_FIELDS)),
+            lambda: write_ust(score, plan),
+            ran,
+            on_progress,
+            stats,
+        )
+        if stats is not None:
+            stats.count("normalize", chars=sum(map(len, text)))
+            stats.count(
+                "phonemize",
+                lines=counts["lines"],
+                phonemized=counts.get("lines_phonemized", 0),
+            )
+            stats.count("structure", elements=len(elements), sections=len(marks))
+            composed = len(segments) if "melody" in ran else 0
+            stats.count(
+                "melody",
+                segments=len(segments),
+                composed=counts.get("phrases_composed", composed),
+            )
+            expressed = counts.get("phrases_expressed", 0) if "expression" in ran else 0
+            stats.count("expression", notes=len(score), expressed=expressed)
+            stats.count("serialize", chars=len(ust))
+        return PipelineRun(ust, parts, elements, marks, score, offsets, ran, stats)
+
+    def summary(self):
+        """Per-stage "stage hits/lookups" line for the status bar"""
+        return " | ".join(
+            f"{stage} {s['hits']}/{s['hits'] + s['runs']}"
+            for stage, s in self.stats.items()
+        )
+
+    def clear(self):
+        self._memo = {stage: (None, None, 0) for stage in STAGES}
+        with self._lines_lock:
+            self._lines = (None, {})
+        self._line_melodies = (None, {})
+        self._expressed = {}
@@ -27,6 +27,18 @@ def build_preset_from_app(app) -> Dict[str, Any]:
         "section_pause": app.section_pause_var.get(),
         "envelope": app.envelope_var.get(),
         "seed": app.seed_var.get(),
+        "rhythm": app.rhythm_var.get(),
+        "grid": app.grid_var.get(),
+        "chord": app.chord_var.get(),
+        "vibrato": app.vibrato_var.get(),
+        "section_streams": app.section_streams_var.get(),
+        "line_streams": app.line_streams_var.get(),
+        "lyric_echo": app.lyric_echo_var.get(),
+        "accent": app.accent_var.get(),
+        "repeat": app.repeat_var.get(),
+        "contour": app.contour_var.get(),
+        "range": app.range_var.get(),
+        "phoneme_mode": app.phoneme_mode_var.get(),
     }
 
 
@@ -48,6 +60,13 @@ def apply_preset_to_app(app, preset: Dict[str, Any]):
         "section_pause": app.section_pause_var,
         "envelope": app.envelope_var,
         "seed": app.seed_var,
+        "rhythm": app.rhythm_var,
+        "grid": app.grid_var,
+        "accent": app.accent_var,
+        "repeat": app.repeat_var,
+        "contour": app.contour_var,
+        "range": app.range_var,
+        "phoneme_mode": app.phoneme_mode_var,
     }
 
     for key, var in var_map.items():
@@ -60,6 +79,11 @@ def apply_preset_to_app(app, preset: Dict[str, Any]):
         (app.lyrical_mode_var, "lyrical"),
         (app.flat_var, "flat"),
         (app.quartertone_var, "quartertone"),
+        (app.chord_var, "chord"),
+        (app.vibrato_var, "vibrato"),
+        (app.section_streams_var, "section_streams"),
+        (app.line_streams_var, "line_streams"),
+        (app.lyric_echo_var, "lyric_echo"),
     ]
     for tk_bool, name in bool_pairs:
         if name in preset:
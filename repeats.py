@@ -0,0 +1,92 @@
+# repeats.py
+"""Repeated sections / lines in the element stream and melody reuse"""
+
+from score import Phrase
+
+REPEAT_MODES = ["New", "Exact", "Varied"]
+
+SECTION = "section"
+LINE = "line"
+
+VARY_PROB = 0.25  # share of inner notes nudged one scale step in "Varied"
+
+
+class RepeatIndex:
+    """Section and line spans keyed by their phoneme sequence.
+
+    A span is (first element, end element): sections run between
+    PAUSE_SECTION elements, lines between PAUSE_LINE / PAUSE_SECTION. The key
+    is the tuple of elements itself (phonemes + word pauses), hashed by dict.
+    """
+
+    def __init__(self, text_elements):
+        self.starts = {}  # element index → [(kind, end, key)], section first
+        self.ends = {}  # element index → [(kind, span start)]
+        self.first = {}  # (kind, key) → start of first occurrence
+        self.repeated = 0  # spans whose key was seen before
+
+        section_start = line_start = 0
+        for idx, element in enumerate(text_elements + ["PAUSE_SECTION:0"]):
+            if element.startswith("PAUSE_LINE:"):
+                self._add(LINE, line_start, idx, text_elements)
+                line_start = idx + 1
+            elif element.startswith("PAUSE_SECTION:"):
+                self._add(LINE, line_start, idx, text_elements)
+                end = idx
+                if end > section_start and text_elements[end - 1].startswith(
+                    "PAUSE_LINE:"
+                ):
+                    end -= 1  # blank line before the next header
+                self._add(SECTION, section_start, end, text_elements)
+                section_start = line_start = idx + 1
+        for spans in self.starts.values():
+            spans.sort(key=lambda span: span[0] != SECTION)
+
+    def _add(self, kind, start, end, text_elements):
+        if end <= start:
+            return
+        key = tuple(text_elements[start:end])
+        if (kind, key) in self.first:
+            self.repeated += 1
+        else:
+            self.first[(kind, key)] = start
+        self.starts.setdefault(start, []).append((kind, end, key))
+        self.ends.setdefault(end, []).append((kind, start))
+
+    def source(self, start):
+        """Earlier span to reuse for the span(s) starting here → (kind, src, end)"""
+        for kind, end, key in self.starts.get(start, ()):
+            src = self.first[(kind, key)]
+            if src != start:
+                return kind, src, end
+        return None
+
+
+def vary_phrases(melody, plan, rng):
+    """Light variation of copied melody: phrase-final notes keep their pitch
+    (matching cadence); inner notes may move one scale step.
+    """
+    scale = plan.scale
+    for phrase in melody:
+        if not isinstance(phrase, Phrase):
+            continue
+        events = phrase.events
+        count = len(phrase.note_nums)
+        rolls = rng.random(count)
+        steps = rng.choice((-1, 1), count)
+        for pos, (kind, i) in enumerate(events):
+            if kind != "note":
+                continue
+            phrase_final = pos + 1 == len(events) or events[pos + 1][0] != "note"
+            if phrase_final or rolls[i] >= VARY_PROB or plan.flat_mode:
+                continue
+            offset = phrase.note_nums[i] - plan.root_key
+            octave, degree = divmod(offset, 12)
+            if degree not in scale:
+                continue  # quarter-tone or off-scale note: leave as is
+            step = scale.index(degree) + int(steps[i])
+            octave += step // len(scale)
+            note_num = plan.root_key + octave * 12 + scale[step % len(scale)]
+            phrase.heights[i] += note_num - phrase.note_nums[i]
+            phrase.note_nums[i] = note_num
+    return melody
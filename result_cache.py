@@ -0,0 +1,301 @@
+# result_cache.py
+"""Content-addressed cache of generated UST text
+
+Generation is deterministic for (lyrics, resolved plan, engine code), so the
+finished UST can be stored under a hash of exactly those inputs:
+
+    key = sha256(engine version, normalized lyrics, repr(GenerationPlan))
+
+The engine version is ENGINE_VERSION plus a hash of the ENGINE_MODULES
+sources; the frozen EXE has no sources and reads the hash baked into
+hiro_tables.bin by `python tables.py`.
+
+The plan repr carries every resolved setting, the seed and the project name
+(which lands in the UST header). Two tiers: an in-memory LRU and an on-disk
+SQLite store (zlib-compressed, evicted least-recently-used past a byte limit).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+ENGINE_VERSION = "4.2"
+
+# Modules whose code decides the UST bytes; their source is hashed into the key
+ENGINE_MODULES = (
+    "config.py",
+    "constants.py",
+    "curves.py",
+    "envelopes.py",
+    "generation_plan.py",
+    "hiragana_map.py",
+    "intone_utils.py",
+    "kana_to_hiragana.py",
+    "katakana_map.py",
+    "key_roots.py",
+    "melody_logic.py",
+    "mora_repeats.py",
+    "mora_trie_data.py",
+    "phoneme_table.py",
+    "phonemizer.py",
+    "repeats.py",
+    "rhythm.py",
+    "rhythm_templates.py",
+    "romaji_map.py",
+    "scales.py",
+    "score.py",
+    "tables.py",
+    "ust_engine.py",
+    "ust_strings.py",
+    "vibrato.py",
+)
+
+DEFAULT_MEMORY_ITEMS = 64
+DEFAULT_DISK_BYTES = 256 * 1024 * 1024
+
+_engine_fingerprint = None
+
+
+def engine_source_hash(base=None):
+    """SHA-1 over the ENGINE_MODULES sources, or None without sources"""
+    base = base or os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha1()
+    for name in ENGINE_MODULES:
+        try:
+            with open(os.path.join(base, name), "rb") as f:
+                digest.update(f.read())
+        except OSError:
+            return None  # frozen build: sources are not on disk
+    return digest.hexdigest()
+
+
+def engine_fingerprint():
+    """ENGINE_VERSION + hash of the engine sources; a frozen build uses the
+    hash `python tables.py` stored in hiro_tables.bin when it was bundled"""
+    global _engine_fingerprint
+    if _engine_fingerprint is None:
+        source_hash = engine_source_hash()
+        if source_hash is None:
+            from tables import ENGINE_BUILD as source_hash
+        digest = hashlib.sha1(f"{ENGINE_VERSION}:{source_hash}".encode("utf-8"))
+        _engine_fingerprint = f"{ENGINE_VERSION}-{digest.hexdigest()[:12]}"
+    return _engine_fingerprint
+
+
+def normalize_lines(lines):
+    """Lyric lines → lines with runs of whitespace collapsed and the blank
+    ones at either end dropped (what parse_song_structure ignores anyway)"""
+    lines = [" ".join(line.split()) for line in lines]
+    first, last = 0, len(lines)
+    while first < last and not lines[first]:
+        first += 1
+    while last > first and not lines[last - 1]:
+        last -= 1
+    return lines[first:last]
+
+
+def normalize_lyrics(text):
+    """Lyrics text or a sequence of lines → normalized text"""
+    lines = text.split("\n") if isinstance(text, str) else text
+    return "\n".join(normalize_lines(lines))
+
+
+def cache_key(lyrics, plan):
+    payload = json.dumps(
+        [engine_fingerprint(), normalize_lyrics(lyrics), repr(plan)], ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def default_cache_dir():
+    """$HIRO_CACHE_DIR, else hiro_ust/ under the platform cache folder"""
+    if os.environ.get("HIRO_CACHE_DIR"):
+        return os.environ["HIRO_CACHE_DIR"]
+    root = (
+        os.environ.get("LOCALAPPDATA")
+        or os.environ.get("XDG_CACHE_HOME")
+        or os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(root, "hiro_ust")
+
+
+class CacheEntry:
+    __slots__ = ("ust", "meta")
+
+    def __init__(self, ust, meta):
+        self.ust = ust  # UST text
+        self.meta = meta  # {"elements": n, "warnings": [...]}
+
+
+class ResultCache:
+    """Memory LRU in front of an optional SQLite file; safe to share across threads"""
+
+    def __init__(
+        self,
+        disk_dir=None,
+        memory_items=DEFAULT_MEMORY_ITEMS,
+        disk_bytes=DEFAULT_DISK_BYTES,
+    ):
+        self.memory_items = memory_items
+        self.disk_bytes = disk_bytes
+        self.disk_dir = disk_dir
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+    @classmethod
+    def default(cls):
+        return cls(disk_dir=default_cache_dir())
+
+    # ---- disk tier ----
+
+    def _disk(self):
+        if self._db is None and self.disk_dir:
+            try:
+                os.makedirs(self.disk_dir, exist_ok=True)
+                db = sqlite3.connect(
+                    os.path.join(self.disk_dir, "results.sqlite"),
+                    timeout=30,
+                    check_same_thread=False,
+                )
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    "key TEXT PRIMARY KEY, ust BLOB, meta TEXT, "
+                    "size INTEGER, last_used REAL)"
+                )
+                db.execute(
+                    "CREATE INDEX IF NOT EXISTS results_lru ON results(last_used)"
+                )
+                db.commit()
+                self._db = db
+            except sqlite3.Error:
+                self.disk_dir = None  # read-only or locked location: memory only
+        return self._db
+
+    def _disk_get(self, key):
+        db = self._disk()
+        if db is None:
+            return None
+        try:
+            row = db.execute(
+                "SELECT ust, meta FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+            db.commit()
+            return CacheEntry(zlib.decompress(row[0]).decode("utf-8"), json.loads(row[1]))
+        except (sqlite3.Error, zlib.error, ValueError):
+            return None
+
+    def _disk_put(self, key, entry):
+        db = self._disk()
+        if db is None:
+            return
+        blob = zlib.compress(entry.ust.encode("utf-8"), 6)
+        try:
+            db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (key, blob, json.dumps(entry.meta, ensure_ascii=False), len(blob), time.time()),
+            )
+            self._evict(db)
+            db.commit()
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, db):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.disk_bytes:
+            return
+        for key, size in db.execute(
+            "SELECT key, size FROM results ORDER BY last_used"
+        ).fetchall():
+            if total <= self.disk_bytes * 0.9:
+                break
+            db.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+            self.stats["evictions"] += 1
+
+    # ---- public ----
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry
+            entry = self._disk_get(key)
+            if entry is not None:
+                self._remember(key, entry)
+                self.stats["disk_hits"] += 1
+                return entry
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, ust, meta=None):
+        entry = CacheEntry(ust, meta or {})
+        with self._lock:
+            self._remember(key, entry)
+            self._disk_put(key, entry)
+            self.stats["stores"] += 1
+        return entry
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def fetch(self, lyrics, plan, render):
+        """Cached UST for (lyrics, plan), else render() → (ust, meta) and store.
+
+        Returns (CacheEntry, hit?).
+        """
+        key = cache_key(lyrics, plan)
+        entry = self.get(key)
+        if entry is not None:
+            return entry, True
+        ust, meta = render()
+        return self.put(key, ust, meta), False
+
+    @property
+    def hits(self):
+        return self.stats["memory_hits"] + self.stats["disk_hits"]
+
+    @property
+    def lookups(self):
+        return self.hits + self.stats["misses"]
+
+    def summary(self):
+        lookups = self.lookups
+        rate = 100.0 * self.hits / lookups if lookups else 0.0
+        return f"cache {self.hits}/{lookups} hits ({rate:.0f}%)"
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            db = self._disk()
+            if db is not None:
+                db.execute("DELETE FROM results")
+                db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
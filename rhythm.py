@@ -0,0 +1,110 @@
+# rhythm.py
+"""Line-level rhythm engine: note lengths and vowel stretches in one pass"""
+
+import numpy as np
+
+from config import HiroConfig
+from phoneme_table import PHONEME_TABLE, LINE_BREAK
+from rhythm_templates import RHYTHM_TEMPLATES
+
+STRETCH_FACTOR = 0.6  # "+" notes
+STRETCHED_HEAD_FACTOR = 1.2  # vowel followed by "+" notes
+LONG_VOWEL_FACTOR = 1.8  # "ああ"
+
+
+class RhythmEngine:
+    """Computes every length of a line from class arrays and one block of draws"""
+
+    def __init__(
+        self,
+        base_length=480,
+        length_var=0.3,
+        stretch_prob=0.25,
+        max_stretch=3,
+        template="Straight",
+        grid=0,
+        seed=None,
+    ):
+        self.base_length = base_length
+        self.stretch_prob = stretch_prob
+        self.max_stretch = max_stretch
+        self.template = np.asarray(
+            RHYTHM_TEMPLATES.get(template, RHYTHM_TEMPLATES["Straight"]), dtype=float
+        )
+        self.grid = int(grid or 0)
+        self.rng = np.random.default_rng(seed)
+
+        # Uniform factor range per class: factor = low + span * u
+        self.factor_low = np.array(
+            [1.0 - length_var, 0.5, 0.7 - length_var * 0.2, STRETCH_FACTOR]
+        )
+        self.factor_span = np.array(
+            [length_var * 1.3, length_var * 1.5, length_var * 0.4, 0.0]
+        )
+        self.table = PHONEME_TABLE
+
+    def layout_line(self, ids):
+        """Return one [(phoneme_id, length), ...] list per input phoneme ID"""
+        n = len(ids)
+        if not n:
+            return []
+        arrays = self.table.arrays()
+        ids = np.asarray(ids, dtype=np.int32)
+        classes = arrays["klass"][ids]
+        long_vowel = arrays["long_vowel"][ids]
+        stretch_roll, count_roll, length_roll = self.rng.random((3, n))
+
+        stretched = arrays["single_vowel"][ids] & (
+            stretch_roll < self.stretch_prob + 0.5
+        )
+        counts = np.where(
+            stretched, 1 + (count_roll * self.max_stretch).astype(np.int64), 0
+        )
+        head_factor = np.where(
+            long_vowel,
+            LONG_VOWEL_FACTOR,
+            np.where(stretched, STRETCHED_HEAD_FACTOR, 1.0),
+        )
+        head_factor *= self.factor_low[classes] + self.factor_span[classes] * length_roll
+
+        # Expand heads + "+" tails into one flat note stream
+        group_sizes = counts + 1
+        starts = np.concatenate(([0], np.cumsum(group_sizes)[:-1]))
+        factors = np.full(int(group_sizes.sum()), STRETCH_FACTOR * STRETCH_FACTOR)
+        factors[starts] = head_factor
+        note_ids = np.full(factors.size, self.table.stretch_id, dtype=np.int32)
+        note_ids[starts] = arrays["head"][ids]
+
+        factors *= self.template[np.arange(factors.size) % self.template.size]
+        lengths = self.base_length * factors
+        if self.grid > 0:
+            lengths = np.maximum(np.rint(lengths / self.grid), 1) * self.grid
+        lengths = np.clip(
+            lengths.astype(np.int64), HiroConfig.MIN_NOTE_LEN, HiroConfig.MAX_NOTE_LEN
+        )
+
+        notes = list(zip(note_ids.tolist(), lengths.tolist()))
+        bounds = np.cumsum(group_sizes).tolist()
+        return [notes[start:end] for start, end in zip([0] + bounds, bounds)]
+
+    def layout_elements(self, element_ids):
+        """Lay out every line of an interned element list → {element index: notes}"""
+        layout = {}
+        line_indices = []
+        line_ids = []
+        small_tsu = self.table.small_tsu_id
+
+        def flush():
+            for idx, notes in zip(line_indices, self.layout_line(line_ids)):
+                layout[idx] = notes
+            line_indices.clear()
+            line_ids.clear()
+
+        for idx, pid in enumerate(element_ids):
+            if pid == LINE_BREAK:
+                flush()
+            elif pid >= 0 and pid != small_tsu:
+                line_indices.append(idx)
+                line_ids.append(pid)
+        flush()
+        return layout
@@ -0,0 +1,20 @@
+# rhythm_templates.py
+"""Rhythm choices shared by the GUI, presets and the rhythm engine (no NumPy)"""
+
+# Per-position length weights, cycled over the notes of a line
+RHYTHM_TEMPLATES = {
+    "Straight": (1.0,),
+    "Swing": (1.25, 0.75),
+    "Syncopated": (0.75, 1.5, 0.75, 1.0),
+}
+
+# Beat-grid choices for the GUI (ticks, 0 = off)
+GRID_OPTIONS = ["Off", "60", "120", "240", "480"]
+
+
+def parse_grid(value) -> int:
+    """'Off' / '' / '120' → grid ticks"""
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return 0
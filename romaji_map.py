@@ -0,0 +1,122 @@
+# romaji_map.py
+"""Hepburn/Wapuro romaji → Hiragana (source data for tables.py)"""
+
+ROMAJI_MAP = {
+    # Vowels
+    "a": "あ",
+    "i": "い",
+    "u": "う",
+    "e": "え",
+    "o": "お",
+    "ā": "あー",
+    "ī": "いー",
+    "ū": "うー",
+    "ē": "えー",
+    "ō": "おー",
+    # K + Vowels
+    "ka": "か",
+    "ki": "き",
+    "ku": "く",
+    "ke": "け",
+    "ko": "こ",
+    "ga": "が",
+    "gi": "ぎ",
+    "gu": "ぐ",
+    "ge": "げ",
+    "go": "ご",
+    "kya": "きゃ",
+    "kyu": "きゅ",
+    "kyo": "きょ",
+    "gya": "ぎゃ",
+    "gyu": "ぎゅ",
+    "gyo": "ぎょ",
+    # S + Vowels
+    "sa": "さ",
+    "shi": "し",
+    "su": "す",
+    "se": "せ",
+    "so": "そ",
+    "za": "ざ",
+    "ji": "じ",
+    "zu": "ず",
+    "ze": "ぜ",
+    "zo": "ぞ",
+    "sha": "しゃ",
+    "shu": "しゅ",
+    "sho": "しょ",
+    "ja": "じゃ",
+    "ju": "じゅ",
+    "jo": "じょ",
+    # T + Vowels
+    "ta": "た",
+    "chi": "ち",
+    "tsu": "つ",
+    "te": "て",
+    "to": "と",
+    "da": "だ",
+    "ji": "ぢ",
+    "zu": "づ",
+    "de": "で",
+    "do": "ど",
+    "cha": "ちゃ",
+    "chu": "ちゅ",
+    "cho": "ちょ",
+    # N + Vowels
+    "na": "な",
+    "ni": "に",
+    "nu": "ぬ",
+    "ne": "ね",
+    "no": "の",
+    "nya": "にゃ",
+    "nyu": "にゅ",
+    "nyo": "にょ",
+    # H + Vowels
+    "ha": "は",
+    "hi": "ひ",
+    "fu": "ふ",
+    "he": "へ",
+    "ho": "ほ",
+    "ba": "ば",
+    "bi": "び",
+    "bu": "ぶ",
+    "be": "べ",
+    "bo": "ぼ",
+    "pa": "ぱ",
+    "pi": "ぴ",
+    "pu": "ぷ",
+    "pe": "ぺ",
+    "po": "ぽ",
+    "hya": "ひゃ",
+    "hyu": "ひゅ",
+    "hyo": "ひょ",
+    # M + Vowels
+    "ma": "ま",
+    "mi": "み",
+    "mu": "む",
+    "me": "め",
+    "mo": "も",
+    "mya": "みゃ",
+    "myu": "みゅ",
+    "myo": "みょ",
+    # Y + Vowels
+    "ya": "や",
+    "yu": "ゆ",
+    "yo": "よ",
+    # R + Vowels
+    "ra": "ら",
+    "ri": "り",
+    "ru": "る",
+    "re": "れ",
+    "ro": "ろ",
+    "rya": "りゃ",
+    "ryu": "りゅ",
+    "ryo": "りょ",
+    # W + Vowels
+    "wa": "わ",
+    "wo": "を",
+    "n": "ん",
+    # Small tsu / gemination
+    "っ": "っ",
+    "xtsu": "っ",
+    "-": "ー",
+}
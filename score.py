@@ -0,0 +1,139 @@
+# score.py
+"""Score model: what the engine composes before anything is serialized"""
+
+NOTE = "note"
+REST = "rest"
+SMALL_TSU = "tsu"
+
+
+class ScoreNote:
+    """One UST block: a sung note, a rest or a small tsu"""
+
+    __slots__ = (
+        "kind",
+        "length",
+        "lyric",
+        "note_num",
+        "intensity",
+        "pbs",
+        "pbw",
+        "pby",
+        "pbm",
+        "modulation",
+        "vibrato",
+        "phoneme_id",
+    )
+
+    def __init__(
+        self,
+        kind,
+        length,
+        lyric="R",
+        note_num=60,
+        intensity=0,
+        pbs="0;0",
+        pbw="0",
+        pby="0",
+        pbm=",",
+        modulation=0,
+        vibrato="",
+        phoneme_id=-1,
+    ):
+        self.kind = kind
+        self.length = length
+        self.lyric = lyric
+        self.note_num = note_num
+        self.intensity = intensity
+        self.pbs = pbs
+        self.pbw = pbw
+        self.pby = pby
+        self.pbm = pbm
+        self.modulation = modulation
+        self.vibrato = vibrato  # "VBR=...\n" or ""
+        self.phoneme_id = phoneme_id
+
+    @classmethod
+    def rest(cls, length):
+        return cls(REST, length)
+
+    @classmethod
+    def small_tsu(cls, root_key, length=60):
+        return cls(SMALL_TSU, length, lyric="っ", note_num=root_key, intensity=30)
+
+    def copy(self):
+        return ScoreNote(*(getattr(self, name) for name in self.__slots__))
+
+    def __reduce__(self):
+        # positional args pickle far smaller/faster than the default slot state
+        return ScoreNote, tuple(getattr(self, name) for name in self.__slots__)
+
+    def bend_points(self):
+        """[(ms from note start, semitone offset)] from PBS/PBW/PBY, [] when flat.
+
+        PBS "ms;y" starts the curve, each PBW width advances in ms to the next
+        point, whose y is the next PBY value (the last point returns to 0).
+        y is in 1/10 semitones.
+        """
+        if self.kind != NOTE or self.pbw in ("", "0"):
+            return []
+        try:
+            x_ms, _, y = str(self.pbs).partition(";")
+            widths = [float(w) for w in str(self.pbw).split(",") if w]
+            heights = [float(h) for h in str(self.pby).split(",") if h]
+            x = float(x_ms)
+            points = [(x, float(y or 0) / 10.0)]
+        except ValueError:
+            return []
+        for i, width in enumerate(widths):
+            x += width
+            points.append((x, heights[i] / 10.0 if i < len(heights) else 0.0))
+        return points
+
+    def pitch_points(self):
+        """[(ms from note start, pitch in semitones)] as sung, [] when flat.
+
+        Bends are relative to the NoteNum the UST holds (note_num rounded), so
+        a quarter-tone note gives the same curve fresh from the engine and
+        read back from its UST.
+        """
+        written = int(round(self.note_num))
+        return [(x, written + y) for x, y in self.bend_points()]
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"ScoreNote({self.kind}, {self.lyric!r}, {self.note_num}, {self.length})"
+
+
+class Phrase:
+    """Melody of one phrase before expression (bends, intensity, vibrato).
+
+    `events` holds ("rest", length) / ("tsu", None) / ("note", index) in
+    score order; the per-note lists are indexed by the "note" events.
+    """
+
+    __slots__ = (
+        "events",
+        "note_ids",
+        "note_nums",
+        "lengths",
+        "states",
+        "heights",
+        "phrase_lens",
+    )
+
+    def __init__(self, *lists):
+        if not lists:
+            lists = tuple([] for _ in self.__slots__)
+        for name, values in zip(self.__slots__, lists):
+            setattr(self, name, values)
+
+    def copy(self):
+        return Phrase(*(list(getattr(self, name)) for name in self.__slots__))
+
+    def __len__(self):
+        return len(self.events)
+
+    def __reduce__(self):
+        return Phrase, tuple(getattr(self, name) for name in self.__slots__)
@@ -0,0 +1,113 @@
+# stage_stats.py
+"""Where generation time goes, per stage (normalize ... serialize)
+
+Per stage: runs (times it computed), hits (memo / cache hits instead),
+wall seconds, item counts (lines, elements, phrases, notes, ...) and, when
+asked for, allocations seen by tracemalloc (net and peak KiB). Callers
+hold `stats=None` when disabled and skip every hook, so the cost then is
+one `is None` test per stage. With allocations on, tracemalloc slows the
+whole run several times over; the times are then only comparable with
+each other.
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class StageStats:
+    def __init__(self, allocations=False):
+        self.allocations = allocations
+        self.stages = {}  # name → {"runs", "hits", "seconds", "items", ...}
+
+    def _stage(self, name):
+        record = self.stages.get(name)
+        if record is None:
+            record = self.stages[name] = {
+                "runs": 0,
+                "hits": 0,
+                "seconds": 0.0,
+                "items": {},
+            }
+            if self.allocations:
+                record.update(alloc_kb=0.0, peak_kb=0.0)
+        return record
+
+    @contextmanager
+    def stage(self, name):
+        """Time (and with allocations, trace) one computation of `name`"""
+        record = self._stage(name)
+        record["runs"] += 1
+        started_tracing = False
+        if self.allocations:
+            # traced only while a stage runs unless the caller traces already
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            record["seconds"] += time.perf_counter() - began
+            if self.allocations:
+                current, peak = tracemalloc.get_traced_memory()
+                record["alloc_kb"] += (current - before) / 1024.0
+                record["peak_kb"] = max(record["peak_kb"], (peak - before) / 1024.0)
+                if started_tracing:
+                    tracemalloc.stop()
+
+    def hit(self, name):
+        self._stage(name)["hits"] += 1
+
+    def count(self, name, **items):
+        """Add item counts, e.g. count("phonemize", lines=12)"""
+        counts = self._stage(name)["items"]
+        for key, value in items.items():
+            counts[key] = counts.get(key, 0) + value
+
+    def merge(self, other):
+        """Add another StageStats or its as_dict() (e.g. from a worker)"""
+        stages = other.stages if isinstance(other, StageStats) else other
+        for name, theirs in stages.items():
+            record = self._stage(name)
+            for key in ("runs", "hits", "seconds", "alloc_kb"):
+                if key in theirs:
+                    record[key] = record.get(key, 0) + theirs[key]
+            if "peak_kb" in theirs:
+                record["peak_kb"] = max(record.get("peak_kb", 0.0), theirs["peak_kb"])
+            self.count(name, **theirs["items"])
+
+    @property
+    def seconds(self):
+        return sum(record["seconds"] for record in self.stages.values())
+
+    def as_dict(self):
+        """Plain, picklable / JSON-able copy"""
+        return {
+            name: dict(record, items=dict(record["items"]))
+            for name, record in self.stages.items()
+        }
+
+    def report(self, title="📊 Stages"):
+        """Text table, one row per stage"""
+        alloc = any("alloc_kb" in record for record in self.stages.values())
+        header = f"  {'stage':10s} {'ms':>9s} {'runs':>5s} {'hits':>5s}"
+        if alloc:
+            header += f" {'alloc KiB':>10s} {'peak KiB':>9s}"
+        lines = [title, header + "  items"]
+        for name, record in self.stages.items():
+            row = (
+                f"  {name:10s} {record['seconds'] * 1000.0:9.1f}"
+                f" {record['runs']:5d} {record['hits']:5d}"
+            )
+            if alloc:
+                row += (
+                    f" {record.get('alloc_kb', 0.0):10.1f}"
+                    f" {record.get('peak_kb', 0.0):9.1f}"
+                )
+            items = ", ".join(f"{k} {v}" for k, v in record["items"].items())
+            lines.append(f"{row}  {items}")
+        lines.append(f"  {'total':10s} {self.seconds * 1000.0:9.1f}")
+        return "\n".join(lines)
@@ -0,0 +1,41 @@
+# startup_profile.py
+"""Where GUI cold-start time goes (python hiro_ust_dev.py --profile-startup)
+
+Steps are (kind, name, ms) entries: "import" per engine module, "panel" per
+widget panel, "tables" for warm-up work, "mark" for time since launch.
+Recording is a perf_counter pair per step, so it stays on unconditionally;
+the report is only printed when asked for.
+"""
+
+import time
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.steps = []  # [(kind, name, ms)]; appended from Tk and worker threads
+
+    def record(self, kind, name, seconds):
+        self.steps.append((kind, name, seconds * 1000.0))
+
+    @contextmanager
+    def step(self, kind, name):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(kind, name, time.perf_counter() - began)
+
+    def mark(self, name):
+        """Milestone: time since launch"""
+        self.record("mark", name, time.perf_counter() - self.started)
+
+    def report(self):
+        lines = ["⏱️ Startup profile (ms; marks are since launch)"]
+        for kind, name, ms in self.steps:
+            lines.append(f"  {kind:7s} {name:24s} {ms:8.1f}")
+        for kind in ("import", "panel", "tables"):
+            total = sum(ms for k, _, ms in self.steps if k == kind)
+            lines.append(f"  total   {kind:24s} {total:8.1f}")
+        return "\n".join(lines)
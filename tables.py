@@ -0,0 +1,158 @@
+# tables.py
+"""Phonetic and scale tables, compiled into one versioned binary blob
+
+    python tables.py            # (re)build hiro_tables.bin, e.g. before PyInstaller
+
+The data modules in SOURCES stay the source of truth; nothing imports them
+at run time. Importing this module reads hiro_tables.bin in one read() and
+unmarshals it: the lookup dicts plus tables compiled from them (the mora
+trie). When the sources are on disk, a stamp of their sizes and mtimes (a
+few stat calls, no reads) is compared with the one in the header; if the
+blob is missing or stale the tables are compiled from the sources in memory
+for this process. Importing never writes: only `python tables.py` does, so
+read-only and shared installs are left alone. The frozen EXE has no sources
+and trusts the bundled blob.
+
+The blob also carries ENGINE_BUILD, a hash of the engine sources at build
+time (result_cache.engine_source_hash), which keys the result cache in the
+frozen EXE. Compiled from the sources in memory it is None; the cache then
+hashes the sources itself.
+
+Header: MAGIC, FORMAT_VERSION, Python major/minor (marshal is only stable
+within one Python version), source stamp; then one marshal payload.
+"""
+
+import marshal
+import os
+import sys
+import zlib
+
+FORMAT_VERSION = 3
+BLOB_NAME = "hiro_tables.bin"
+MAGIC = b"HIROTBL\0"
+_HEADER_SIZE = len(MAGIC) + 3 + 4  # + format, Python major/minor, stamp
+
+# data module → table names it defines
+SOURCES = {
+    "mora_trie_data": ("MORA_DATA",),
+    "hiragana_map": ("HIRAGANA_MAP",),
+    "romaji_map": ("ROMAJI_MAP",),
+    "katakana_map": ("KATAKANA_TO_HIRAGANA",),
+    "scales": ("SCALES",),
+}
+
+
+def _base_dir():
+    if getattr(sys, "frozen", False):
+        return sys._MEIPASS
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def source_stamp(base=None):
+    """CRC-32 over the size and mtime of the source modules and this file,
+    or None without sources"""
+    base = base or _base_dir()
+    stamp = FORMAT_VERSION
+    for name in (*SOURCES, "tables"):
+        try:
+            st = os.stat(os.path.join(base, f"{name}.py"))
+        except OSError:
+            return None  # frozen build: sources are not on disk
+        stamp = zlib.crc32(f"{name}:{st.st_size}:{st.st_mtime_ns}".encode(), stamp)
+    return stamp
+
+
+def build_mora_trie(mora_data):
+    """Kana → nested {char: node} trie; nodes carry "end" and "phones" """
+    trie = {}
+    for mora, phones in mora_data.items():
+        node = trie
+        for char in mora:
+            if char not in node:
+                node[char] = {"end": False, "phones": None}
+            node = node[char]
+        node["end"] = True
+        node["phones"] = phones
+    return trie
+
+
+def compile_tables():
+    """Import the source modules → {table name: table}"""
+    import importlib
+
+    tables = {}
+    for module_name, names in SOURCES.items():
+        module = importlib.import_module(module_name)
+        for name in names:
+            tables[name] = getattr(module, name)
+    tables["MORA_TRIE"] = build_mora_trie(tables["MORA_DATA"])
+    return tables
+
+
+def _header(stamp):
+    version = bytes((FORMAT_VERSION, *sys.version_info[:2]))
+    return MAGIC + version + stamp.to_bytes(4, "little")
+
+
+def pack_tables(tables, stamp):
+    return _header(stamp) + marshal.dumps(tables)
+
+
+def unpack_tables(data, stamp=None):
+    """Blob bytes → tables, or None when the header does not match"""
+    header = memoryview(data)[:_HEADER_SIZE]
+    if stamp is None:  # no sources: any stamp, same format
+        if header[: _HEADER_SIZE - 4] != _header(0)[: _HEADER_SIZE - 4]:
+            return None
+    elif header != _header(stamp):
+        return None
+    return marshal.loads(memoryview(data)[_HEADER_SIZE:])
+
+
+def build_blob(path=None, base=None):
+    """Compile and write the blob → (path, tables)"""
+    from atomic_io import atomic_write_bytes  # tempfile is slow to import
+
+    base = base or _base_dir()
+    path = path or os.path.join(base, BLOB_NAME)
+    from result_cache import engine_source_hash
+
+    tables = compile_tables()
+    tables["ENGINE_BUILD"] = engine_source_hash(base)
+    atomic_write_bytes(path, pack_tables(tables, source_stamp(base)))
+    return path, tables
+
+
+def load_tables(path=None, base=None):
+    """Tables from the blob, or compiled from the sources (not written back)
+    if it is missing or stale"""
+    base = base or _base_dir()
+    path = path or os.path.join(base, BLOB_NAME)
+    stamp = source_stamp(base)
+    try:
+        with open(path, "rb") as f:
+            tables = unpack_tables(f.read(), stamp)
+    except OSError:
+        tables = None
+    if tables is not None:
+        return tables
+    if stamp is None:
+        raise RuntimeError(f"{BLOB_NAME} is missing or from another version")
+    return compile_tables()  # python tables.py refreshes the blob
+
+
+_TABLES = load_tables()
+
+MORA_DATA = _TABLES["MORA_DATA"]
+MORA_TRIE = _TABLES["MORA_TRIE"]
+HIRAGANA_MAP = _TABLES["HIRAGANA_MAP"]
+ROMAJI_MAP = _TABLES["ROMAJI_MAP"]
+KATAKANA_TO_HIRAGANA = _TABLES["KATAKANA_TO_HIRAGANA"]
+SCALES = _TABLES["SCALES"]
+ENGINE_BUILD = _TABLES.get("ENGINE_BUILD")
+
+
+if __name__ == "__main__":
+    blob_path, built = build_blob()
+    size = os.path.getsize(blob_path)
+    print(f"✅ {blob_path}: {len(built)} tables, {size} bytes")
@@ -0,0 +1,26 @@
+# tests/conftest.py
+"""Shared fixtures; the modules under test live flat in the repo root"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LYRICS = "\n".join(
+    ["[Verse]", "きゃっきゃ うれし いたい さぶり", "ゆびさき きりさけ あかい つゆ"] * 6
+)
+
+
+@pytest.fixture(scope="session")
+def quartertone_run():
+    """(PipelineRun, quarter-tone note indices) of a song with quarter-tones on"""
+    from generation_plan import GenerationPlan
+    from pipeline import Pipeline
+
+    plan = GenerationPlan.from_settings({"quartertone": True, "seed": 3})
+    run = Pipeline().run(LYRICS, plan)
+    quarter = [i for i, n in enumerate(run.score) if n.note_num != int(n.note_num)]
+    assert quarter, "no quarter-tone notes to test with"
+    return run, quarter
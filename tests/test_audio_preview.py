@@ -0,0 +1,21 @@
+# tests/test_audio_preview.py
+import numpy as np
+
+from audio_preview import NoteTimeline
+from piano_roll import score_from_ust
+
+
+def test_round_tripped_score_renders_the_same_pitch(quartertone_run):
+    run, quarter = quartertone_run
+    tempo, read_back = score_from_ust(run.ust)
+    envelope = "0,10,35,0,100,100,0"
+    fresh = NoteTimeline(run.score, tempo, envelope)
+    cached = NoteTimeline(read_back, tempo, envelope)
+    t = np.arange(fresh.total, dtype=np.float64)
+    fresh_pitch = np.interp(t, fresh.pitch_x, fresh.pitch_y)
+    cached_pitch = np.interp(t, cached.pitch_x, cached.pitch_y)
+    assert np.allclose(fresh_pitch, cached_pitch)
+    # held part of each quarter-tone note: its exact pitch
+    for idx in quarter:
+        middle = fresh.starts[idx] + fresh.counts[idx] // 2
+        assert cached_pitch[middle] == run.score[idx].note_num
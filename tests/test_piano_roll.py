@@ -0,0 +1,19 @@
+# tests/test_piano_roll.py
+from piano_roll import RollModel, score_from_ust
+
+
+def _held_pitches(model, note):
+    points = model.bend(note)
+    return [pitch for _, pitch in points[1:-1]]
+
+
+def test_quartertone_note_round_trips_through_ust(quartertone_run):
+    run, quarter = quartertone_run
+    tempo, read_back = score_from_ust(run.ust)
+    fresh, cached = RollModel(run.score, tempo), RollModel(read_back, tempo)
+    for idx in quarter:
+        note = run.score[idx]
+        row = fresh.notes.index(note)
+        assert read_back[idx].note_num == int(round(note.note_num))
+        assert _held_pitches(fresh, row) == [note.note_num] * 2
+        assert _held_pitches(cached, row) == [note.note_num] * 2
@@ -0,0 +1,935 @@
+# ust_engine.py
+"""Headless generation engine: lyrics → elements → UST (no Tk imports)"""
+
+import random
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config import HiroConfig
+from curves import CurveStage, bend_state
+from generation_plan import GenerationPlan
+from intone_utils import get_intone_settings
+from kana_to_hiragana import convert_lyrics
+from melody_logic import MelodyBrain
+from mora_repeats import MoraAnalysis
+from phoneme_table import PHONEME_TABLE
+from phonemizer import Phonemizer
+from repeats import RepeatIndex, vary_phrases
+from rhythm import RhythmEngine
+from score import Phrase, ScoreNote, NOTE, REST, SMALL_TSU
+from tables import HIRAGANA_MAP, MORA_TRIE, SCALES
+from vibrato import VibratoStage
+from ust_strings import (
+    UST_HEADER_TEMPLATE,
+    REST_NOTE_TEMPLATE,
+    SMALL_TSU_TEMPLATE,
+    NOTE_BLOCK_TEMPLATE,
+    TRACK_END,
+)
+
+
+class USTWriter:
+    def __init__(self, project_name, tempo):
+        self.lines = []
+        self.note_id = 0
+        self.project_name = str(project_name)
+        self.tempo = tempo
+        self._write_header()
+
+    def _write_header(self):
+        self.lines.append(
+            UST_HEADER_TEMPLATE.format(tempo=self.tempo, project_name=self.project_name)
+        )
+
+    def add_rest(self, length):
+        self.lines.append(
+            REST_NOTE_TEMPLATE.format(note_id=self.note_id, length=length)
+        )
+        self.note_id += 1
+
+    def add_small_tsu(self, root_key, length=60):
+        self.lines.append(
+            SMALL_TSU_TEMPLATE.format(
+                note_id=self.note_id, length=length, root_key=int(root_key)
+            )
+        )
+        self.note_id += 1
+
+    def add_note(
+        self,
+        length,
+        lyric,
+        note_num,
+        pre_utter,
+        voice_overlap,
+        intensity,
+        envelope,
+        pbs=0,
+        pbw=0,
+        flags="",
+        pby=0,
+        pbm=",",
+        modulation=0,
+        vibrato="",
+    ):
+        self.lines.append(
+            NOTE_BLOCK_TEMPLATE.format(
+                note_id=self.note_id,
+                length=length,
+                lyric=lyric,
+                note_num=int(round(note_num)),
+                pre_utter=pre_utter,
+                voice_overlap=voice_overlap,
+                intensity=intensity,
+                envelope=envelope,
+                pbs=pbs,
+                pbw=pbw,
+                pby=pby,
+                pbm=pbm,
+                flags=flags,
+                modulation=modulation,
+                vibrato=vibrato,
+            )
+        )
+        self.note_id += 1
+
+    def finalize(self):
+        self.lines.append(TRACK_END)
+        return "\n".join(self.lines)
+
+
+class HiroUSTGenerator:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.hiragana_map = HIRAGANA_MAP
+            cls._instance._build_mora_trie()
+        return cls._instance
+
+    def _build_mora_trie(self):
+        self.mora_trie = MORA_TRIE  # compiled into hiro_tables.bin
+
+    def romaji_to_hiragana(self, phoneme):
+        return PHONEME_TABLE.lyric_of(phoneme)
+
+    def hiragana_to_romaji(self, text, marks=None):
+        """Kana → phonemes. `marks`: optional list that gets (MARK_*, start,
+        end) spans of `text` found during the same trie walk: characters
+        that matched no mora (dropped) and vowel morae that lengthen the
+        previous one."""
+        phonemes = []
+        i = 0
+        lead = len(text) - len(text.lstrip())
+        text = text.strip()
+
+        text = convert_lyrics(text)
+
+        while i < len(text):
+            node = self.mora_trie
+            start = i
+            best_match = None
+            best_end = i
+
+            while i < len(text) and text[i] in node:
+                node = node[text[i]]
+                i += 1
+
+                if "end" in node and node["end"]:
+                    best_match = node
+                    best_end = i
+
+            if best_match and best_match["end"]:
+                phones = best_match["phones"]
+                if (
+                    marks is not None
+                    and phones[0] in _LONG_AFTER
+                    and phonemes
+                    and extends_vowel(phonemes[-1], phones)
+                ):
+                    marks.append((MARK_LONG_VOWEL, lead + start, lead + best_end))
+                phonemes.extend(phones)
+                i = best_end
+            else:
+                char = text[start]
+                if char == "っ":  # Sokuon
+                    phonemes.append("っ")
+                    i = start + 1
+                else:
+                    if marks is not None:
+                        # ー has no mora of its own; the note before it is the long one
+                        kind = MARK_UNMATCHED
+                        if char == "ー" and phonemes:
+                            kind = MARK_LONG_VOWEL
+                        marks.append((kind, lead + start, lead + start + 1))
+                    i = start + 1
+
+        return phonemes
+
+
+# Diagnostic spans reported by the phonemizing scan
+MARK_UNMATCHED = "unmatched"
+MARK_LONG_VOWEL = "long_vowel"
+
+# Vowel morae that lengthen the one before: same vowel, or おう / えい
+_LONG_AFTER = {"a": "a", "i": "i", "u": "u", "e": "ei", "o": "ou"}
+
+
+def extends_vowel(previous, phones):
+    """True if mora `phones` (e.g. ["a"]) holds the vowel of phoneme `previous`"""
+    if len(phones) != 1 or len(phones[0]) != 1:
+        return False
+    return phones[0] in _LONG_AFTER.get(previous[-1:], "")
+
+
+def parse_song_structure(
+    text,
+    line_pause=960,
+    section_pause=1920,
+    on_warning=None,
+    phonemizer=None,
+    on_section=None,
+):
+    lines = phonemize_lines(text, phonemizer, on_warning)
+    return assemble_elements(lines, line_pause, section_pause, on_section)
+
+
+# Line records from phonemize_lines
+LINE_BLANK = "blank"
+LINE_SECTION = "section"
+LINE_WORDS = "words"
+
+
+def phonemize_line(line, phonemizer=None):
+    """One stripped lyric line → (kind, payload).
+
+    LINE_SECTION: section name; LINE_BLANK: None; LINE_WORDS: (words,
+    phoneme lists, complete, error, marks). Raises nothing: a failing word
+    ends the line early with complete=False and the error in the 4th slot.
+    `marks` are the (MARK_*, start col, end col) spans the scan came across,
+    for editors to highlight without a second pass.
+    """
+    if line.startswith("[") and line.endswith("]") and len(line) > 2:
+        return LINE_SECTION, line[1:-1].strip()
+    if not line:
+        return LINE_BLANK, None
+    words = line.split()
+    phonemes = []
+    marks = []
+    word_marks = []
+    col = 0
+    try:
+        for word in words:
+            col = line.index(word, col)
+            if phonemizer:
+                phonemes.append(phonemizer.text_to_phonemes(word, word_marks))
+            else:
+                generator = HiroUSTGenerator()
+                phonemes.append(generator.hiragana_to_romaji(word, word_marks))
+            if word_marks:
+                marks.extend((kind, col + s, col + e) for kind, s, e in word_marks)
+                word_marks.clear()
+            col += len(word)
+    except Exception as e:
+        return LINE_WORDS, (words, phonemes, False, e, marks)
+    return LINE_WORDS, (words, phonemes, True, None, marks)
+
+
+def lyric_lines(text):
+    """Lyrics text or a sequence of lines → lines, blank ones at either end
+    dropped (line 1 is the first line with text)"""
+    if isinstance(text, str):
+        return text.strip().split("\n") if text.strip() else []
+    first, last = 0, len(text)
+    while first < last and not text[first].strip():
+        first += 1
+    while last > first and not text[last - 1].strip():
+        last -= 1
+    return text[first:last]
+
+
+def phonemize_lines(text, phonemizer=None, on_warning=None, cache=None):
+    """Lyrics text or lines → [(line number, line, kind, payload)], warnings
+    reported.
+
+    `cache`: optional dict line text → (kind, payload) from an earlier call
+    with the same phonemizer mode; only lines missing from it are phonemized
+    (and added).
+    """
+    records = []
+    for line_num, raw_line in enumerate(lyric_lines(text), 1):
+        line = raw_line.strip()
+        if cache is None:
+            kind, payload = phonemize_line(line, phonemizer)
+        else:
+            record = cache.get(line)
+            if record is None:
+                record = cache[line] = phonemize_line(line, phonemizer)
+            kind, payload = record
+        records.append((line_num, line, kind, payload))
+        if on_warning:
+            for msg in line_warnings(line_num, line, kind, payload):
+                on_warning(msg)
+    return records
+
+
+def line_warnings(line_num, line, kind, payload):
+    if kind == LINE_SECTION and not payload:
+        return [f"⚠️ Empty section '[]' on line {line_num} - using 'Main'"]
+    if kind == LINE_WORDS and not payload[2]:
+        return [f"⚠️ Parse error line {line_num}: '{line}' → {payload[3]}"]
+    return []
+
+
+def assemble_elements(records, line_pause=960, section_pause=1920, on_section=None):
+    """Line records → (parts, elements) with PAUSE_WORD/LINE/SECTION markers"""
+    parts = {"Main": []}
+    current_part = "Main"
+    all_elements = []
+
+    if not records:
+        return parts, all_elements
+
+    for line_num, line, kind, payload in records:
+        if kind == LINE_SECTION:
+            section_name = payload
+            if section_name:
+                if all_elements:
+                    all_elements.append(f"PAUSE_SECTION:{section_pause}")
+                current_part = section_name
+                parts[current_part] = []
+                if on_section:
+                    on_section(section_name, len(all_elements))
+            continue
+
+        if kind == LINE_WORDS:
+            words, word_phonemes, complete = payload[:3]
+            last = len(words) - 1
+            for word_idx, (word, phonemes) in enumerate(zip(words, word_phonemes)):
+                if phonemes:
+                    parts[current_part].append(word)
+                    all_elements.extend(phonemes)
+                    if word_idx < last:
+                        all_elements.append("PAUSE_WORD:120")
+            if complete:
+                all_elements.append(f"PAUSE_LINE:{line_pause}")
+
+    if all_elements and all_elements[-1].startswith("PAUSE_LINE"):
+        all_elements.pop()
+
+    if not all_elements:
+        all_elements = [f"PAUSE_LINE:{HiroConfig.PAUSE_LINE_UNIT * 2}"]
+
+    return parts, all_elements
+
+
+def get_random_note(root_midi, scale_name, flat_mode=False, quarter_tone=False):
+    scale = SCALES[scale_name]
+    if flat_mode:
+        return root_midi + 5
+    note = random.choice(scale)
+    if quarter_tone and random.random() < 0.3:
+        note += random.choice([0, 0.5, -0.5])
+    return root_midi + note
+
+
+def text_to_ust(
+    text_elements,
+    project_name,
+    tempo,
+    base_length,
+    root_key,
+    scale,
+    intone_level,
+    length_var,
+    stretch_prob,
+    melody_brain,
+    pre_utterance=25,
+    voice_overlap=10,
+    intensity_base=80,
+    envelope="0,10,35,0,100,100,0",
+    flat_mode=False,
+    quartertone_mode=False,
+    lyrical_mode=True,
+    use_motifs=True,
+    chord_mode=False,
+    contour_bias=0,
+    pitch_range=70,
+    accent="None",
+    rhythm="Straight",
+    grid=0,
+    on_progress=None,
+):
+    plan = GenerationPlan.compile(
+        project_name=project_name,
+        tempo=tempo,
+        base_length=base_length,
+        root_key=root_key,
+        scale_name=scale,
+        intone_level=intone_level,
+        length_var=length_var,
+        stretch_prob=stretch_prob,
+        pre_utterance=pre_utterance,
+        voice_overlap=voice_overlap,
+        intensity_base=intensity_base,
+        envelope=envelope,
+        flat_mode=flat_mode,
+        quartertone_mode=quartertone_mode,
+        lyrical_mode=lyrical_mode,
+        use_motifs=use_motifs,
+        chord_mode=chord_mode,
+        contour_bias=contour_bias,
+        pitch_range=pitch_range,
+        accent=accent,
+        rhythm=rhythm,
+        grid=grid,
+        seed=melody_brain.seed,
+    )
+    return render_ust(text_elements, plan, melody_brain, on_progress=on_progress)
+
+
+def render_ust(text_elements, plan, melody_brain, jobs=1, on_progress=None):
+    """Parsed elements + compiled GenerationPlan → UST text.
+
+    `on_progress(stage, done, total)` is called after every phrase; it may
+    raise to abort generation.
+    """
+    if plan.line_streams:
+        score = compose_lines(text_elements, plan, on_progress=on_progress)
+    elif plan.section_streams:
+        score = compose_sections(text_elements, plan, jobs=jobs, on_progress=on_progress)
+    else:
+        score = compose_score(text_elements, plan, melody_brain, on_progress=on_progress)
+    return write_ust(score, plan)
+
+
+def write_ust(score, plan):
+    """Serialize a list of ScoreNote into UST text"""
+    writer = USTWriter(project_name=plan.project_name, tempo=plan.tempo)
+    for note in score:
+        if note.kind == REST:
+            writer.add_rest(note.length)
+        elif note.kind == SMALL_TSU:
+            writer.add_small_tsu(note.note_num, length=note.length)
+        else:
+            writer.add_note(
+                length=note.length,
+                lyric=note.lyric,
+                note_num=note.note_num,
+                pre_utter=plan.pre_utterance,
+                voice_overlap=plan.voice_overlap,
+                intensity=note.intensity,
+                envelope=plan.envelope,
+                pbs=note.pbs,
+                pbw=note.pbw,
+                pby=note.pby,
+                pbm=note.pbm,
+                flags=plan.flags,
+                modulation=note.modulation,
+                vibrato=note.vibrato,
+            )
+    return writer.finalize()
+
+
+def compose_score(
+    text_elements, plan, melody_brain, element_offsets=None, on_progress=None
+):
+    """Parsed elements → list of ScoreNote (compose_melody + express_melody).
+
+    If `element_offsets` is a list, it receives, per element, the index of
+    the first score entry that element produced. `on_progress` as in
+    render_ust.
+    """
+    melody = compose_melody(
+        text_elements, plan, melody_brain, element_offsets, on_progress
+    )
+    return express_melody(melody, plan, melody_brain.seed, on_progress)
+
+
+def _entry_count(item):
+    return len(item) if isinstance(item, Phrase) else 1
+
+
+def compose_melody(
+    text_elements, plan, melody_brain, element_offsets=None, on_progress=None
+):
+    """Parsed elements → melody: list of Phrase and line/section rest ScoreNotes.
+
+    Pitches and lengths only; express_melody adds bends, intensity and
+    vibrato. `element_offsets` / `on_progress` as in compose_score
+    (progress counts elements, reported at every line break).
+
+    With plan.repeat_mode "Exact" / "Varied", a section or line whose
+    phoneme sequence already occurred is copied from its first occurrence
+    (varied lightly in "Varied") instead of being composed again.
+    """
+    melody = []
+    count = 0  # score entries in `melody` so far
+    starts = []  # per element: first score index
+    reuse = plan.repeat_mode != "New"
+    if reuse:
+        repeat_index = RepeatIndex(text_elements)
+        span_starts = {}  # element index → (melody index, score index)
+        span_ranges = {}  # (kind, span start) → (melody start, end, score start)
+        vary_rng = np.random.default_rng((melody_brain.seed, len(text_elements)))
+        skip_until = 0
+    accent_enabled = plan.accent_enabled
+    accent = plan.accent
+
+    # All lengths + stretches per line up front
+    rhythm_engine = RhythmEngine(
+        plan.base_length,
+        plan.length_var,
+        plan.stretch_prob,
+        max_stretch=3,
+        template=plan.rhythm,
+        grid=plan.grid,
+        seed=melody_brain.seed,
+    )
+    table = PHONEME_TABLE
+    element_ids = table.intern_elements(text_elements)
+    rhythm_layout = rhythm_engine.layout_elements(element_ids)
+    id_counts = Counter(element_ids)
+    analysis = MoraAnalysis(element_ids) if plan.lyric_echo else None
+    mora_pitch = {}  # mora position → melody offset, for echoes / cadences
+
+    # Current phrase, appended to `melody` at the next line / section break
+    phrase = Phrase()
+
+    total = len(text_elements)
+
+    def flush_phrase():
+        nonlocal phrase, count
+        if phrase.events:
+            melody.append(phrase)
+            count += len(phrase.events)
+            phrase = Phrase()
+            if on_progress:
+                on_progress("melody", len(starts), total)
+
+    def add_rest(length):
+        nonlocal count
+        melody.append(ScoreNote.rest(length))
+        count += 1
+
+    for element_idx, element in enumerate(text_elements):
+        if reuse:
+            if element_idx in repeat_index.ends:
+                flush_phrase()
+                for kind, span_start in repeat_index.ends[element_idx]:
+                    if span_start in span_starts:
+                        first, score_first = span_starts[span_start]
+                        span_ranges[kind, span_start] = (first, len(melody), score_first)
+            if element_idx < skip_until:
+                continue
+            span_starts[element_idx] = (len(melody), count)
+            source = repeat_index.source(element_idx)
+            if source is not None:
+                kind, src, end = source
+                first, last, score_first = span_ranges[kind, src]
+                block = [item.copy() for item in melody[first:last]]
+                if plan.repeat_mode == "Varied":
+                    vary_phrases(block, plan, vary_rng)
+                shift = count - score_first
+                starts.extend(starts[i] + shift for i in range(src, src + end - element_idx))
+                melody.extend(block)
+                count += sum(_entry_count(item) for item in block)
+                if analysis is not None:
+                    for idx in range(element_idx, end):
+                        pos = analysis.mora_of.get(idx)
+                        src_pos = analysis.mora_of.get(src + idx - element_idx)
+                        if pos is not None and src_pos in mora_pitch:
+                            mora_pitch[pos] = mora_pitch[src_pos]
+                skip_until = end
+                continue
+        starts.append(count + len(phrase.events))
+        if element.startswith("PAUSE_WORD:"):
+            pause_length = int(element.split(":")[1])
+            phrase.events.append(("rest", pause_length))
+            continue
+        if accent_enabled:
+            word_phonemes = []
+            word_start = True
+        if element.startswith("PAUSE_LINE:"):
+            flush_phrase()
+            melody_brain.phrase_len = 0
+            melody_brain.recent_notes.clear()
+            pause_length = int(element.split(":")[1])
+            num_rests = pause_length // HiroConfig.PAUSE_LINE_UNIT
+            for _ in range(num_rests):
+                add_rest(HiroConfig.PAUSE_LINE_UNIT)
+            continue
+
+        if element.startswith("PAUSE_SECTION:"):
+            flush_phrase()
+            melody_brain.phrase_len = 0
+            melody_brain.recent_notes.clear()
+            pause_length = int(element.split(":")[1])
+            num_rests = pause_length // HiroConfig.PAUSE_SECTION_UNIT
+            for _ in range(num_rests):
+                add_rest(HiroConfig.PAUSE_SECTION_UNIT)
+            continue
+
+        romaji_phoneme = element
+
+        # small tsu
+        if romaji_phoneme == "っ":
+            phrase.events.append(("tsu", None))
+            continue
+
+        # WORD BOUNDARY DETECTION + ACCENT
+        if accent_enabled and romaji_phoneme not in ["っ", "+"]:
+            if word_start or romaji_phoneme in [" ", "　", "、", "，"]:
+                if word_phonemes:
+                    word_length = len(word_phonemes)
+                    melody_brain.set_accent_pattern(accent, max(2, word_length))
+                word_phonemes = []
+                word_start = False
+            word_phonemes.append(romaji_phoneme)
+        else:
+            word_start = True
+        stretch_notes = rhythm_layout[element_idx]
+
+        if accent_enabled and len(word_phonemes) == 1:
+            estimated_word_length = min(
+                6, max(2, id_counts[element_ids[element_idx]])
+            )
+            melody_brain.set_accent_pattern(accent, estimated_word_length)
+
+        if analysis is not None:
+            guide = analysis.source(element_idx)
+            if guide is not None and guide[0] in mora_pitch:
+                melody_brain.guide_note = mora_pitch[guide[0]]
+                melody_brain.guide_weight = guide[1]
+
+        for note_id, note_length in stretch_notes:
+            if plan.lyrical_mode:
+                note_num = plan.root_key + melody_brain.plan_note(plan, note_id)
+            else:
+                note_num = get_random_note(
+                    plan.root_key,
+                    plan.scale_name,
+                    flat_mode=plan.flat_mode,
+                    quarter_tone=plan.quartertone_mode,
+                )
+
+            phrase.events.append(("note", len(phrase.note_ids)))
+            phrase.note_ids.append(note_id)
+            phrase.note_nums.append(note_num)
+            phrase.lengths.append(note_length)
+            phrase.states.append(
+                bend_state(
+                    note_num,
+                    plan.quartertone_mode,
+                    accent_enabled,
+                    accent,
+                    melody_brain,
+                )
+            )
+            phrase.heights.append(melody_brain.last_note)
+            phrase.phrase_lens.append(melody_brain.phrase_len)
+
+        if analysis is not None and stretch_notes:
+            pos = analysis.mora_of.get(element_idx)
+            if pos is not None:
+                mora_pitch[pos] = phrase.note_nums[-len(stretch_notes)] - plan.root_key
+        melody_brain.guide_note = None
+
+    flush_phrase()
+    if element_offsets is not None:
+        element_offsets.extend(starts)
+    return melody
+
+
+def express_melody(melody, plan, seed, on_progress=None):
+    """Melody from compose_melody → ScoreNotes with bends, intensity, vibrato"""
+    curve_stage = CurveStage(plan, seed=seed)
+    table = PHONEME_TABLE
+    vibrato_stage = VibratoStage(plan, table.stretch_id)
+    score = []
+    total = len(melody)
+    for done, item in enumerate(melody, 1):
+        if not isinstance(item, Phrase):
+            score.append(item)
+            continue
+        if on_progress:
+            on_progress("expression", done, total)
+        lengths = item.lengths
+        note_ids = item.note_ids
+        note_nums = item.note_nums
+        bends, intensities = curve_stage.phrase_curves(
+            note_nums, lengths, item.states, item.heights, item.phrase_lens
+        )
+        vibratos = vibrato_stage.phrase_vibrato(note_ids, lengths)
+        for kind, value in item.events:
+            if kind == "rest":
+                score.append(ScoreNote.rest(value))
+            elif kind == "tsu":
+                score.append(ScoreNote.small_tsu(plan.root_key, length=60))
+            else:
+                pbs, pbw, pby, pbm = bends[value]
+                vbr, modulation = vibratos[value]
+                note_id = note_ids[value]
+                score.append(
+                    ScoreNote(
+                        NOTE,
+                        lengths[value],
+                        lyric=table.alias[note_id],
+                        note_num=note_nums[value],
+                        intensity=intensities[value],
+                        pbs=pbs,
+                        pbw=pbw,
+                        pby=pby,
+                        pbm=pbm,
+                        modulation=modulation,
+                        vibrato=vbr,
+                        phoneme_id=note_id,
+                    )
+                )
+    return score
+
+
+def split_sections(text_elements):
+    """Elements → [(first element index, elements)], cut before each PAUSE_SECTION"""
+    sections = []
+    start = 0
+    for idx, element in enumerate(text_elements):
+        if idx > start and element.startswith("PAUSE_SECTION:"):
+            sections.append((start, text_elements[start:idx]))
+            start = idx
+    if start < len(text_elements) or not sections:
+        sections.append((start, text_elements[start:]))
+    return sections
+
+
+def section_seeds(seed, count):
+    """One independent seed per section, spawned from the master seed"""
+    children = np.random.SeedSequence(seed & 0xFFFFFFFFFFFFFFFF).spawn(count)
+    return [int(child.generate_state(1)[0]) or 1 for child in children]
+
+
+def _compose_section(text_elements, plan, seed, express=True):
+    """Pool task: one section with its own brain → (score or melody, offsets)"""
+    offsets = []
+    melody = compose_melody(text_elements, plan, MelodyBrain(seed=seed), offsets)
+    if express:
+        return express_melody(melody, plan, seed), offsets
+    return melody, offsets
+
+
+_section_pools = {}
+
+
+def _section_pool(jobs):
+    pool = _section_pools.get(jobs)
+    if pool is None:
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        _section_pools[jobs] = pool
+    return pool
+
+
+def _map_sections(text_elements, plan, jobs, express):
+    """→ (section seeds, iterable of _compose_section results in order)"""
+    sections = split_sections(text_elements)
+    seeds = section_seeds(plan.seed, len(sections))
+    if jobs > 1 and len(sections) > 1:
+        pool = _section_pool(jobs)
+        results = pool.map(
+            _compose_section,
+            [elements for _, elements in sections],
+            [plan] * len(sections),
+            seeds,
+            [express] * len(sections),
+        )
+    else:
+        results = (
+            _compose_section(elements, plan, seed, express)
+            for (_, elements), seed in zip(sections, seeds)
+        )
+    return seeds, results
+
+
+def compose_sections(
+    text_elements, plan, element_offsets=None, jobs=1, on_progress=None
+):
+    """compose_score with an independent RNG stream per section.
+
+    Every section gets a fresh MelodyBrain seeded from section_seeds(), so the
+    sections can be composed on `jobs` processes and concatenated in order;
+    the result does not depend on `jobs`. Note IDs are assigned by write_ust.
+    Progress is reported per finished section.
+    """
+    seeds, results = _map_sections(text_elements, plan, jobs, express=True)
+    score = []
+    for done, (section_score, offsets) in enumerate(results, 1):
+        if element_offsets is not None:
+            element_offsets.extend(len(score) + offset for offset in offsets)
+        score.extend(section_score)
+        if on_progress:
+            on_progress("melody", done, len(seeds))
+    return score
+
+
+def compose_section_melodies(
+    text_elements, plan, element_offsets=None, jobs=1, on_progress=None
+):
+    """compose_sections up to the melody → [(section seed, melody)].
+
+    Expressing each melody with its seed (express_melody) and concatenating
+    gives exactly compose_sections().
+    """
+    seeds, results = _map_sections(text_elements, plan, jobs, express=False)
+    segments = []
+    count = 0
+    for done, (seed, (melody, offsets)) in enumerate(zip(seeds, results), 1):
+        if on_progress:
+            on_progress("melody", done, len(seeds))
+        if element_offsets is not None:
+            element_offsets.extend(count + offset for offset in offsets)
+        count += sum(_entry_count(item) for item in melody)
+        segments.append((seed, melody))
+    return segments
+
+
+def split_lines(text_elements):
+    """Elements → [(first element index, elements)], one chunk per lyric line
+    (with its PAUSE_LINE) and one per PAUSE_SECTION."""
+    chunks = []
+    start = 0
+    for idx, element in enumerate(text_elements):
+        if element.startswith("PAUSE_SECTION:"):
+            if idx > start:
+                chunks.append((start, text_elements[start:idx]))
+            chunks.append((idx, text_elements[idx : idx + 1]))
+            start = idx + 1
+        elif element.startswith("PAUSE_LINE:"):
+            chunks.append((start, text_elements[start : idx + 1]))
+            start = idx + 1
+    if start < len(text_elements) or not chunks:
+        chunks.append((start, text_elements[start:]))
+    return chunks
+
+
+def line_seed(seed, elements, occurrence=0):
+    """Seed for one line from the master seed and the line's own content, so
+    editing (or inserting) a line leaves every other line's stream alone."""
+    digest = zlib.crc32("\n".join(elements).encode("utf-8"))
+    entropy = (seed & 0xFFFFFFFFFFFFFFFF, digest, occurrence)
+    return int(np.random.SeedSequence(entropy).generate_state(1)[0]) or 1
+
+
+def compose_line_melodies(
+    text_elements, plan, element_offsets=None, cache=None, on_progress=None
+):
+    """Melody per lyric line, each from a fresh MelodyBrain on line_seed() →
+    [(line seed, melody)] (express each with express_melody).
+
+    `cache`: optional dict from the previous call with the same melody
+    settings; lines found in it are not composed again. On return it holds
+    exactly this call's lines.
+    """
+    seen = Counter()
+    used = {}
+    segments = []
+    count = 0
+    lines = split_lines(text_elements)
+    for done, (_, elements) in enumerate(lines, 1):
+        if on_progress:
+            on_progress("melody", done, len(lines))
+        key = tuple(elements)
+        occurrence = seen[key]
+        seen[key] += 1
+        entry = cache.get((key, occurrence)) if cache is not None else None
+        if entry is None:
+            seed = line_seed(plan.seed, elements, occurrence)
+            offsets = []
+            melody = compose_melody(elements, plan, MelodyBrain(seed=seed), offsets)
+            entry = (seed, melody, offsets)
+        used[key, occurrence] = entry
+        seed, melody, offsets = entry
+        if element_offsets is not None:
+            element_offsets.extend(count + offset for offset in offsets)
+        count += sum(_entry_count(item) for item in melody)
+        segments.append((seed, melody))
+    if cache is not None:
+        cache.clear()
+        cache.update(used)
+    return segments
+
+
+def compose_lines(text_elements, plan, element_offsets=None, on_progress=None):
+    """compose_score with an independent RNG stream per lyric line"""
+    segments = compose_line_melodies(
+        text_elements, plan, element_offsets, on_progress=on_progress
+    )
+    score = []
+    for done, (seed, melody) in enumerate(segments, 1):
+        score.extend(express_melody(melody, plan, seed))
+        if on_progress:
+            on_progress("expression", done, len(segments))
+    return score
+
+
+def get_random_note(
+    root_midi,
+    scale_name,
+    intone_level="Tight (1)",
+    flat_mode=False,
+    quarter_tone=False,
+    use_motifs=True,
+    chord_mode=False,
+):
+    scale = SCALES[scale_name]
+    if flat_mode:
+        return root_midi + 5
+
+    # 1. START with random/default
+    base_semitone = random.choice(scale)
+
+    # Motifs
+    if use_motifs:
+        if not hasattr(get_random_note, "_recent_notes"):
+            get_random_note._recent_notes = []
+        recent = get_random_note._recent_notes
+        if len(recent) >= 2:
+            motif_continue = recent[-1]
+            base_semitone = min(scale, key=lambda x: abs(x - (motif_continue % 12)))
+        get_random_note._recent_notes.append(base_semitone)
+        if len(get_random_note._recent_notes) > 4:
+            get_random_note._recent_notes = get_random_note._recent_notes[-4:]
+
+    # Chords
+    settings = get_intone_settings(intone_level)
+    if chord_mode:
+        chord_root = {0: 0, 3: 5, 5: 7}.get(random.randint(0, 2), 0)
+        chord = [n for n in [(chord_root + i) % 12 for i in [0, 4, 7]] if n in scale]
+        base_semitone = random.choice(chord or scale)
+
+    # Leap limits
+    if settings["leap"] < 3:
+        base_semitone = min(base_semitone, settings["leap"] * 2)
+
+    # Microtones
+    if quarter_tone and random.random() < 0.5:
+        base_semitone += random.choice([0, 0.5, -0.5])
+
+    return root_midi + base_semitone
+
+
+def lyrics_to_ust(lyrics, plan, phonemizer=None, on_warning=None):
+    """Lyrics text + GenerationPlan → (UST text, parsed elements)"""
+    if phonemizer is None:
+        phonemizer = Phonemizer()
+        phonemizer.set_mode(plan.phoneme_mode)
+    parts, elements = parse_song_structure(
+        lyrics,
+        plan.line_pause,
+        plan.section_pause,
+        on_warning=on_warning,
+        phonemizer=phonemizer,
+    )
+    return render_ust(elements, plan, MelodyBrain(seed=plan.seed)), elements
@@ -50,14 +50,14 @@ PreUtterance={pre_utter}
 VoiceOverlap={voice_overlap}
 Velocity=100
 Intensity={intensity}
-Modulation=0
+Modulation={modulation}
 Flags={flags}
 PBS={pbs}
 PBW={pbw}
-PBY=0
-PBM=,
+PBY={pby}
+PBM={pbm}
 StartPoint=0
 Envelope={envelope}
-"""
+{vibrato}"""
 
 TRACK_END = "\n[#TRACKEND]\n"
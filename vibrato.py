@@ -0,0 +1,88 @@
+# vibrato.py
+"""Note-level vibrato / modulation from a small library of precomputed shapes"""
+
+import numpy as np
+
+# Normalized shapes: (length %, cycle factor, depth factor, fade-in %, fade-out %,
+# phase %, modulation). Scaled below into concrete VBR strings once per module load.
+VIBRATO_SHAPES = {
+    "Shallow": (50, 1.1, 0.6, 30, 20, 0, 10),
+    "Natural": (65, 1.0, 1.0, 25, 20, 0, 20),
+    "Late": (45, 0.9, 1.3, 40, 15, 0, 30),
+}
+
+BASE_CYCLE_MS = 180
+BASE_DEPTH_CENTS = 30
+
+# Sustain length (ms) → shape; anything shorter than the first edge gets none
+SUSTAIN_TIERS_MS = np.array([300, 550, 1000])
+TIER_SHAPES = ("Shallow", "Natural", "Late")
+
+# Phrase position (first 40% / middle / last 25%) → depth scale
+POSITION_EDGES = np.array([0.4, 0.75])
+POSITION_DEPTH = (0.8, 1.0, 1.3)
+
+
+def _build_table():
+    """[(tier, position)] → ("VBR=...\\n", modulation), flattened row-major"""
+    table = []
+    for shape_name in TIER_SHAPES:
+        length, cycle, depth, fade_in, fade_out, phase, modulation = VIBRATO_SHAPES[
+            shape_name
+        ]
+        for position_scale in POSITION_DEPTH:
+            vbr = ",".join(
+                str(v)
+                for v in (
+                    length,
+                    int(BASE_CYCLE_MS * cycle),
+                    int(BASE_DEPTH_CENTS * depth * position_scale),
+                    fade_in,
+                    fade_out,
+                    phase,
+                    0,
+                    0,
+                )
+            )
+            table.append((f"VBR={vbr}\n", modulation))
+    return table
+
+
+VIBRATO_TABLE = _build_table()
+NO_VIBRATO = ("", 0)
+
+
+class VibratoStage:
+    """Chooses a shape per sustain (a vowel plus its "+" notes) for a phrase.
+
+    Vibrato goes on the last note of each sustain, sized by the whole
+    sustain, so stretched vowels vibrate as one held note.
+    """
+
+    def __init__(self, plan, stretch_id):
+        self.enabled = plan.vibrato
+        self.stretch_id = stretch_id
+        self.ms_per_tick = 60000.0 / (float(plan.tempo) * 480.0)
+
+    def phrase_vibrato(self, note_ids, lengths):
+        """→ one (vbr_line, modulation) per note"""
+        n = len(note_ids)
+        if not self.enabled or not n:
+            return [NO_VIBRATO] * n
+
+        is_tail = np.asarray(note_ids) == self.stretch_id
+        group = np.cumsum(~is_tail) - 1
+        group = np.maximum(group, 0)  # a phrase can't open with "+", but be safe
+        sustain_ms = (
+            np.bincount(group, weights=np.asarray(lengths, dtype=float))[group]
+            * self.ms_per_tick
+        )
+        last_of_group = np.ones(n, dtype=bool)
+        last_of_group[:-1] = ~is_tail[1:]
+
+        tier = np.searchsorted(SUSTAIN_TIERS_MS, sustain_ms, side="right") - 1
+        position = np.searchsorted(POSITION_EDGES, np.arange(n) / n, side="right")
+        slot = np.where(
+            last_of_group & (tier >= 0), tier * len(POSITION_DEPTH) + position, -1
+        )
+        return [VIBRATO_TABLE[s] if s >= 0 else NO_VIBRATO for s in slot.tolist()]